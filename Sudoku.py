@@ -1,42 +1,70 @@
 from typing import List, Tuple, Set
+from collections import deque
 from itertools import combinations
+from time import perf_counter
 from SudokuGrid import SudokuGrid
+from SudokuCandidates import CandidateGrid, popcount, digits_to_mask, mask_to_digits
+from SudokuTrace import Tracer, TraceLevel, SILENT
+from SudokuStrategies import get_strategies, new_stats
+from SudokuConstraints import Constraint, get_constraints, get_layout
 
 class Sudoku():
     ''' Applies constraints and strategies to a grid '''
-    def __init__(self, grid: SudokuGrid, constraints = None):
+    def __init__(self, grid: SudokuGrid, constraints = None, trace: Tracer = None, strategies = None):
         #assert len(grid[0]) == n, "Grid is not square. n_rows=%d, n_columns=%d" % (n, len(grid[0]))
         self.grid = grid
-        # create a grid of viable candidates for each position
-        candidates = []
-        for i in range(self.grid.size):
-            row = []
-            for j in range(self.grid.size):
-                if grid.grid_list[i][j] == 0:
-                    row.append(self.find_options(i, j))
-                else:
-                    row.append(set())
-            candidates.append(row)
-        self.grid.candidates = candidates
-        self.is_nonconsecutive = False
-        for c in constraints or []:
-            if c == "nonconsecutive":
-                self.is_nonconsecutive = True
-                self.erase_all_nonconsecutive()
-        print("starting grid with candidates")
-        self.grid.print_candidate_grid()
-
-    def erase_all_nonconsecutive(self):  
-        if not self.is_nonconsecutive:
-            return                            
-        grid_size = self.grid.size
-        erased = []
-        for i in range(grid_size):
-            for j in range(grid_size): 
-                if self.grid.grid_list[i][j] != 0:
-                    erased += self.erase_consecutive_adjacent(i, j, self.grid.grid_list[i][j])
-        self.constraint_propogation(erased)
-        
+        # create a grid of viable candidates for each position, stored as bitmasks
+        self.candidates = CandidateGrid.from_grid(grid)
+        self.grid.candidates = self.candidates
+        # variant constraints (see SudokuConstraints). Their houses and regions are units after the rows, columns
+        # and boxes, and their peers are added to the classic peers
+        constraints = get_constraints(constraints)
+        geometry = grid.geometry
+        layout = get_layout(grid, constraints) if constraints else None
+        self.constraints = layout.constraints if layout else [] # prepared for the shape of grid
+        self.units = layout.units if layout else geometry.units
+        self.cell_unit_ids = layout.cell_unit_ids if layout else geometry.cell_unit_ids
+        self.peers = layout.peers if layout else geometry.peers
+        self.place_hooks = layout.place_hooks if layout else ()
+        # strategies for constraint propogation, cheapest first (see SudokuStrategies). None for the defaults
+        # constraints with regions are applied to them in the same loop, before the strategies
+        self.strategies = [c for c in self.constraints if c.regions] + get_strategies(strategies)
+        self.stats = new_stats(self.strategies)
+        self.eliminated = 0 # total candidates removed
+        self.steps = None # set to a list to log (strategy name, unit id, candidates removed) whenever a strategy fires
+        self.unit_strategies = tuple(self.__strategies_for_unit(u, layout) for u in range(len(self.units)))
+        self.trace = trace or SILENT
+        if layout:
+            erased = []
+            for i, row in enumerate(grid.grid_list):
+                for j, x in enumerate(row):
+                    if x:
+                        erased += self.erase([x], layout.extra_peers[i][j], [])
+                        for constraint in self.place_hooks:
+                            erased += constraint.on_place(self, i, j, x)
+            self.constraint_propogation(erased)
+        if self.trace.level >= TraceLevel.CANDIDATES:
+            self.trace.write(TraceLevel.CANDIDATES, "starting grid with candidates")
+            self.trace.candidates(TraceLevel.CANDIDATES, self.grid)
+
+    def __strategies_for_unit(self, u: int, layout) -> Tuple[int, ...]:
+        ''' indices of the strategies which apply to unit u. Units are rows, then columns, then boxes, then the
+            constraints' houses and regions '''
+        size = self.grid.size
+        first_box, first_extra = 2 * size, 3 * size
+        owner = layout.region_owner[u] if layout else None
+        indices = []
+        for k, s in enumerate(self.strategies):
+            if isinstance(s, Constraint):
+                if owner is s:
+                    indices.append(k)
+            elif u < first_extra:
+                if (u >= first_box or not s.boxes_only) and (u < first_box or not s.lines_only):
+                    indices.append(k)
+            elif owner is None and not s.boxes_only and not s.lines_only:
+                indices.append(k) # an extra house
+        return tuple(indices)
+
     def __repr__(self) -> str:
         repr = ''
         for row in self.grid.grid_list:
@@ -44,10 +72,8 @@ class Sudoku():
         return repr
 
     def get_box(self, r: int, c: int) -> List[int]:
-        box = []
-        for i, j in self.grid.get_region_inds(r, c):
-            box.append(self.grid.grid_list[i][j])
-        return box
+        grid_list = self.grid.grid_list
+        return [grid_list[i][j] for i, j in self.grid.geometry.cell_units[r][c][2]]
 
     def counting(self, arr:List[int]) -> List[int]:
         """ count occurances in an array """
@@ -84,24 +110,22 @@ class Sudoku():
     
     def get_candidates(self, start, end):
         " get candidates within two corners of a rectangle/column/row"
-        candidates = set()
+        return set(mask_to_digits(self.get_candidates_mask(start, end)))
+
+    def get_candidates_mask(self, start, end) -> int:
+        " get the union of the candidate masks within two corners of a rectangle/column/row"
+        n = self.grid.size
+        masks = self.candidates.masks
+        mask = 0
         for i in range(start[0], end[0] + 1):
-            for j in range(start[1], end[1] + 1) :
-                candidates = candidates | self.grid.candidates[i][j]
-        return candidates
+            for j in range(start[1], end[1] + 1):
+                mask |= masks[i * n + j]
+        return mask
 
     def check_possible(self):
         """ check if each row/column/box can have all unique elements"""
-        # get rows
-        rows_set = []
-        for i in range(self.grid.size):
-            inds = [(i, j) for j in range(self.grid.size)]
-            rows_set.append(inds)
-        # get columns
-        cols_set = []
-        for j in range(self.grid.size):
-            inds = [(i, j) for i in range(self.grid.size)]
-            cols_set.append(inds)
+        rows_set = self.grid.geometry.rows
+        cols_set = self.grid.geometry.cols
         # check rows and columns
         type = ['row', 'column']
         for t, inds_set in enumerate([rows_set, cols_set]):
@@ -119,212 +143,438 @@ class Sudoku():
                 arr = self.get_box(i0, j0)[:]
                 if not self.no_duplicates(arr):
                     return False, 'Duplicate values in box (%d, %d)' % (i0, j0)
-                for i in range(i0, i0 + self.grid.box_height):
-                    for j in range(j0, j0 + self.grid.box_width):
-                        arr += list(self.grid.candidates[i][j])
+                arr += mask_to_digits(self.get_candidates_mask((i0, j0), (i0 + self.grid.box_height - 1, j0 + self.grid.box_width - 1)))
                 possible, missing = self.all_values(arr)
                 if not possible:
                     return False, '%d not placeable in box (%d, %d)' % (missing, i0, j0)
+        # check the givens against the variant constraints
+        values = [x for row in self.grid.grid_list for x in row]
+        for constraint in self.constraints:
+            for k, x in enumerate(values):
+                if x:
+                    values[k] = 0
+                    allowed = constraint.allows(values, k, x)
+                    values[k] = x
+                    if not allowed:
+                        return False, '%d at (%d, %d) breaks the %s constraint' % ((x,) + divmod(k, self.grid.size) + (constraint.name,))
         return True, None
 
     ## ------- Candidate functions -------- ##
     def place_and_erase(self, r: int, c: int, x: int, constraint_prop=True):
         """ remove x as a candidate in the grid in this row, column and box"""
-        self.place(r,c,x)
-        self.grid.candidates[r][c] = set()
         # remove candidate  x in neighbours
-        inds_row = [(r, j) for j in range(self.grid.size)]
-        inds_col = [(i, c) for i in range(self.grid.size)]
-        inds_box = self.grid.get_region_inds(r, c)
         erased = [(r, c)]  # set of indices for constraint propogration
-        erased += self.erase([x], inds_row + inds_col + inds_box, [])
+        erased += self.place(r,c,x)
+        erased += self.erase([x], self.peers[r][c], [])
         self.constraint_propogation(erased, constraint_prop=constraint_prop)
 
-    def constraint_propogation(self, erased_indices, constraint_prop=True):    
-        # constraint propogation, through every index that was changed
-        while erased_indices and constraint_prop:
-            i, j = erased_indices.pop()
-            inds_row = [(i, j) for j in range(self.grid.size)]
-            inds_col = [(i, j) for i in range(self.grid.size)]
-            inds_box = self.grid.get_region_inds(i, j)
-            erased_indices += self.hidden_naked_singles_pairs_triples([inds_row, inds_col, inds_box], types=[1, 2, 3])
-            
-            pointers = self.pointing_combos(inds_box)
-            for line, inds_pointer, num in pointers:
-                erased_indices += self.erase(num, line, inds_pointer)
-        # keeps = self.box_line_reduction(inds_box) # doesn't work??
-        # for inds_keep, nums in keeps:
-        #     self.erase(nums, inds_box, inds_keep)
-    
+    def constraint_propogation(self, erased_indices, constraint_prop=True):
+        """ re-analyse the row, column and box of every changed cell until nothing changes.
+            Each strategy has a queue of units, and each unit is queued at most once per strategy. It is only queued
+            again when one of its candidates changes. The cheapest strategy with queued units runs first """
+        if not constraint_prop:
+            return
+        units, cell_unit_ids = self.units, self.cell_unit_ids
+        strategies, unit_strategies = self.strategies, self.unit_strategies
+        queues = [deque() for _ in strategies]
+        queued = [bytearray(len(units)) for _ in strategies]
+        def push(cells):
+            for i, j in cells:
+                for u in cell_unit_ids[i][j]:
+                    for k in unit_strategies[u]:
+                        if not queued[k][u]:
+                            queued[k][u] = 1
+                            queues[k].append(u)
+        push(erased_indices)
+        stats = [self.stats[s.name] for s in strategies]
+        n_strategies = len(strategies)
+        k = 0
+        while k < n_strategies:
+            queue = queues[k]
+            if not queue:
+                k += 1 # escalate
+                continue
+            u = queue.popleft()
+            queued[k][u] = 0
+            eliminated = self.eliminated
+            t0 = perf_counter()
+            changed = strategies[k].apply(self, units[u])
+            s = stats[k]
+            s['time'] += perf_counter() - t0
+            s['applied'] += 1
+            if changed:
+                s['fired'] += 1
+                s['eliminated'] += self.eliminated - eliminated
+                if self.steps is not None:
+                    self.steps.append((strategies[k].name, u, self.eliminated - eliminated))
+                push(changed)
+                k = 0 # back to the cheapest strategy
+
+    def mark(self) -> int:
+        ''' checkpoint for undo(). Changes to the grid and candidates are recorded from the first call '''
+        return self.candidates.mark()
+
+    def undo(self, mark: int) -> None:
+        ''' roll back the grid and candidates to the checkpoint mark '''
+        self.candidates.undo(mark)
+
     def place(self, r: int, c: int, x: int):
+         ''' place x at (r, c). Returns the cells changed by the constraints which react to placements '''
+         if self.candidates.trail is not None:
+             self.candidates.trail.append((self.grid.grid_list[r], c, self.grid.grid_list[r][c]))
          self.grid.grid_list[r][c] = x
-         if self.is_nonconsecutive:
-             self.erase_consecutive_adjacent(r, c, x)
+         self.candidates.place(r, c, x)
+         erased = []
+         for constraint in self.place_hooks:
+             erased += constraint.on_place(self, r, c, x)
+         return erased
          
-    def erase_consecutive_adjacent(self, r: int, c: int, x: int):
-        erased = []
-        for row in range(r-1, r+1):
-            for col in range(c-1, c+1):
-                if row >= 0 and col >=0 and (row == r or col == c):
-                    edited = False
-                    if (x+1 in self.grid.candidates[row][col]):
-                        self.grid.candidates[row][col].remove(x+1)
-                        edited = True
-                    if (x-1 in self.grid.candidates[row][col]):
-                        self.grid.candidates[row][col].remove(x-1)
-                        edited = True
-                    if edited:
-                        erased.append((row,col))   
-        return erased                      
-           
     def erase(self, nums, indices, keep):
         """ erase nums as candidates in indices, but not in keep"""
         erased = []
+        n = self.grid.size
+        masks = self.candidates.masks
+        trail = self.candidates.trail
+        mask = digits_to_mask(nums)
         for i, j in indices:
-            edited = False
-            if ((i, j) in keep): 
-                continue
-            for x in nums:
-                if (x in self.grid.candidates[i][j]):
-                    self.grid.candidates[i][j].remove(x)
-                    edited = True
-            if edited:
+            k = i * n + j
+            if masks[k] & mask:
+                if ((i, j) in keep): 
+                    continue
+                if trail is not None:
+                    trail.append((masks, k, masks[k]))
+                self.eliminated += popcount(masks[k] & mask)
+                masks[k] &= ~mask
                 erased.append((i,j))            
         return erased
 
     def set_candidates(self, nums, indices):
         """set candidates at indices. Remove all other candidates"""
         erased = []
+        n = self.grid.size
+        masks = self.candidates.masks
+        trail = self.candidates.trail
+        mask = digits_to_mask(nums)
         for i, j in indices:
-            old = self.grid.candidates[i][j].intersection(nums) # beware triples where the whole triple is not in each box
-            if self.grid.candidates[i][j] != old: 
-                self.grid.candidates[i][j] = old.copy()
+            k = i * n + j
+            old = masks[k] & mask # beware triples where the whole triple is not in each box
+            if masks[k] != old: 
+                if trail is not None:
+                    trail.append((masks, k, masks[k]))
+                self.eliminated += popcount(masks[k] & ~mask)
+                masks[k] = old
                 erased.append((i, j)) # made changes here
         return erased
             
     def count_candidates(self, indices):
         count = [[] for _ in range(self.grid.size + 1)]
+        n = self.grid.size
+        masks = self.candidates.masks
         # get counts
         for i, j in indices:
-            for num in self.grid.candidates[i][j]:
+            for num in mask_to_digits(masks[i * n + j]):
                 count[num].append((i, j))
         return count
 
+    def count_masks(self, cell_masks):
+        ''' masks of the digits that occur exactly once, twice and three times in cell_masks '''
+        once = twice = thrice = more = 0
+        for m in cell_masks:
+            more |= thrice & m
+            thrice |= twice & m
+            twice |= once & m
+            once |= m
+        return once & ~twice, twice & ~thrice, thrice & ~more
+
+    def digit_positions(self, cell_masks, digits_mask):
+        ''' for each digit in digits_mask, a mask of the positions in cell_masks which hold it '''
+        positions = dict.fromkeys(mask_to_digits(digits_mask), 0)
+        for k, m in enumerate(cell_masks):
+            m &= digits_mask
+            if m:
+                for num in mask_to_digits(m):
+                    positions[num] |= 1 << k
+        return positions
+
     def get_unique(self, indices, type=(0, 1, 2)):
         # See documentation at https://www.sudokuwiki.org/Hidden_Candidates
-        groups = self.count_candidates(indices)
+        n = self.grid.size
+        masks = self.candidates.masks
+        cell_masks = [masks[i * n + j] for i, j in indices]
+        exactly_1, exactly_2, exactly_3 = self.count_masks(cell_masks)
         uniques = []  # final set of unique candidates to return
-        uniques_temp = {2: [], 3: []} # potential unique candidates
-        for num, group_inds in enumerate(groups):
-            c = len(group_inds)
-            if c == 1 and (1 in type):
-                uniques.append((group_inds, [num]))
-            if c == 2 and ((2 in type) or (3 in type)):
-                uniques_temp[2].append(num)
-            if c == 3 and (3 in type):
-                uniques_temp[3].append(num)
-        uniques_temp[3] += uniques_temp[2]
+        if 1 in type and exactly_1:
+            singles = []
+            for k, m in enumerate(cell_masks):
+                if m & exactly_1:
+                    singles.extend((num, k) for num in mask_to_digits(m & exactly_1))
+            singles.sort()
+            for num, k in singles:
+                uniques.append(([indices[k]], [num]))
+        # potential unique candidates
+        uniques_temp = {2: [], 3: []}
+        if (2 in type) or (3 in type):
+            uniques_temp[2] = list(mask_to_digits(exactly_2))
+        if 3 in type:
+            uniques_temp[3] = list(mask_to_digits(exactly_3)) + uniques_temp[2]
+        if not uniques_temp[3] and (2 not in type or not uniques_temp[2]):
+            return uniques
+        positions = self.digit_positions(cell_masks, exactly_2 | (exactly_3 if 3 in type else 0))
         # check for matching combos (both hidden and naked)
         for c in [2, 3]:
             if c not in type:
                 continue
-            for combo in list(combinations(uniques_temp[c], c)): # make every possible combination
-                group_inds = set(groups[combo[0]])
-                for k in range(1, c):
-                    group_inds = group_inds | set(groups[combo[k]]) # if positions are shared, this will not change the length
-                if len(group_inds) == c:
-                    # unique combo (pair or triple) found 
-                    uniques.append((list(group_inds), combo))
+            for combo, group_pos in self.__combos(uniques_temp[c], positions, c):
+                # unique combo (pair or triple) found 
+                group_inds = [indices[k] for k in range(len(indices)) if group_pos >> k & 1]
+                uniques.append((group_inds, combo))
         return uniques
 
+    def __combos(self, digits, positions, c, start=0, combo=(), group_pos=0):
+        ''' combinations of c digits, in the order of itertools.combinations, whose positions cover exactly c cells.
+            A partial combination is dropped as soon as its digits cover more than c cells, which matters for big grids '''
+        for k in range(start, len(digits)):
+            pos = group_pos | positions[digits[k]] # if positions are shared, this will not change the count
+            if popcount(pos) > c:
+                continue
+            if len(combo) + 1 == c:
+                if popcount(pos) == c:
+                    yield combo + (digits[k],), pos
+            else:
+                yield from self.__combos(digits, positions, c, k + 1, combo + (digits[k],), pos)
+
     def pointing_combos(self, inds_box):
         # See documentation https://www.sudokuwiki.org/Intersection_Removal
         # inds_box should come from self.get_inds_box()
-        groups = self.count_candidates(inds_box)
+        n = self.grid.size
+        masks = self.candidates.masks
+        cell_masks = [masks[i * n + j] for i, j in inds_box]
+        _, exactly_2, exactly_3 = self.count_masks(cell_masks)
         pointers = []
-        for num, indices in enumerate(groups):
+        for num, pos in self.digit_positions(cell_masks, exactly_2 | exactly_3).items():
             # need a pair or triple
-            if len(indices) == 2 or len(indices) == 3:
-                row_same, col_same = True, True
-                i0, j0 = indices[0]
-                for i, j in indices[1:]:
-                    row_same = row_same and (i == i0)
-                    col_same = col_same and (j == j0)
-                if row_same:
-                    line = [(i0, j) for j in range(self.grid.size)]
-                    pointers.append((line, indices, [num]))
-                if col_same:
-                    line = [(i, j0) for i in range(self.grid.size)]
-                    pointers.append((line, indices, [num]))
+            indices = [inds_box[k] for k in range(len(inds_box)) if pos >> k & 1]
+            row_same, col_same = True, True
+            i0, j0 = indices[0]
+            for i, j in indices[1:]:
+                row_same = row_same and (i == i0)
+                col_same = col_same and (j == j0)
+            if row_same:
+                pointers.append((self.grid.geometry.rows[i0], indices, [num]))
+            if col_same:
+                pointers.append((self.grid.geometry.cols[j0], indices, [num]))
         return pointers
 
-    # TODO: not used
     def box_line_reduction(self, inds_box):
         # See documentation https://www.sudokuwiki.org/Intersection_Removal
-        # inds_box should come from self.get_inds_box()
-        keeps = []
+        # a digit whose places in a row or column are all in this box can be removed from the rest of the box
+        # Returns (the cells of the box in the line, digits) to keep
+        n = self.grid.size
+        masks = self.candidates.masks
         i0, j0 = inds_box[0]
-        i1, j1 = min(i0 + self.grid.box_height, self.grid.size - 1), min(j0 + self.grid.box_width, self.grid.size - 1)
+        i1, j1 = i0 + self.grid.box_height, j0 + self.grid.box_width
+        keeps = []
         # check rows
-        for i in range(i0, i1 +  1):
-            row = self.get_candidates((i, j0), (i, j1))
-            line = self.get_candidates((i, 0), (i, j0 -1)) | self.get_candidates((i, j1 + 1), (i, self.grid.size - 1)) 
-            uniques = row.difference(line)   
+        for i in range(i0, i1):
+            inside = outside = 0
+            for j in range(n):
+                if j0 <= j < j1:
+                    inside |= masks[i * n + j]
+                else:
+                    outside |= masks[i * n + j]
+            uniques = inside & ~outside
             if uniques:
-                keeps.append(([(i, j) for j in range(j0, j1 + 1)], list(uniques)))
+                keeps.append(([(i, j) for j in range(j0, j1)], list(mask_to_digits(uniques))))
         # check columns
-        for j in range(j0, j1 + 1):
-            col = self.get_candidates((i0, j), (i1, j))
-            line = self.get_candidates((0, j), (i0 - 1, j)) | self.get_candidates((i1 + 1, j), (self.grid.size - 1, j)) 
-            uniques = col.difference(line)  
+        for j in range(j0, j1):
+            inside = outside = 0
+            for i in range(n):
+                if i0 <= i < i1:
+                    inside |= masks[i * n + j]
+                else:
+                    outside |= masks[i * n + j]
+            uniques = inside & ~outside
             if uniques:
-                keeps.append(([(i, j) for i in range(i0, i1 + 1)], list(uniques)))
+                keeps.append(([(i, j) for i in range(i0, i1)], list(mask_to_digits(uniques))))
         return keeps
 
+    def fish(self, line, order: int):
+        # See documentation https://www.sudokuwiki.org/X_Wing_Strategy and https://www.sudokuwiki.org/Sword_Fish_Strategy
+        # if a digit's places in order rows (including this line) lie in only order columns, one of the rows holds
+        # it in each of those columns, so it can be removed from the rest of the columns. The same with rows and
+        # columns swapped. Returns the cells whose candidates changed
+        n = self.grid.size
+        masks = self.candidates.masks
+        geometry = self.grid.geometry
+        is_row = line[0][0] == line[-1][0]
+        lines, crosses = (geometry.rows, geometry.cols) if is_row else (geometry.cols, geometry.rows)
+        index = line[0][0] if is_row else line[0][1]
+        # digits with at most order places in this line, and their places in every line as masks of the crossing lines
+        counts = [0] * (n + 1)
+        for i, j in line:
+            for x in mask_to_digits(masks[i * n + j]):
+                counts[x] += 1
+        digits = [x for x in range(1, n + 1) if 0 < counts[x] <= order]
+        if not digits:
+            return []
+        wanted = digits_to_mask(digits)
+        places = {x: [0] * n for x in digits}
+        for l, cells in enumerate(lines):
+            for k, (i, j) in enumerate(cells):
+                m = masks[i * n + j] & wanted
+                if m:
+                    for x in mask_to_digits(m):
+                        places[x][l] |= 1 << k
+        erased = []
+        for x in digits:
+            positions = places[x]
+            base_places = positions[index]
+            others = [l for l in range(n) if l != index and positions[l] and popcount(base_places | positions[l]) <= order]
+            for combo in combinations(others, order - 1):
+                cover = base_places
+                for l in combo:
+                    cover |= positions[l]
+                if popcount(cover) != order:
+                    continue
+                base = (index,) + combo
+                for cross in mask_to_digits(cover):
+                    cells = crosses[cross - 1]
+                    erased += self.erase([x], cells, [cells[l] for l in base])
+                break
+        return erased
 
-    def __get_indices_for_rows_and_columns(self):
-        ''' get indices by row '''
-        inds_set = []
-        for i in range(self.grid.size):
-            inds = [(i, j) for j in range(self.grid.size)]
-            inds_set.append(inds)
-        # check in column
-        for j in range(self.grid.size):
-            inds = [(i, j) for i in range(self.grid.size)]
-            inds_set.append(inds)
-        return inds_set
+    def xy_wing(self, indices):
+        # See documentation https://www.sudokuwiki.org/Y_Wing_Strategy
+        # a pivot with candidates ab sees pincers with ac and bc. Either pincer is c, so c is removed from the
+        # cells which see both pincers. Returns the cells whose candidates changed
+        n = self.grid.size
+        masks = self.candidates.masks
+        peers = self.peers
+        erased = []
+        for i, j in indices:
+            pivot = masks[i * n + j]
+            if popcount(pivot) != 2:
+                continue
+            wings = []
+            for p, q in peers[i][j]:
+                m = masks[p * n + q]
+                if popcount(m) == 2 and popcount(m & pivot) == 1:
+                    wings.append(((p, q), m))
+            for (cell1, m1), (cell2, m2) in combinations(wings, 2):
+                c = m1 & ~pivot
+                if c != m2 & ~pivot or m1 & pivot == m2 & pivot:
+                    continue
+                seen = set(peers[cell2[0]][cell2[1]])
+                targets = [cell for cell in peers[cell1[0]][cell1[1]] if cell in seen]
+                erased += self.erase(mask_to_digits(c), targets, [])
+        return erased
+
+    def simple_coloring(self, indices):
+        # See documentation https://www.sudokuwiki.org/Simple_Colouring
+        # a digit with two places in a unit is in exactly one of them. Following these links from a unit with two
+        # places colours the cells in two alternating colours, one of which holds the digit.
+        # If two cells of one colour see each other, that colour is false. A cell which sees both colours is false.
+        # Returns the cells whose candidates changed
+        n = self.grid.size
+        masks = self.candidates.masks
+        geometry = self.grid.geometry
+        peers = self.peers
+        erased = []
+        line_mask = 0
+        for i, j in indices:
+            line_mask |= masks[i * n + j]
+        for x in mask_to_digits(line_mask):
+            bit = 1 << (x - 1)
+            start = [cell for cell in indices if masks[cell[0] * n + cell[1]] & bit]
+            if len(start) != 2:
+                continue
+            colour = {start[0]: 0, start[1]: 1}
+            queue = deque(start)
+            while queue:
+                i, j = queue.popleft()
+                for unit in geometry.cell_units[i][j]:
+                    places = [cell for cell in unit if masks[cell[0] * n + cell[1]] & bit]
+                    if len(places) == 2:
+                        other = places[0] if places[1] == (i, j) else places[1]
+                        if other not in colour:
+                            colour[other] = 1 - colour[(i, j)]
+                            queue.append(other)
+            if len(colour) < 4:
+                continue # a single link has nothing to add to hidden singles
+            groups = ([cell for cell in colour if colour[cell] == 0], [cell for cell in colour if colour[cell] == 1])
+            for group in groups:
+                members = set(group)
+                if any(cell in members for i, j in group for cell in peers[i][j]):
+                    erased += self.erase([x], group, []) # colour wrap
+                    break
+            else:
+                for i in range(n):
+                    for j in range(n):
+                        if masks[i * n + j] & bit and (i, j) not in colour:
+                            seen = {colour[cell] for cell in peers[i][j] if cell in colour}
+                            if len(seen) == 2:
+                                erased += self.erase([x], [(i, j)], []) # colour trap
+        return erased
 
-        
     def flush_candidates(self) -> None:
         """set candidates across the whole grid, according to logical strategies"""
-        # get indices for each set
-        inds_box = self.grid.get_indices_for_regions()
-        inds_set = self.__get_indices_for_rows_and_columns()
-        inds_set.extend(inds_box)
-        for _ in range(1): # repeat this process in case changes are made
-            # apply strategies   
-            self.hidden_naked_singles_pairs_triples(inds_set, types=[1, 2])
-            
-            for inds in inds_box:
-                # pointing pairs
-                pointers = self.pointing_combos(inds)
-                for line, inds_pointer, num in pointers:
-                    self.erase(num, line, inds_pointer)
-                # box-line reduction
-                # keeps = self.box_line_reduction(inds)
-                # for inds_keep, nums in keeps:
-                #     self.erase(nums, inds, inds_keep)
-        self.erase_all_nonconsecutive() # TODO: ????                
-
-        
+        n = self.grid.size
+        self.constraint_propogation([(i, j) for i in range(n) for j in range(n)]) # every unit, with every strategy
+
+    def naked_singles(self, indices):
+        ''' place the digit of each empty cell in indices with one candidate, and erase it from the cell's peers.
+            Unlike place_and_erase this does not propagate. Returns the cells which changed '''
+        n = self.grid.size
+        masks = self.candidates.masks
+        grid_list = self.grid.grid_list
+        erased = []
+        for i, j in indices:
+            m = masks[i * n + j]
+            if m and not m & (m - 1) and grid_list[i][j] == 0:
+                x = m.bit_length()
+                erased.append((i, j))
+                erased += self.place(i, j, x)
+                erased += self.erase([x], self.peers[i][j], [])
+        return erased
+
+    def hidden_singles(self, indices):
+        ''' set the candidates of each cell holding the only place for a digit in indices to that digit.
+            Returns the cells whose candidates changed '''
+        n = self.grid.size
+        masks = self.candidates.masks
+        once = twice = 0
+        for i, j in indices:
+            m = masks[i * n + j]
+            twice |= once & m
+            once |= m
+        once &= ~twice
+        erased = []
+        if not once:
+            return erased
+        trail = self.candidates.trail
+        for i, j in indices:
+            k = i * n + j
+            m = masks[k]
+            single = m & once
+            if single and m != single:
+                if single & (single - 1):
+                    single = 0 # the only place for two digits is a contradiction
+                if trail is not None:
+                    trail.append((masks, k, m))
+                self.eliminated += popcount(m & ~single)
+                masks[k] = single
+                erased.append((i, j))
+        return erased
+
     def hidden_naked_singles_pairs_triples(self, indices_set, types):
         ''' use hidden/naked singles/pairs/triples to elimininate candidates
-         indices_set is a list of the rows, columns, and boxes to perform this strategy on '''
+         indices_set is a list of the rows, columns, and boxes to perform this strategy on.
+         Returns the cells whose candidates changed '''
         erased = []
         for inds in indices_set:
             uniques = self.get_unique(inds, types) 
             for inds_combo, combo in uniques:
-                self.set_candidates(combo, inds_combo) # passing back the erased here doesn't seem to be very helpful
+                erased += self.set_candidates(combo, inds_combo)
                 erased += self.erase(combo, inds, inds_combo)
         return erased
 
@@ -333,10 +583,4 @@ class Sudoku():
 
     def find_options(self, r: int, c: int) -> Set:
         ''' for a given cell return the possible digits by excluding digits in the same row, column, and box'''
-        nums = set(range(1, self.grid.size + 1))
-        set_row = set(self.grid.row(r))
-        set_col = set(self.grid.col(c))
-        set_box = set(self.get_box(r, c))
-        used = set_row | set_col | set_box
-        valid = nums.difference(used)
-        return valid
+        return set(mask_to_digits(self.candidates.options(r, c)))
@@ -0,0 +1,172 @@
+''' Benchmarks of the solver configurations over the bundled puzzle files and generated puzzles.
+
+    python SudokuBenchmark.py --output bench.json
+    python SudokuBenchmark.py --baseline bench.json --threshold 0.2
+
+    Each configuration is a set of keyword arguments for SudokuSolver.solveSudoku. Results are written as JSON.
+    With --baseline, the run fails (exit code 1) if the throughput of any corpus and configuration falls more than
+    threshold below the baseline.
+'''
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from SudokuGrid import SudokuGrid, standard_regions, DIGITS
+from SudokuSolver import SudokuSolver
+from SudokuIO import read_puzzles
+
+CORPORA = ['sudoku_top95.txt', 'sudoku_hardest.txt', 'sudoku_NY.txt', 'sudoku_nonconsecutive.txt']
+# variant constraints which every configuration applies to a corpus
+CORPUS_CONSTRAINTS = {'sudoku_nonconsecutive.txt': ['nonconsecutive']}
+
+CONFIGS = {
+    'logic': {'engine': 'logic'},
+    'logic-copy': {'engine': 'logic', 'backtrack': 'copy'},
+    'logic-degree': {'engine': 'logic', 'branching': 'degree'},
+    'logic-positions': {'engine': 'logic', 'branching': 'positions'},
+    'logic-lcv': {'engine': 'logic', 'value_order': 'lcv'},
+    'logic-advanced': {'engine': 'logic', 'strategies': ['singles', 'pointing', 'box-line', 'subsets', 'x-wing',
+                                                         'swordfish', 'xy-wing', 'coloring']},
+    'dlx': {'engine': 'dlx'},
+}
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    ''' nearest-rank percentile of an ascending list '''
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+def generated_puzzles(size: int, count: int, clue_fraction: float = 0.4, seed: int = 0) -> List[str]:
+    ''' random puzzles of a standard size: a shuffled solution pattern with most cells removed.
+        Uniqueness is not guaranteed, which does not matter for timing '''
+    rng = random.Random(seed)
+    regions_across, regions_down = standard_regions[size]
+    box_width, box_height = size // regions_across, size // regions_down
+    puzzles = []
+    for _ in range(count):
+        digits = list(range(1, size + 1))
+        rng.shuffle(digits)
+        bands = rng.sample(range(size // box_height), size // box_height)
+        stacks = rng.sample(range(size // box_width), size // box_width)
+        rows = [b * box_height + r for b in bands for r in rng.sample(range(box_height), box_height)]
+        cols = [s * box_width + c for s in stacks for c in rng.sample(range(box_width), box_width)]
+        cells = []
+        for r in rows:
+            for c in cols:
+                value = (box_width * (r % box_height) + r // box_height + c) % size
+                cells.append(DIGITS[digits[value]] if rng.random() < clue_fraction else '0')
+        puzzles.append(''.join(cells))
+    return puzzles
+
+def load_corpora(generated_count: int = 20) -> Dict[str, List[str]]:
+    corpora = {name: list(read_puzzles(name)) for name in CORPORA}
+    for size in sorted(standard_regions):
+        # 25x25 grids with 40% clues are far harder than published puzzles of that size
+        clue_fraction = 0.4 if size < 25 else 0.6
+        corpora[f'generated_{size}x{size}'] = generated_puzzles(size, generated_count, clue_fraction, seed=size)
+    return corpora
+
+def run_config(puzzles: List[str], kwargs: dict, memory: bool = True) -> dict:
+    ''' solve every puzzle with one configuration and summarise latency, search effort and memory '''
+    latencies = []
+    calls, max_depth, solved = 0, 0, 0
+    t0 = time.perf_counter()
+    for puzzle in puzzles:
+        tk0 = time.perf_counter()
+        _, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, **kwargs)
+        latencies.append(time.perf_counter() - tk0)
+        calls += info['calls']
+        max_depth = max(max_depth, info['max depth'])
+        solved += done
+    total = time.perf_counter() - t0
+    latencies.sort()
+    result = {
+        'count': len(puzzles),
+        'solved': solved,
+        'total_s': total,
+        'puzzles_per_sec': len(puzzles) / total if total else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'calls': calls,
+        'max_depth': max_depth,
+    }
+    if memory:
+        # separate pass, because tracing allocations slows everything down
+        tracemalloc.start()
+        for puzzle in puzzles:
+            SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, **kwargs)
+        result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+def run_benchmarks(corpora: Dict[str, List[str]] = None, configs: Dict[str, dict] = None, memory: bool = True,
+                   verbose: bool = True) -> dict:
+    corpora = corpora if corpora is not None else load_corpora()
+    configs = configs if configs is not None else CONFIGS
+    results = []
+    for corpus, puzzles in corpora.items():
+        for name, kwargs in configs.items():
+            result = {'corpus': corpus, 'config': name}
+            if corpus in CORPUS_CONSTRAINTS:
+                kwargs = dict(kwargs, constraints=CORPUS_CONSTRAINTS[corpus])
+            result.update(run_config(puzzles, kwargs, memory=memory))
+            results.append(result)
+            if verbose:
+                print("%-22s %-16s %4d/%-4d %9.1f/s  p50 %7.2fms  p95 %8.2fms  p99 %8.2fms  calls %6d  depth %3d" % (
+                    corpus, name, result['solved'], result['count'], result['puzzles_per_sec'],
+                    result['p50_ms'], result['p95_ms'], result['p99_ms'], result['calls'], result['max_depth']))
+    return {
+        'python': sys.version.split()[0],
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'configs': configs,
+        'results': results
+    }
+
+def compare(report: dict, baseline: dict, threshold: float = 0.2) -> List[str]:
+    ''' descriptions of every corpus and configuration whose throughput fell more than threshold below the baseline '''
+    base = {(r['corpus'], r['config']): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = base.get((result['corpus'], result['config']))
+        if old is None or not old['puzzles_per_sec']:
+            continue
+        ratio = result['puzzles_per_sec'] / old['puzzles_per_sec']
+        if ratio < 1 - threshold:
+            regressions.append('%s %s: %.1f puzzles/s vs %.1f in baseline (%.0f%%)' % (
+                result['corpus'], result['config'], result['puzzles_per_sec'], old['puzzles_per_sec'], ratio * 100))
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the Sudoku solver')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed fractional drop in throughput')
+    parser.add_argument('--configs', nargs='*', choices=sorted(CONFIGS), help='configurations to run')
+    parser.add_argument('--generated', type=int, default=20, help='number of generated puzzles per size')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory pass')
+    args = parser.parse_args(argv)
+
+    configs = {name: CONFIGS[name] for name in args.configs} if args.configs else CONFIGS
+    report = run_benchmarks(load_corpora(args.generated), configs, memory=not args.no_memory)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
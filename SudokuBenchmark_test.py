@@ -0,0 +1,32 @@
+from SudokuBenchmark import percentile, generated_puzzles, run_benchmarks, compare
+from SudokuGrid import SudokuGrid
+from Sudoku import Sudoku
+import unittest
+
+class SudokuBenchmarkTest(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 21))
+        self.assertEqual(percentile(values, 50), 10)
+        self.assertEqual(percentile(values, 95), 19)
+        self.assertEqual(percentile(values, 99), 20)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_generated_puzzles_are_consistent(self):
+        for size in [4, 6, 9]:
+            puzzles = generated_puzzles(size, 3, seed=1)
+            self.assertEqual(puzzles, generated_puzzles(size, 3, seed=1))
+            for puzzle in puzzles:
+                s = Sudoku(SudokuGrid(puzzle))
+                self.assertTrue(s.check_possible()[0])
+
+    def test_report_and_regression_check(self):
+        corpora = {'tiny': generated_puzzles(4, 3)}
+        configs = {'dlx': {'engine': 'dlx'}}
+        report = run_benchmarks(corpora, configs, memory=True, verbose=False)
+        result = report['results'][0]
+        for key in ['puzzles_per_sec', 'p50_ms', 'p95_ms', 'p99_ms', 'calls', 'max_depth', 'peak_memory_kb']:
+            self.assertIn(key, result)
+        self.assertEqual(result['solved'], 3)
+        self.assertEqual(compare(report, report), [])
+        faster = {'results': [dict(result, puzzles_per_sec=result['puzzles_per_sec'] * 2)]}
+        self.assertEqual(len(compare(report, faster, threshold=0.2)), 1)
@@ -0,0 +1,98 @@
+''' Branching policies for the backtracking search of SudokuSolver: where to guess when propagation stalls, and in
+    which order to try the guesses. A branch is a list of placements (r, c, x). Exactly one of them is true in any
+    solution, so trying each in turn still finds every solution.
+
+    Policies:
+        mrv        the digits of the cell with the fewest candidates, the first in scan order (minimum remaining values)
+        degree     as mrv, with ties broken by the most empty peers, since guessing there constrains the most cells
+        positions  the places of a digit in a unit (hidden placements) if some digit has fewer places in a unit than
+                   any cell has candidates. Otherwise as degree
+    Value orders:
+        ascending  digits in ascending order and cells in scan order
+        lcv        least constraining value first: the placement which removes the fewest candidates
+'''
+from typing import List, Tuple
+
+from SudokuCandidates import popcount, mask_to_digits
+
+BRANCHING_POLICIES = ('mrv', 'degree', 'positions')
+VALUE_ORDERS = ('ascending', 'lcv')
+
+def check_policy(branching: str, value_order: str) -> None:
+    if branching not in BRANCHING_POLICIES:
+        raise Exception(f"Unknown branching policy '{branching}'. Options are {BRANCHING_POLICIES}")
+    if value_order not in VALUE_ORDERS:
+        raise Exception(f"Unknown value order '{value_order}'. Options are {VALUE_ORDERS}")
+
+def _fewest_candidates(game, degree: bool):
+    ''' (number of candidates, r, c) of the empty cell with the fewest candidates above one, or None '''
+    size = game.grid.size
+    grid_list, masks = game.grid.grid_list, game.candidates.masks
+    best, ties = size + 1, []
+    for i in range(size):
+        row = grid_list[i]
+        for j in range(size):
+            if row[j] == 0:
+                n_options = popcount(masks[i * size + j])
+                if 1 < n_options < best:
+                    best, ties = n_options, [(i, j)]
+                elif degree and n_options == best:
+                    ties.append((i, j))
+    if not ties:
+        return None
+    if len(ties) == 1:
+        return (best,) + ties[0]
+    peers = game.peers
+    def n_empty_peers(cell):
+        return sum(1 for a, b in peers[cell[0]][cell[1]] if grid_list[a][b] == 0)
+    return (best,) + max(ties, key=n_empty_peers)
+
+def _fewest_positions(game):
+    ''' (number of places, x, cells) of the digit with the fewest places in a unit where it is not placed.
+        The number is 0 if a digit has nowhere to go. None if every digit is placed '''
+    size = game.grid.size
+    grid_list, masks = game.grid.grid_list, game.candidates.masks
+    best = None
+    for unit in game.grid.geometry.units:
+        places = [[] for _ in range(size + 1)]
+        placed = set()
+        for r, c in unit:
+            if grid_list[r][c]:
+                placed.add(grid_list[r][c])
+            else:
+                for x in mask_to_digits(masks[r * size + c]):
+                    places[x].append((r, c))
+        for x in range(1, size + 1):
+            if x not in placed and (best is None or len(places[x]) < best[0]):
+                best = (len(places[x]), x, places[x])
+                if best[0] == 0:
+                    return best
+    return best
+
+def _constrains(game, r: int, c: int, x: int) -> int:
+    ''' the number of candidates removed by placing x at (r, c) '''
+    size = game.grid.size
+    masks = game.candidates.masks
+    bit = 1 << (x - 1)
+    removed = popcount(masks[r * size + c]) - 1
+    return removed + sum(1 for a, b in game.peers[r][c] if masks[a * size + b] & bit)
+
+def get_branch(game, branching: str = 'mrv', value_order: str = 'ascending') -> List[Tuple[int, int, int]]:
+    ''' the placements to try in turn. Empty if the grid has a dead end '''
+    cell = _fewest_candidates(game, degree=branching != 'mrv')
+    branch = None
+    if branching == 'positions':
+        hidden = _fewest_positions(game)
+        if hidden is not None and hidden[0] == 0:
+            return []
+        if hidden is not None and (cell is None or hidden[0] < cell[0]):
+            n_places, x, cells = hidden
+            branch = [(r, c, x) for r, c in cells]
+    if branch is None:
+        if cell is None:
+            return []
+        _, r, c = cell
+        branch = [(r, c, x) for x in mask_to_digits(game.candidates.masks[r * game.grid.size + c])]
+    if value_order == 'lcv':
+        branch.sort(key=lambda placement: _constrains(game, *placement))
+    return branch
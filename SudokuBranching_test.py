@@ -0,0 +1,44 @@
+from SudokuBranching import get_branch, BRANCHING_POLICIES, VALUE_ORDERS
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+import Sudoku
+import unittest
+
+HARDEST = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+
+class SudokuBranchingTest(unittest.TestCase):
+    def test_policies_find_the_same_solutions(self):
+        solution = '812753649943682175675491283154237896369845721287169534521974368438526917796318452'
+        multiple = '080001206000020000020005040060010900002050400008000010030704050000000000406100080'
+        for branching in BRANCHING_POLICIES:
+            for value_order in VALUE_ORDERS:
+                grid, done, _ = SudokuSolver().solveSudoku(SudokuGrid(HARDEST), verbose=False, branching=branching,
+                                                           value_order=value_order)
+                self.assertEqual((done, str(grid)), (True, solution))
+            _, _, info = SudokuSolver().solveSudoku(SudokuGrid(multiple), verbose=False, all_solutions=True,
+                                                    branching=branching, value_order='lcv')
+            self.assertEqual(info['solutions'], 379)
+
+    def test_mrv_is_the_first_cell_with_fewest_candidates(self):
+        game = Sudoku.Sudoku(SudokuGrid(HARDEST))
+        game.flush_candidates()
+        branch = get_branch(game, 'mrv')
+        r, c, _ = branch[0]
+        fewest = min(len(game.candidates[i][j]) for i in range(9) for j in range(9) if len(game.candidates[i][j]) > 1)
+        self.assertEqual(len(game.candidates[r][c]), fewest)
+        self.assertEqual([x for _, _, x in branch], sorted(game.candidates[r][c]))
+        self.assertEqual({(i, j) for i, j, _ in get_branch(game, 'mrv', 'lcv')}, {(r, c)})
+
+    def test_positions_branches_on_a_digit_in_a_unit(self):
+        grid = SudokuGrid(size=9)
+        for r, c in ((1, 3), (2, 6), (3, 1), (6, 2)):
+            grid.grid_list[r][c] = 1 # 1 can only go at (0, 0) in the first box
+        game = Sudoku.Sudoku(grid, strategies=[])
+        self.assertEqual(get_branch(game, 'positions'), [(0, 0, 1)])
+        self.assertEqual(len(get_branch(game, 'mrv')), 8)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(Exception):
+            SudokuSolver().solveSudoku(SudokuGrid(HARDEST), verbose=False, branching='random')
+        with self.assertRaises(Exception):
+            SudokuSolver().solveSudoku(SudokuGrid(HARDEST), verbose=False, value_order='random')
@@ -0,0 +1,258 @@
+''' A cache of solutions keyed by the canonical form of a puzzle, so that repeats are found even when they have been
+    relabelled, rotated, transposed or had rows, columns, bands or stacks swapped.
+
+    The canonical form is the smallest grid string (blanks first, digits relabelled in order of appearance) over every
+    transformation of the puzzle whose rows and columns are sorted by invariants such as their number of givens.
+    Sorting first means only the transformations that tie on the invariants have to be compared, rather than all
+    3,359,232 of a 9x9 grid. For very symmetric puzzles the comparison is cut off at MAX_CANDIDATES. The form is then
+    not canonical and equivalent puzzles may be missed, but the cached solutions are still correct.
+
+    Lookups go through an LRU of exact puzzle strings, an LRU of canonical forms, and optionally an sqlite file.
+'''
+import sqlite3
+from collections import OrderedDict
+from itertools import groupby, permutations, islice
+from typing import Dict, Iterator, List, Tuple
+
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+
+MAX_CANDIDATES = 20000
+
+def _encode(values) -> str:
+    return ''.join(chr(48 + v) for v in values)
+
+def _decode(string: str) -> List[int]:
+    return [ord(ch) - 48 for ch in string]
+
+def _sorted_orders(items, key) -> Iterator[tuple]:
+    ''' every order of items which is sorted by key, generated lazily. Items with equal keys are permuted '''
+    groups = [tuple(g) for _, g in groupby(sorted(items, key=key), key)]
+    def orders(k):
+        if k == len(groups):
+            yield ()
+            return
+        for head in permutations(groups[k]):
+            for tail in orders(k + 1):
+                yield head + tail
+    return orders(0)
+
+def _line_orders(signatures: list, group_size: int) -> Iterator[tuple]:
+    ''' orders of the rows (or columns) with the groups (bands or stacks) sorted by their signatures,
+        and the lines sorted by signature within each group. Generated lazily, as ties can give billions '''
+    n_groups = len(signatures) // group_size
+    groups = [range(g * group_size, (g + 1) * group_size) for g in range(n_groups)]
+    group_signature = [tuple(sorted(signatures[k] for k in group)) for group in groups]
+    def orders(group_order, k):
+        if k == len(group_order):
+            yield ()
+            return
+        for part in _sorted_orders(groups[group_order[k]], signatures.__getitem__):
+            for rest in orders(group_order, k + 1):
+                yield part + rest
+    for group_order in _sorted_orders(range(n_groups), group_signature.__getitem__):
+        yield from orders(group_order, 0)
+
+def _signatures(grid: List[List[int]], freq: List[int], group_size: int) -> List[tuple]:
+    ''' for each row, a signature which does not change under the symmetries that keep it a row:
+        its number of givens, how common its digits are, and its number of givens per stack '''
+    signatures = []
+    for row in grid:
+        givens = [v for v in row if v]
+        per_stack = sorted(sum(1 for v in row[k:k + group_size] if v) for k in range(0, len(row), group_size))
+        signatures.append((len(givens), tuple(sorted(freq[v] for v in givens)), tuple(per_stack)))
+    return signatures
+
+class Transform():
+    ''' a symmetry of the grid: an optional transpose, then an order of rows and columns, then a relabelling '''
+    def __init__(self, transpose: bool, rows: tuple, cols: tuple, labels: Dict[int, int]):
+        self.transpose = transpose
+        self.rows = rows
+        self.cols = cols
+        self.labels = labels
+        self.inverse_labels = {label: x for x, label in labels.items()}
+
+    def apply(self, grid_list: List[List[int]]) -> List[int]:
+        ''' the transformed grid, flattened '''
+        g = [list(col) for col in zip(*grid_list)] if self.transpose else grid_list
+        labels = self.labels
+        return [labels[g[r][c]] if g[r][c] else 0 for r in self.rows for c in self.cols]
+
+    def invert(self, values: List[int]) -> List[List[int]]:
+        ''' the grid which this transform maps to the flattened values '''
+        n = len(self.rows)
+        inverse = self.inverse_labels
+        grid = [[0] * n for _ in range(n)]
+        for a, r in enumerate(self.rows):
+            for b, c in enumerate(self.cols):
+                v = values[a * n + b]
+                if self.transpose:
+                    grid[c][r] = inverse[v] if v else 0
+                else:
+                    grid[r][c] = inverse[v] if v else 0
+        return grid
+
+def _image(grid, rows, cols, best):
+    ''' the relabelled grid in this row and column order, or None as soon as it is larger than best '''
+    labels = {}
+    out = []
+    tied = best is not None
+    for r in rows:
+        row = grid[r]
+        for c in cols:
+            v = row[c]
+            if v:
+                if v not in labels:
+                    labels[v] = len(labels) + 1
+                v = labels[v]
+            if tied:
+                b = best[len(out)]
+                if v > b:
+                    return None
+                tied = v == b
+            out.append(v)
+    return out, labels
+
+def canonical_form(grid: SudokuGrid) -> Tuple[str, Transform]:
+    ''' the canonical string of a grid, and the transform which maps the grid to it '''
+    n = grid.size
+    freq = [0] * (n + 1)
+    for row in grid.grid_list:
+        for v in row:
+            freq[v] += 1
+    freq[0] = 0
+    grids = [(False, grid.grid_list, grid.box_height, grid.box_width)]
+    if grid.box_height == grid.box_width:
+        grids.append((True, [list(col) for col in zip(*grid.grid_list)], grid.box_height, grid.box_width))
+
+    def candidates():
+        # lazily, so that islice stops the generation of the orders as well as their comparison
+        for transpose, g, band_height, stack_width in grids:
+            gt = [list(col) for col in zip(*g)]
+            row_signatures = _signatures(g, freq, stack_width)
+            col_signatures = _signatures(gt, freq, band_height)
+            for rows in _line_orders(row_signatures, band_height):
+                for cols in _line_orders(col_signatures, stack_width):
+                    yield transpose, g, rows, cols
+
+    best, best_transform = None, None
+    for transpose, g, rows, cols in islice(candidates(), MAX_CANDIDATES):
+        image = _image(g, rows, cols, best)
+        if image is not None and (best is None or image[0] < best):
+            best, labels = image
+            best_transform = (transpose, rows, cols, labels)
+    transpose, rows, cols, labels = best_transform
+    # digits which are not in the puzzle get the remaining labels in order
+    missing = [x for x in range(1, n + 1) if x not in labels]
+    for x in missing:
+        labels[x] = len(labels) + 1
+    return _encode(best), Transform(transpose, rows, cols, labels)
+
+
+class LRUCache():
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class SolutionCache():
+    ''' Solves puzzles with SudokuSolver, remembering solutions by canonical form.
+        path is an optional sqlite file which keeps the solutions between runs. solve_kwargs are passed on to
+        solveSudoku. Only classic puzzles are cached, since other constraints do not share the symmetries. '''
+    def __init__(self, maxsize: int = 10000, path: str = None, engine: str = 'dlx', **solve_kwargs):
+        self.exact = LRUCache(maxsize)     # puzzle string -> solution string
+        self.canonical = LRUCache(maxsize) # canonical puzzle -> canonical solution
+        self.solve_kwargs = dict(solve_kwargs, engine=engine, verbose=False)
+        self.stats = {'exact': 0, 'memory': 0, 'disk': 0, 'miss': 0}
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT)')
+            self.db.commit()
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _disk_get(self, key: str):
+        if self.db is None:
+            return None
+        row = self.db.execute('SELECT solution FROM solutions WHERE puzzle = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _disk_put(self, key: str, solution: str) -> None:
+        if self.db is not None:
+            self.db.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?)', (key, solution))
+            self.db.commit()
+
+    def _result(self, grid: SudokuGrid, solution: str, tier: str):
+        ''' (grid, solved, info) like solveSudoku, from a cached solution. An empty solution means unsolvable '''
+        self.stats[tier] += 1
+        info = {'calls': 0, 'max depth': 0, 'solutions': int(bool(solution)),
+                'solution set': [solution] if solution else [], 'cache': tier}
+        if solution:
+            return SudokuGrid(solution), True, info
+        return grid, False, info
+
+    def solve(self, grid: SudokuGrid, constraints=None):
+        ''' solve a grid, using a cached solution if an equivalent puzzle has been solved before.
+            Returns (grid, solved, info) like SudokuSolver.solveSudoku, with info['cache'] set to the tier which
+            answered: "exact", "memory", "disk" or "miss". The grid is not modified '''
+        if constraints and any(c != 'classic' for c in constraints):
+            grid_final, done, info = SudokuSolver().solveSudoku(SudokuGrid(str(grid)), constraints=constraints,
+                                                                **self.solve_kwargs)
+            info['cache'] = 'miss'
+            return grid_final, done, info
+        puzzle = str(grid)
+        solution = self.exact.get(puzzle)
+        if solution is not None:
+            return self._result(grid, solution, 'exact')
+
+        key, transform = canonical_form(grid)
+        tier = 'memory'
+        canonical_solution = self.canonical.get(key)
+        if canonical_solution is None:
+            tier = 'disk'
+            canonical_solution = self._disk_get(key)
+            if canonical_solution is not None:
+                self.canonical.put(key, canonical_solution)
+        if canonical_solution is not None:
+            solution = ''
+            if canonical_solution:
+                solution = str(SudokuGrid(size=grid.size).with_matrix(transform.invert(_decode(canonical_solution))))
+            self.exact.put(puzzle, solution)
+            return self._result(grid, solution, tier)
+
+        self.stats['miss'] += 1
+        grid_final, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), **self.solve_kwargs)
+        info['cache'] = 'miss'
+        if info['status'] not in ('solved', 'unsolvable'):
+            return grid_final, done, info # stopped by a budget, so there is no answer to keep
+        solution = str(grid_final) if done else ''
+        canonical_solution = _encode(transform.apply(grid_final.grid_list)) if done else ''
+        self.exact.put(puzzle, solution)
+        self.canonical.put(key, canonical_solution)
+        self._disk_put(key, canonical_solution)
+        return grid_final, done, info
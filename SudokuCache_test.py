@@ -0,0 +1,96 @@
+from SudokuCache import SolutionCache, canonical_form
+from SudokuGrid import SudokuGrid
+import os
+import random
+import tempfile
+import time
+import unittest
+
+PUZZLE = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+SOLUTION = '417369825632158947958724316825437169791586432346912758289643571573291684164875293'
+
+def transformed(puzzle, seed):
+    ''' a relabelled, transposed and shuffled copy of a 9x9 puzzle '''
+    rng = random.Random(seed)
+    g = [[int(ch) if ch != '.' else 0 for ch in puzzle[r * 9:r * 9 + 9]] for r in range(9)]
+    g = [list(col) for col in zip(*g)] if seed % 2 else g
+    rows = [b * 3 + r for b in rng.sample(range(3), 3) for r in rng.sample(range(3), 3)]
+    cols = [s * 3 + c for s in rng.sample(range(3), 3) for c in rng.sample(range(3), 3)]
+    digits = [0] + rng.sample(range(1, 10), 9)
+    return ''.join(str(digits[g[r][c]]) for r in rows for c in cols)
+
+class SudokuCacheTest(unittest.TestCase):
+    def assert_solves(self, puzzle, grid):
+        for given, x in zip(str(SudokuGrid(puzzle)), str(grid)):
+            self.assertTrue(given == '0' or given == x)
+        self.assertEqual(str(grid).count('0'), 0)
+        self.assertEqual(str(grid), str(SudokuGrid(str(grid)))) # round trip
+
+    def test_canonical_form_is_invariant(self):
+        key, transform = canonical_form(SudokuGrid(PUZZLE))
+        for seed in range(6):
+            self.assertEqual(canonical_form(SudokuGrid(transformed(PUZZLE, seed)))[0], key)
+        self.assertEqual(''.join(map(str, transform.apply(SudokuGrid(PUZZLE).grid_list))), key)
+        self.assertEqual(transform.invert(transform.apply(SudokuGrid(SOLUTION).grid_list)), SudokuGrid(SOLUTION).grid_list)
+
+    def test_6_x_6(self):
+        puzzle = '024310036200000600652430260103400500'
+        swapped = ''.join(puzzle[r * 6:r * 6 + 6] for r in (1, 0, 2, 3, 4, 5)) # rows swapped within a band
+        self.assertEqual(canonical_form(SudokuGrid(puzzle))[0], canonical_form(SudokuGrid(swapped))[0])
+
+    def test_empty_16_x_16(self):
+        # every row and column order ties, so the cap has to stop the generation of orders too
+        t0 = time.perf_counter()
+        key, transform = canonical_form(SudokuGrid(size=16))
+        self.assertLess(time.perf_counter() - t0, 5.0)
+        self.assertEqual(key, '0' * 256)
+        grid, done, info = SolutionCache().solve(SudokuGrid(size=16))
+        self.assertTrue(done)
+        self.assertEqual(transform.invert(transform.apply(grid.grid_list)), grid.grid_list)
+
+    def test_tiers(self):
+        cache = SolutionCache(maxsize=4)
+        grid, done, info = cache.solve(SudokuGrid(PUZZLE))
+        self.assertEqual((str(grid), done, info['cache']), (SOLUTION, True, 'miss'))
+        self.assertEqual(cache.solve(SudokuGrid(PUZZLE))[2]['cache'], 'exact')
+        for seed in range(3):
+            puzzle = transformed(PUZZLE, seed)
+            grid, done, info = cache.solve(SudokuGrid(puzzle))
+            self.assertEqual((done, info['cache'], info['calls']), (True, 'memory', 0))
+            self.assert_solves(puzzle, grid)
+        unsolvable = '12.......34...............5...........5..........................................'
+        self.assertFalse(cache.solve(SudokuGrid(unsolvable))[1])
+        grid, done, info = cache.solve(SudokuGrid(unsolvable))
+        self.assertEqual((done, info['cache']), (False, 'exact'))
+        self.assertEqual(cache.stats['miss'], 2)
+        self.assertLessEqual(len(cache.exact), 4)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'solutions.sqlite')
+            with SolutionCache(path=path) as cache:
+                cache.solve(SudokuGrid(PUZZLE))
+            with SolutionCache(path=path) as cache:
+                puzzle = transformed(PUZZLE, 7)
+                grid, done, info = cache.solve(SudokuGrid(puzzle))
+                self.assertEqual((done, info['cache']), (True, 'disk'))
+                self.assert_solves(puzzle, grid)
+                self.assertEqual(cache.solve(SudokuGrid(transformed(PUZZLE, 8)))[2]['cache'], 'memory')
+
+    def test_stopped_searches_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'solutions.sqlite')
+            with SolutionCache(path=path, engine='logic', time_limit=0.0) as cache:
+                grid, done, info = cache.solve(SudokuGrid(PUZZLE))
+                self.assertEqual((done, info['status'], info['cache']), (False, 'timeout', 'miss'))
+                self.assertEqual((len(cache.exact), len(cache.canonical)), (0, 0))
+                cache.solve_kwargs.pop('time_limit')
+                grid, done, info = cache.solve(SudokuGrid(PUZZLE))
+                self.assertEqual((str(grid), done, info['cache']), (SOLUTION, True, 'miss'))
+
+    def test_other_constraints_are_not_cached(self):
+        cache = SolutionCache()
+        puzzle = '000000400000000060000460000000000006060000040004000000000604000600000000040000000'
+        _, _, info = cache.solve(SudokuGrid(puzzle), constraints=['classic', 'nonconsecutive'])
+        self.assertEqual(info['cache'], 'miss')
+        self.assertEqual(len(cache.canonical), 0)
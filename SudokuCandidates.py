@@ -0,0 +1,226 @@
+''' Bitmask candidate storage. Digit x is stored as bit (x - 1) of a cell mask '''
+from typing import Iterable, List, Set, Tuple
+from SudokuGrid import get_geometry
+
+try:
+    popcount = int.bit_count  # Python 3.10+
+except AttributeError:  # pragma: no cover
+    def popcount(mask: int) -> int:
+        return bin(mask).count('1')
+
+_digits_cache = {0: ()}
+_DIGITS_CACHE_LIMIT = 1 << 16 # masks of grids up to 16x16 are cached. 25x25 has too many to keep them all
+
+def lowest_bit(mask: int) -> int:
+    ''' isolate the lowest set bit of a mask '''
+    return mask & -mask
+
+def bit_to_digit(bit: int) -> int:
+    ''' digit represented by a single bit '''
+    return bit.bit_length()
+
+def digit_to_bit(x: int) -> int:
+    return 1 << (x - 1)
+
+def digits_to_mask(nums: Iterable[int]) -> int:
+    mask = 0
+    for x in nums:
+        mask |= 1 << (x - 1)
+    return mask
+
+def mask_to_digits(mask: int) -> Tuple[int, ...]:
+    ''' digits in a mask, in ascending order. Results are cached because the same masks recur constantly '''
+    digits = _digits_cache.get(mask)
+    if digits is None:
+        digits = []
+        m = mask
+        while m:
+            bit = m & -m
+            digits.append(bit.bit_length())
+            m ^= bit
+        digits = tuple(digits)
+        if mask < _DIGITS_CACHE_LIMIT:
+            _digits_cache[mask] = digits
+    return digits
+
+def full_mask(size: int) -> int:
+    return (1 << size) - 1
+
+def candidate_lists(masks: List[int], size: int) -> List[List[Tuple[int, ...]]]:
+    ''' rows of the digits of each cell mask, e.g. for reporting candidates outside of the solver '''
+    return [[mask_to_digits(m) for m in masks[r * size:(r + 1) * size]] for r in range(size)]
+
+
+class CandidateGrid():
+    ''' Candidates for every cell of a grid, stored as a flat list of integer bitmasks.
+        Cell (r, c) is at index r*size + c.
+        row_used, col_used and box_used are OR-masks of the digits placed in each unit. They are updated
+        incrementally by place() so the options for a cell can be found without scanning its units.
+
+        When trail is a list, every change is recorded on it as (array, index, old value) so that it can be
+        rolled back with undo(). This replaces copying the whole grid at every branch of the search.
+
+        Indexing with candidates[r][c] returns the candidates as a set, for compatibility with code that
+        expects the old list of sets. Strategies should use the masks directly.
+    '''
+    def __init__(self, size: int, box_height: int, box_width: int):
+        self.size = size
+        self.box_height = box_height
+        self.box_width = box_width
+        self.box_of = get_geometry(size, box_height, box_width).box_of
+        self.masks = [0] * (size * size)
+        self.row_used = [0] * size
+        self.col_used = [0] * size
+        self.box_used = [0] * size
+        self.trail = None
+
+    @classmethod
+    def from_grid(cls, grid) -> 'CandidateGrid':
+        ''' build the candidates of a SudokuGrid by excluding the digits in the same row, column and box '''
+        candidates = cls(grid.size, grid.box_height, grid.box_width)
+        for i, row in enumerate(grid.grid_list):
+            for j, x in enumerate(row):
+                if x != 0:
+                    candidates.place(i, j, x)
+        for i, row in enumerate(grid.grid_list):
+            for j, x in enumerate(row):
+                if x == 0:
+                    candidates.masks[i * grid.size + j] = candidates.options(i, j)
+        return candidates
+
+    def box_index(self, r: int, c: int) -> int:
+        return self.box_of[r][c]
+
+    def place(self, r: int, c: int, x: int) -> None:
+        ''' record x as placed at (r, c) in the unit masks and clear the cell's candidates '''
+        bit = 1 << (x - 1)
+        b = self.box_index(r, c)
+        k = r * self.size + c
+        if self.trail is not None:
+            self.trail.extend((
+                (self.row_used, r, self.row_used[r]),
+                (self.col_used, c, self.col_used[c]),
+                (self.box_used, b, self.box_used[b]),
+                (self.masks, k, self.masks[k])
+            ))
+        self.row_used[r] |= bit
+        self.col_used[c] |= bit
+        self.box_used[b] |= bit
+        self.masks[k] = 0
+
+    def options(self, r: int, c: int) -> int:
+        ''' mask of digits not yet placed in the row, column and box of (r, c) '''
+        used = self.row_used[r] | self.col_used[c] | self.box_used[self.box_index(r, c)]
+        return full_mask(self.size) & ~used
+
+    def mark(self) -> int:
+        ''' start recording changes if not already, and return a checkpoint for undo() '''
+        if self.trail is None:
+            self.trail = []
+        return len(self.trail)
+
+    def undo(self, mark: int) -> None:
+        ''' roll back every recorded change made after the checkpoint mark '''
+        trail = self.trail
+        while len(trail) > mark:
+            arr, k, old = trail.pop()
+            arr[k] = old
+
+    def mask(self, r: int, c: int) -> int:
+        return self.masks[r * self.size + c]
+
+    def count(self, r: int, c: int) -> int:
+        return popcount(self.masks[r * self.size + c])
+
+    def union(self, indices: Iterable[Tuple[int, int]]) -> int:
+        ''' OR of the candidate masks at indices '''
+        mask = 0
+        n = self.size
+        masks = self.masks
+        for i, j in indices:
+            mask |= masks[i * n + j]
+        return mask
+
+    '''------------------------------- OVERRIDES -------------------------------'''
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, r: int) -> '_CandidateRow':
+        if r < 0:
+            r += self.size
+        if not 0 <= r < self.size:
+            raise IndexError('row index out of range')
+        return _CandidateRow(self, r)
+
+    def __iter__(self):
+        for r in range(self.size):
+            yield _CandidateRow(self, r)
+
+    def __eq__(self, other):
+        if isinstance(other, CandidateGrid):
+            return self.size == other.size and self.masks == other.masks
+        try:
+            return len(other) == self.size and all(self[i] == other[i] for i in range(self.size))
+        except TypeError:
+            return NotImplemented
+
+    def __copy__(self):
+        other = CandidateGrid.__new__(CandidateGrid)
+        other.__dict__.update(self.__dict__)
+        other.masks = self.masks[:]
+        other.row_used = self.row_used[:]
+        other.col_used = self.col_used[:]
+        other.box_used = self.box_used[:]
+        other.trail = None # recorded changes refer to the original arrays
+        return other
+
+    def __deepcopy__(self, memo):
+        # every field is an int or a flat list of ints, so a shallow list copy is a deep copy
+        return self.__copy__()
+
+    def __repr__(self):
+        return repr([list(row) for row in self])
+
+
+class _CandidateRow():
+    ''' view of one row of a CandidateGrid as a list of sets '''
+    __slots__ = ('_candidates', '_start')
+
+    def __init__(self, candidates: CandidateGrid, r: int):
+        self._candidates = candidates
+        self._start = r * candidates.size
+
+    def __len__(self):
+        return self._candidates.size
+
+    def __getitem__(self, c: int) -> Set[int]:
+        if c < 0:
+            c += self._candidates.size
+        if not 0 <= c < self._candidates.size:
+            raise IndexError('column index out of range')
+        return set(mask_to_digits(self._candidates.masks[self._start + c]))
+
+    def __setitem__(self, c: int, nums: Iterable[int]):
+        if c < 0:
+            c += self._candidates.size
+        if not 0 <= c < self._candidates.size:
+            raise IndexError('column index out of range')
+        masks = self._candidates.masks
+        if self._candidates.trail is not None:
+            self._candidates.trail.append((masks, self._start + c, masks[self._start + c]))
+        masks[self._start + c] = digits_to_mask(nums)
+
+    def __iter__(self):
+        masks = self._candidates.masks
+        for k in range(self._start, self._start + self._candidates.size):
+            yield set(mask_to_digits(masks[k]))
+
+    def __eq__(self, other):
+        try:
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
@@ -0,0 +1,47 @@
+from SudokuCandidates import CandidateGrid, popcount, lowest_bit, bit_to_digit, digits_to_mask, mask_to_digits
+from SudokuGrid import SudokuGrid
+import unittest
+
+class SudokuCandidatesTest(unittest.TestCase):
+    def test_mask_helpers(self):
+        mask = digits_to_mask([2, 5, 9])
+        self.assertEqual(mask, 0b100010010)
+        self.assertEqual(mask_to_digits(mask), (2, 5, 9))
+        self.assertEqual(popcount(mask), 3)
+        self.assertEqual(bit_to_digit(lowest_bit(mask)), 2)
+        self.assertEqual(mask_to_digits(0), ())
+
+    def test_from_grid(self):
+        grid = SudokuGrid('530070000600195000098000060800060003400803001700020006060000280000419005000080079')
+        candidates = CandidateGrid.from_grid(grid)
+        self.assertEqual(candidates[0][2], {1, 2, 4})
+        self.assertEqual(candidates[0][0], set())
+        self.assertEqual(candidates.options(4, 4), digits_to_mask([5]))
+        self.assertEqual(candidates.row_used[0], digits_to_mask([3, 5, 7]))
+        self.assertEqual(candidates.box_used[4], digits_to_mask([2, 3, 6, 8]))
+
+    def test_place_updates_unit_masks(self):
+        candidates = CandidateGrid.from_grid(SudokuGrid(size=6))
+        self.assertEqual(candidates.mask(5, 5), 0b111111)
+        candidates.place(5, 5, 4)
+        self.assertEqual(candidates.mask(5, 5), 0)
+        self.assertEqual(mask_to_digits(candidates.options(5, 0)), (1, 2, 3, 5, 6))
+        self.assertEqual(mask_to_digits(candidates.options(0, 5)), (1, 2, 3, 5, 6))
+        self.assertEqual(mask_to_digits(candidates.options(4, 3)), (1, 2, 3, 5, 6))
+        self.assertEqual(mask_to_digits(candidates.options(0, 0)), (1, 2, 3, 4, 5, 6))
+
+    def test_row_view(self):
+        candidates = CandidateGrid(4, 2, 2)
+        candidates[1][2] = {1, 3}
+        self.assertEqual(candidates.masks[6], 0b101)
+        self.assertEqual(candidates[1], [set(), set(), {1, 3}, set()])
+        self.assertEqual(candidates.count(1, 2), 2)
+
+    def test_deepcopy_is_independent(self):
+        from copy import deepcopy
+        candidates = CandidateGrid.from_grid(SudokuGrid(size=4))
+        other = deepcopy(candidates)
+        other.place(0, 0, 1)
+        self.assertEqual(candidates.mask(0, 0), 0b1111)
+        self.assertEqual(candidates.row_used[0], 0)
+        self.assertNotEqual(candidates, other)
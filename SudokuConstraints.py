@@ -0,0 +1,400 @@
+''' Variant constraints, in addition to the classic rows, columns and boxes.
+    A constraint works out its tables once for each shape of grid, in build(), on a copy returned by prepare(grid), as
+    some of:
+        houses   extra units which hold every digit once, e.g. the diagonals. The strategies apply to them too
+        pairs    pairs of cells which may not hold the same digit, e.g. a knight's move apart
+        cliques  groups of cells which hold different digits, without needing every digit, e.g. killer cages
+        regions  groups of cells which the constraint's own apply(game, region) restricts, e.g. thermometers
+    The solver erases a placed digit from all of these peers, and queues a region whenever one of its cells changes,
+    in the same propagation loop as the strategies. Constraints that are neither can react to placements in
+    on_place(). allows() checks a placement against the grid so far, which is all the dlx engine needs.
+
+    Constraints without parameters are registered by name in CONSTRAINTS. Others are objects, e.g.
+        solveSudoku(grid, constraints=['classic', 'anti-knight', Killer([(10, [(0, 0), (0, 1), (1, 0)]), ...])])
+'''
+import copy
+from functools import lru_cache
+from itertools import combinations
+from typing import Iterable, List, Tuple
+
+from SudokuStrategies import Strategy
+from SudokuCandidates import mask_to_digits, digits_to_mask, popcount
+
+CONSTRAINTS = {}
+
+Cell = Tuple[int, int]
+
+class Constraint(Strategy):
+    name = None
+    cost = 0 # runs before every strategy, since the tables make it cheap
+    shape = None
+
+    def prepare(self, grid) -> 'Constraint':
+        ''' a copy of the constraint with its tables built for the shape of grid. The copies are kept, one for each
+            shape, so the same constraint can be used with grids of different shapes '''
+        shape = (grid.size, grid.box_height, grid.box_width)
+        if shape == self.shape:
+            return self
+        prepared = self.__dict__.setdefault('prepared', {}) # shared with the copies
+        con = prepared.get(shape)
+        if con is not None:
+            return con
+        con = copy.copy(self)
+        con.houses, con.pairs, con.cliques, con.regions = [], [], [], []
+        con.build(grid)
+        n = grid.size
+        peers = [set() for _ in range(n * n)]
+        for group in con.houses + con.cliques:
+            for (r1, c1), (r2, c2) in combinations(group, 2):
+                peers[r1 * n + c1].add(r2 * n + c2)
+                peers[r2 * n + c2].add(r1 * n + c1)
+        for (r1, c1), (r2, c2) in con.pairs:
+            peers[r1 * n + c1].add(r2 * n + c2)
+            peers[r2 * n + c2].add(r1 * n + c1)
+        con.peer_index = tuple(tuple(sorted(p)) for p in peers) # flat indices of the peers of each cell
+        con.shape = shape
+        prepared[shape] = con
+        return con
+
+    def build(self, grid) -> None:
+        ''' fill in houses, pairs, cliques and regions for grid '''
+        pass
+
+    def apply(self, game, region) -> List[Cell]:
+        return []
+
+    def on_place(self, game, r: int, c: int, x: int) -> List[Cell]:
+        ''' remove candidates after x is placed at (r, c), other than from peers. Returns the cells changed '''
+        return []
+
+    def allows(self, values: List[int], k: int, x: int) -> bool:
+        ''' True if x may go in cell k given the flat list of values, where 0 is empty '''
+        for p in self.peer_index[k]:
+            if values[p] == x:
+                return False
+        return True
+
+    def __deepcopy__(self, memo):
+        return self # the tables do not change while solving
+
+def register(constraint_class):
+    ''' class decorator which adds an instance of a Constraint to CONSTRAINTS '''
+    CONSTRAINTS[constraint_class.name] = constraint_class()
+    return constraint_class
+
+def get_constraints(items: Iterable = None) -> List[Constraint]:
+    ''' Constraint objects from names in CONSTRAINTS or Constraint objects. "classic" is always applied '''
+    constraints = []
+    for c in items or []:
+        if isinstance(c, str):
+            if c == 'classic':
+                continue
+            if c not in CONSTRAINTS:
+                raise Exception(f"Unknown constraint '{c}'. Options are {['classic'] + sorted(CONSTRAINTS)}")
+            c = CONSTRAINTS[c]
+        constraints.append(c)
+    return constraints
+
+def _moves(grid, steps) -> List[Tuple[Cell, Cell]]:
+    n = grid.size
+    pairs = []
+    for r in range(n):
+        for c in range(n):
+            for dr, dc in steps:
+                r2, c2 = r + dr, c + dc
+                if 0 <= r2 < n and 0 <= c2 < n and (r, c) < (r2, c2):
+                    pairs.append(((r, c), (r2, c2)))
+    return pairs
+
+@register
+class Diagonals(Constraint):
+    ''' both main diagonals hold every digit once (X-Sudoku) '''
+    name = 'diagonal'
+
+    def build(self, grid):
+        n = grid.size
+        self.houses = [tuple((k, k) for k in range(n)), tuple((k, n - 1 - k) for k in range(n))]
+
+@register
+class DiagonalPlus(Constraint):
+    ''' the diagonal from the bottom left to the top right holds every digit once '''
+    name = 'diagonal+'
+
+    def build(self, grid):
+        n = grid.size
+        self.houses = [tuple((k, n - 1 - k) for k in range(n))]
+
+@register
+class DiagonalMinus(Constraint):
+    ''' the diagonal from the top left to the bottom right holds every digit once '''
+    name = 'diagonal-'
+
+    def build(self, grid):
+        self.houses = [tuple((k, k) for k in range(grid.size))]
+
+@register
+class AntiKnight(Constraint):
+    ''' cells a chess knight's move apart hold different digits '''
+    name = 'anti-knight'
+
+    def build(self, grid):
+        self.pairs = _moves(grid, ((1, 2), (2, 1), (1, -2), (2, -1)))
+
+@register
+class AntiKing(Constraint):
+    ''' cells a chess king's move apart, including diagonally, hold different digits '''
+    name = 'anti-king'
+
+    def build(self, grid):
+        self.pairs = _moves(grid, ((1, 1), (1, -1), (0, 1), (1, 0)))
+
+@register
+class DisjointGroups(Constraint):
+    ''' cells in the same position of each box hold every digit once '''
+    name = 'disjoint'
+
+    def build(self, grid):
+        h, w = grid.box_height, grid.box_width
+        self.houses = [tuple((r0 + i, c0 + j) for r0 in range(0, grid.size, h) for c0 in range(0, grid.size, w))
+                       for i in range(h) for j in range(w)]
+
+@register
+class Nonconsecutive(Constraint):
+    ''' orthogonally adjacent cells may not hold consecutive digits.
+        Each adjacent pair is also a region: a digit is removed from one cell if it is consecutive to every
+        candidate of the other, e.g. 5 next to a cell of {4, 6} '''
+    name = 'nonconsecutive'
+
+    def build(self, grid):
+        n = grid.size
+        self.neighbours = tuple(tuple(i * n + j for i, j in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                                      if 0 <= i < n and 0 <= j < n) for r in range(n) for c in range(n))
+        # bits of the digits consecutive to x, at index x
+        self.consecutive = tuple(((1 << (x - 2)) if x > 1 else 0) | ((1 << x) if x < n else 0) for x in range(n + 1))
+        self.regions = [((r, c), (r + dr, c + dc)) for r in range(n) for c in range(n) for dr, dc in ((0, 1), (1, 0))
+                        if r + dr < n and c + dc < n]
+
+    def on_place(self, game, r, c, x):
+        n = game.grid.size
+        masks, trail = game.candidates.masks, game.candidates.trail
+        bits = self.consecutive[x]
+        erased = []
+        for k in self.neighbours[r * n + c]:
+            if masks[k] & bits:
+                if trail is not None:
+                    trail.append((masks, k, masks[k]))
+                game.eliminated += popcount(masks[k] & bits)
+                masks[k] &= ~bits
+                erased.append(divmod(k, n))
+        return erased
+
+    def apply(self, game, region):
+        n = game.grid.size
+        masks, trail = game.candidates.masks, game.candidates.trail
+        consecutive = self.consecutive
+        (r1, c1), (r2, c2) = region
+        k1, k2 = r1 * n + c1, r2 * n + c2
+        erased = []
+        for k, other in ((k1, k2), (k2, k1)):
+            m = masks[other]
+            if not m or not masks[k]:
+                continue # placed cells are handled by on_place
+            low = m & -m
+            if m == low: # a single candidate
+                forbidden = consecutive[low.bit_length()]
+            elif m == low * 5: # two candidates with one digit between them
+                forbidden = low << 1
+            else:
+                continue
+            if masks[k] & forbidden:
+                if trail is not None:
+                    trail.append((masks, k, masks[k]))
+                game.eliminated += popcount(masks[k] & forbidden)
+                masks[k] &= ~forbidden
+                erased.append(divmod(k, n))
+        return erased
+
+    def allows(self, values, k, x):
+        for p in self.neighbours[k]:
+            if values[p] and abs(values[p] - x) == 1:
+                return False
+        return True
+
+@lru_cache(maxsize=None)
+def sum_combinations(count: int, total: int, n: int) -> Tuple[int, ...]:
+    ''' masks of every set of count different digits from 1 to n which add up to total '''
+    if count == 0:
+        return (0,) if total == 0 else ()
+    return tuple(digits_to_mask(combo) for combo in combinations(range(1, n + 1), count) if sum(combo) == total)
+
+class Killer(Constraint):
+    ''' cages of cells with different digits which add up to the cage's total.
+        cages is a list of (total, cells) '''
+    name = 'killer'
+
+    def __init__(self, cages: List[Tuple[int, List[Cell]]]):
+        self.cages = [(total, tuple(tuple(cell) for cell in cells)) for total, cells in cages]
+
+    def build(self, grid):
+        n = grid.size
+        self.cliques = [cells for _, cells in self.cages]
+        self.regions = self.cliques
+        self.totals = {cells: total for total, cells in self.cages}
+        self.cage_of = [None] * (n * n) # the flat indices of the other cells in the cage, and its total
+        for total, cells in self.cages:
+            for r, c in cells:
+                self.cage_of[r * n + c] = (tuple(i * n + j for i, j in cells if (i, j) != (r, c)), total)
+
+    def apply(self, game, region):
+        # only digits in a combination which adds up to the rest of the total can go in the empty cells
+        n = game.grid.size
+        grid_list, masks = game.grid.grid_list, game.candidates.masks
+        total, used, empty, available = self.totals[region], 0, [], 0
+        for r, c in region:
+            x = grid_list[r][c]
+            if x:
+                total -= x
+                used |= 1 << (x - 1)
+            else:
+                empty.append((r, c))
+                available |= masks[r * n + c]
+        if not empty:
+            return []
+        allowed = 0
+        for combo in sum_combinations(len(empty), total, n):
+            if not combo & used and not combo & ~available:
+                allowed |= combo
+        return game.set_candidates(mask_to_digits(allowed), empty)
+
+    def allows(self, values, k, x):
+        if not Constraint.allows(self, values, k, x):
+            return False
+        if self.cage_of[k] is None:
+            return True
+        others, total = self.cage_of[k]
+        total -= x
+        used, n_empty = 1 << (x - 1), 0
+        for p in others:
+            v = values[p]
+            if v:
+                total -= v
+                used |= 1 << (v - 1)
+            else:
+                n_empty += 1
+        # some set of unused digits must fill the empty cells with the rest of the total
+        for combo in sum_combinations(n_empty, total, self.shape[0]):
+            if not combo & used:
+                return True
+        return False
+
+class Thermo(Constraint):
+    ''' digits increase along each thermometer from its bulb. thermometers is a list of cells, bulb first '''
+    name = 'thermo'
+
+    def __init__(self, thermometers: List[List[Cell]]):
+        self.thermometers = [tuple(tuple(cell) for cell in cells) for cells in thermometers]
+
+    def build(self, grid):
+        n = grid.size
+        self.cliques = self.thermometers
+        self.regions = self.thermometers
+        self.position = [[] for _ in range(n * n)] # (flat indices of the thermometer, position of the cell in it)
+        for cells in self.thermometers:
+            flat = tuple(r * n + c for r, c in cells)
+            for p, k in enumerate(flat):
+                self.position[k].append((flat, p))
+
+    def apply(self, game, region):
+        n = game.grid.size
+        grid_list, masks = game.grid.grid_list, game.candidates.masks
+        length = len(region)
+        lows, highs = [0] * length, [0] * length
+        low = 1 # the smallest digit possible in the next cell
+        for p, (r, c) in enumerate(region):
+            x = grid_list[r][c]
+            m = masks[r * n + c] & ~((1 << (low - 1)) - 1)
+            if x:
+                low = max(low, x)
+            else:
+                low = (m & -m).bit_length() if m else n + 1
+            lows[p] = low
+            low = min(low + 1, n + 1)
+        high = n
+        for p in range(length - 1, -1, -1):
+            r, c = region[p]
+            x = grid_list[r][c]
+            m = masks[r * n + c] & ((1 << high) - 1)
+            high = min(high, x) if x else m.bit_length()
+            highs[p] = high
+            high = max(high - 1, 0)
+        erased = []
+        for p, (r, c) in enumerate(region):
+            if not grid_list[r][c]:
+                span = ((1 << highs[p]) - 1) & ~((1 << (lows[p] - 1)) - 1) if lows[p] <= highs[p] else 0
+                erased += game.set_candidates(mask_to_digits(span), [(r, c)])
+        return erased
+
+    def allows(self, values, k, x):
+        n = self.shape[0]
+        for flat, p in self.position[k]:
+            if x < p + 1 or x > n - (len(flat) - 1 - p):
+                return False
+            for q, other in enumerate(flat):
+                v = values[other]
+                if v and q < p and x - v < p - q:
+                    return False
+                if v and q > p and v - x < q - p:
+                    return False
+        return True
+
+class ConstraintLayout():
+    ''' the units, peers and constraint regions of a grid shape with a list of constraints.
+        Units are the rows, columns and boxes, then the constraints' houses, then their regions.
+        constraints are prepared for the shape (see Constraint.prepare).
+        region_owner[u] is the constraint which applies to unit u, or None for houses '''
+    def __init__(self, grid, constraints: List[Constraint]):
+        geometry = grid.geometry
+        n = grid.size
+        constraints = [con.prepare(grid) for con in constraints]
+        self.constraints = constraints
+        units = list(geometry.units)
+        region_owner = [None] * len(units)
+        extra = [[[] for _ in range(n)] for _ in range(n)]
+        for con in constraints:
+            units += con.houses
+            region_owner += [None] * len(con.houses)
+            for k, peer_index in enumerate(con.peer_index):
+                r, c = divmod(k, n)
+                for p in peer_index:
+                    cell = divmod(p, n)
+                    if cell not in geometry.peers[r][c] and cell not in extra[r][c]:
+                        extra[r][c].append(cell)
+        self.n_houses = len(units)
+        for con in constraints:
+            units += con.regions
+            region_owner += [con] * len(con.regions)
+        self.units = tuple(units)
+        self.region_owner = tuple(region_owner)
+        cell_unit_ids = [[[] for _ in range(n)] for _ in range(n)]
+        for u, unit in enumerate(units):
+            for r, c in unit:
+                cell_unit_ids[r][c].append(u)
+        self.cell_unit_ids = tuple(tuple(tuple(ids) for ids in row) for row in cell_unit_ids)
+        self.extra_peers = tuple(tuple(tuple(cells) for cells in row) for row in extra)
+        self.peers = tuple(tuple(geometry.peers[r][c] + self.extra_peers[r][c] for c in range(n)) for r in range(n))
+        self.place_hooks = tuple(con for con in constraints if type(con).on_place is not Constraint.on_place)
+
+    def __deepcopy__(self, memo):
+        return self
+
+_layouts = {}
+
+def get_layout(grid, constraints: List[Constraint]) -> ConstraintLayout:
+    ''' the layout of grid with constraints, cached by the grid shape and the constraint objects '''
+    key = (grid.size, grid.box_height, grid.box_width, tuple(constraints))
+    layout = _layouts.get(key)
+    if layout is None:
+        if len(_layouts) > 256:
+            _layouts.clear()
+        layout = _layouts[key] = ConstraintLayout(grid, constraints)
+    return layout
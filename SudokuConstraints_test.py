@@ -0,0 +1,122 @@
+from SudokuConstraints import CONSTRAINTS, Killer, Thermo, get_constraints
+from Sudoku import Sudoku
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+import unittest
+
+PUZZLE = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+
+def pairs_apart(grid, steps):
+    n = grid.size
+    return [(grid.grid_list[r][c], grid.grid_list[r + dr][c + dc]) for r in range(n) for c in range(n)
+            for dr, dc in steps if 0 <= r + dr < n and 0 <= c + dc < n]
+
+class SudokuConstraintsTest(unittest.TestCase):
+    def solve(self, puzzle, constraints, engine):
+        grid, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, constraints=constraints,
+                                                      engine=engine)
+        self.assertTrue(done, engine)
+        for r in range(grid.size):
+            self.assertEqual(sorted(grid.grid_list[r]), list(range(1, grid.size + 1)))
+            self.assertEqual(sorted(row[r] for row in grid.grid_list), list(range(1, grid.size + 1)))
+        return grid
+
+    def test_names(self):
+        self.assertEqual(get_constraints(['classic']), [])
+        self.assertIs(get_constraints(['anti-king'])[0], CONSTRAINTS['anti-king'])
+        with self.assertRaises(Exception):
+            get_constraints(['anti-bishop'])
+
+    def test_diagonal(self):
+        for engine in ('logic', 'dlx'):
+            grid = self.solve('0' * 81, ['classic', 'diagonal'], engine)
+            self.assertEqual(len({grid.grid_list[k][k] for k in range(9)}), 9)
+            self.assertEqual(len({grid.grid_list[k][8 - k] for k in range(9)}), 9)
+
+    def test_disjoint(self):
+        for engine in ('logic', 'dlx'):
+            grid = self.solve('0' * 81, ['disjoint'], engine)
+            for i in range(3):
+                for j in range(3):
+                    self.assertEqual(len({grid.grid_list[r + i][c + j] for r in (0, 3, 6) for c in (0, 3, 6)}), 9)
+
+    def test_anti_knight_and_anti_king(self):
+        knight = ((1, 2), (2, 1), (1, -2), (2, -1))
+        king = ((1, 1), (1, -1))
+        for engine in ('logic', 'dlx'):
+            grid = self.solve('0' * 81, ['anti-knight'], engine)
+            self.assertTrue(all(a != b for a, b in pairs_apart(grid, knight)))
+            grid = self.solve('0' * 81, ['anti-king'], engine)
+            self.assertTrue(all(a != b for a, b in pairs_apart(grid, king)))
+
+    def test_givens_break_constraint(self):
+        puzzle = '1' + '0' * 9 + '1' + '0' * 70 # 1s a king's move apart
+        for engine in ('logic', 'dlx'):
+            grid, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False,
+                                                          constraints=['anti-king'], engine=engine)
+            self.assertFalse(done)
+
+    def test_nonconsecutive_erases_every_neighbour(self):
+        game = Sudoku(SudokuGrid(size=9), ['nonconsecutive'], strategies=[])
+        game.place_and_erase(4, 4, 5)
+        for r, c in ((3, 4), (5, 4), (4, 3), (4, 5)):
+            self.assertEqual(game.candidates[r][c], {1, 2, 3, 7, 8, 9})
+        self.assertIn(4, game.candidates[3][3])
+        # 5 from 20 peers and 4 and 6 from 4 neighbours
+        self.assertEqual(game.eliminated, 20 + 4 * 2)
+
+    def test_nonconsecutive_pair(self):
+        game = Sudoku(SudokuGrid(size=9), ['nonconsecutive'], strategies=[])
+        game.set_candidates([4, 6], [(0, 0)])
+        game.constraint_propogation([(0, 0)])
+        # 5 is next to both 4 and 6
+        self.assertNotIn(5, game.candidates[0][1])
+        self.assertNotIn(5, game.candidates[1][0])
+        self.assertIn(5, game.candidates[1][1])
+        self.assertEqual(game.stats['nonconsecutive']['eliminated'], 2)
+
+    def test_nonconsecutive(self):
+        puzzle = '000000400000000060000460000000000006060000040004000000000604000600000000040000000'
+        solution = '726138495483795162159462738837249516261573849594816273372684951615927384948351627'
+        for engine in ('logic', 'dlx'):
+            grid = self.solve(puzzle, ['nonconsecutive'], engine)
+            self.assertEqual(str(grid), solution)
+
+    def test_grid_sizes(self):
+        # the tables of a constraint are kept for each shape, so sizes can alternate
+        solution = '726138495483795162159462738837249516261573849594816273372684951615927384948351627'
+        for engine in ('logic', 'dlx', 'logic'):
+            for puzzle in (solution[:40] + '0' * 41, '0' * 16, '0' * 36, solution[:40] + '0' * 41):
+                grid, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False,
+                                                              constraints=['nonconsecutive'], engine=engine)
+                # no 2x2 box can hold 1 to 4 without two consecutive digits side by side
+                self.assertEqual(done, len(puzzle) != 16, (engine, len(puzzle)))
+                if len(puzzle) == 81:
+                    self.assertEqual(str(grid), solution)
+
+    def test_killer(self):
+        solution = SudokuSolver().solveSudoku(SudokuGrid(PUZZLE), verbose=False, engine='dlx')[0].grid_list
+        # dominoes across each row, and the last column in pairs down
+        cages = [(solution[r][c] + solution[r][c + 1], [(r, c), (r, c + 1)]) for r in range(9) for c in range(0, 8, 2)]
+        cages += [(solution[r][8] + solution[r + 1][8], [(r, 8), (r + 1, 8)]) for r in range(0, 8, 2)]
+        killer = Killer(cages)
+        for engine in ('logic', 'dlx'):
+            grid = self.solve('0' * 80 + str(solution[8][8]), [killer], engine)
+            for total, cells in cages:
+                self.assertEqual(sum(grid.grid_list[r][c] for r, c in cells), total)
+                self.assertEqual(len({grid.grid_list[r][c] for r, c in cells}), len(cells))
+        # the dlx check prunes by the sums the cage can still reach, so counting is quick with either engine
+        counts = [SudokuSolver().count_solutions(SudokuGrid(size=9), constraints=[killer], engine=engine)
+                  for engine in ('logic', 'dlx')]
+        self.assertEqual(counts[0], counts[1])
+
+    def test_thermo(self):
+        thermo = Thermo([[(0, c) for c in range(9)], [(8, 8), (7, 7), (6, 6)]])
+        for engine in ('logic', 'dlx'):
+            grid = self.solve('0' * 81, [thermo], engine).grid_list
+            self.assertEqual(grid[0], list(range(1, 10)))
+            self.assertLess(grid[8][8], grid[7][7])
+            self.assertLess(grid[7][7], grid[6][6])
+
+if __name__ == '__main__':
+    unittest.main()
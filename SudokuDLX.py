@@ -0,0 +1,305 @@
+''' Exact cover solving of a grid with Dancing Links (Knuth's Algorithm X)
+    See https://en.wikipedia.org/wiki/Dancing_Links and https://www.ocf.berkeley.edu/~jchu/publicportal/sudoku/sudoku.paper.html
+
+    The links are kept in flat integer lists (left, right, up, down, column) rather than node objects, which is
+    much faster in Python. Index 0 is the root and indices 1..n_columns are the column headers.
+'''
+import time
+from typing import List, Iterable, Tuple
+from SudokuGrid import SudokuGrid, encode_cells
+from SudokuCandidates import CandidateGrid, mask_to_digits
+from SudokuConstraints import Constraint, get_constraints
+
+class DancingLinks():
+    def __init__(self, n_columns: int):
+        n = n_columns + 1
+        self.L = [n - 1] + list(range(n - 1))
+        self.R = list(range(1, n)) + [0]
+        self.U = list(range(n))
+        self.D = list(range(n))
+        self.C = list(range(n))
+        self.S = [0] * n  # number of nodes in each column
+        self.row_of = [-1] * n
+        self.first_node = {}  # row id -> a node in that row
+        self.calls = 0
+        self.max_depth = 0
+        self.deepest = [] # the longest partial cover reached by search
+        self.status = None
+
+    def add_row(self, row_id: int, columns: Iterable[int]) -> None:
+        ''' add a row covering the given 0-based columns '''
+        L, R, U, D, C = self.L, self.R, self.U, self.D, self.C
+        first = None
+        for col in columns:
+            c = col + 1
+            node = len(C)
+            C.append(c)
+            self.row_of.append(row_id)
+            # insert at the bottom of column c
+            U.append(U[c])
+            D.append(c)
+            D[U[c]] = node
+            U[c] = node
+            self.S[c] += 1
+            # insert at the end of the row
+            if first is None:
+                first = node
+                L.append(node)
+                R.append(node)
+            else:
+                L.append(L[first])
+                R.append(first)
+                R[L[first]] = node
+                L[first] = node
+        if first is not None:
+            self.first_node[row_id] = first
+
+    def cover(self, c: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c: int) -> None:
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def is_active(self, c: int) -> bool:
+        ''' True if the 1-based column c has not been covered '''
+        return self.R[self.L[c]] == c
+
+    def select(self, row_id: int) -> bool:
+        ''' permanently choose a row before searching, e.g. for a given digit. False if it clashes with earlier choices '''
+        node = self.first_node[row_id]
+        j = node
+        while True:
+            if not self.is_active(self.C[j]):
+                return False
+            j = self.R[j]
+            if j == node:
+                break
+        self.cover(self.C[node])
+        j = self.R[node]
+        while j != node:
+            self.cover(self.C[j])
+            j = self.R[j]
+        return True
+
+    def search(self, max_solutions: int = None, check=None, keep_solutions=True, max_calls: int = None,
+               deadline: float = None, depth_limit: int = None, stop=None) -> List[List[int]]:
+        ''' find up to max_solutions exact covers (all if None), as lists of row ids.
+            check is an optional object with accept(row_id), select(row_id) and deselect(row_id) for side
+            constraints that are not expressible as exact cover. Rows it does not accept are skipped.
+            If not keep_solutions only the first cover is returned. The number found is in self.solution_count.
+            The search stops after max_calls calls, beyond depth_limit rows, at time.perf_counter() deadline or when
+            the event stop is set, and sets self.status to "max_calls", "max_depth", "timeout" or "cancelled".
+            The links are restored either way '''
+        L, R, D, C, S = self.L, self.R, self.D, self.C, self.S
+        row_of = self.row_of
+        cover, uncover = self.cover, self.uncover
+        solutions = []
+        partial = []
+        self.solution_count = 0
+
+        def recurse(depth: int) -> bool:
+            if max_calls is not None and self.calls >= max_calls:
+                self.status = 'max_calls'
+                return True
+            if deadline is not None and time.perf_counter() > deadline:
+                self.status = 'timeout'
+                return True
+            if depth_limit is not None and depth > depth_limit:
+                self.status = 'max_depth'
+                return True
+            if stop is not None and stop.is_set():
+                self.status = 'cancelled'
+                return True
+            self.calls += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+                self.deepest = partial[:]
+            if R[0] == 0:
+                self.solution_count += 1
+                if keep_solutions or not solutions:
+                    solutions.append(partial[:])
+                return max_solutions is not None and self.solution_count >= max_solutions
+            # choose the column with the fewest rows
+            best = c = R[0]
+            size = S[c]
+            while c != 0 and size > 1:
+                if S[c] < size:
+                    best, size = c, S[c]
+                c = R[c]
+            if size == 0:
+                return False
+            cover(best)
+            r = D[best]
+            while r != best:
+                row_id = row_of[r]
+                if check is None or check.accept(row_id):
+                    partial.append(row_id)
+                    if check is not None:
+                        check.select(row_id)
+                    j = R[r]
+                    while j != r:
+                        cover(C[j])
+                        j = R[j]
+                    finished = recurse(depth + 1)
+                    j = L[r]
+                    while j != r:
+                        uncover(C[j])
+                        j = L[j]
+                    if check is not None:
+                        check.deselect(row_id)
+                    partial.pop()
+                    if finished:
+                        uncover(best)
+                        return True
+                r = D[r]
+            uncover(best)
+            return False
+
+        recurse(0)
+        return solutions
+
+
+class ConstraintCheck():
+    ''' variant constraints (see SudokuConstraints) as a side check of the search '''
+    def __init__(self, grid: SudokuGrid, constraints: List[Constraint]):
+        self.constraints = [constraint.prepare(grid) for constraint in constraints]
+        self.size = grid.size
+        self.values = [x for row in grid.grid_list for x in row]
+
+    def accept(self, row_id: int) -> bool:
+        cell, x = divmod(row_id, self.size)
+        x += 1
+        values = self.values
+        old, values[cell] = values[cell], 0 # a given is checked against the other cells
+        accepted = all(constraint.allows(values, cell, x) for constraint in self.constraints)
+        values[cell] = old
+        return accepted
+
+    def select(self, row_id: int) -> None:
+        cell, x = divmod(row_id, self.size)
+        self.values[cell] = x + 1
+
+    def deselect(self, row_id: int) -> None:
+        self.values[row_id // self.size] = 0
+
+
+def exact_cover_columns(r: int, c: int, x: int, n: int, box: int) -> Tuple[int, int, int, int]:
+    ''' the four constraints satisfied by placing x at (r, c): cell filled, and x once in the row, column and box '''
+    return (r * n + c, n * n + r * n + x - 1, 2 * n * n + c * n + x - 1, 3 * n * n + box * n + x - 1)
+
+
+def build_dlx(grid: SudokuGrid, check=None, houses=()) -> Tuple[DancingLinks, bool]:
+    ''' the exact cover matrix of a grid, with the givens already selected. houses are extra units which hold every
+        digit once, e.g. diagonals, and get a column per digit after the classic ones.
+        Returns the matrix and False if the givens clash. Rows are numbered (r*n + c)*n + x - 1 '''
+    n = grid.size
+    box_of = grid.geometry.box_of
+    candidates = CandidateGrid.from_grid(grid)
+    dlx = DancingLinks(4 * n * n + len(houses) * n)
+    house_columns = [[[] for _ in range(n)] for _ in range(n)] # the first column of each house of a cell
+    for h, house in enumerate(houses):
+        for r, c in house:
+            house_columns[r][c].append(4 * n * n + h * n)
+    givens = []
+    for r in range(n):
+        for c in range(n):
+            x = grid.grid_list[r][c]
+            digits = (x,) if x != 0 else mask_to_digits(candidates.mask(r, c))
+            for y in digits:
+                row_id = (r * n + c) * n + y - 1
+                if check is not None and not check.accept(row_id):
+                    if x != 0:
+                        return dlx, False # the givens break the side constraint
+                    continue
+                dlx.add_row(row_id, exact_cover_columns(r, c, y, n, box_of[r][c]) +
+                            tuple(first + y - 1 for first in house_columns[r][c]))
+            if x != 0:
+                givens.append((r * n + c) * n + x - 1)
+    for row_id in givens:
+        if not dlx.select(row_id):
+            return dlx, False
+    return dlx, True
+
+
+def _partial_result(grid: SudokuGrid, rows: List[int], constraints: List[Constraint]) -> Tuple[SudokuGrid, list]:
+    ''' the grid with the cover rows filled in, and the candidates of its cells as rows of digit tuples '''
+    n = grid.size
+    values = [x for row in grid.grid_list for x in row]
+    for row_id in rows:
+        cell, x = divmod(row_id, n)
+        values[cell] = x + 1
+    partial = SudokuGrid.from_values(values, n)
+    candidates = CandidateGrid.from_grid(partial)
+    check = ConstraintCheck(partial, constraints) if constraints else None
+    digits = []
+    for r in range(n):
+        digits.append([tuple(x for x in mask_to_digits(candidates.mask(r, c))
+                             if check is None or check.accept((r * n + c) * n + x - 1)) for c in range(n)])
+    return partial, digits
+
+
+def solve_dlx(grid: SudokuGrid, all_solutions=False, constraints=None, max_solutions=None, keep_solutions=True,
+              max_calls=None, max_depth=None, time_limit=None, stop=None):
+    ''' solve a grid as an exact cover problem. Returns (grid, solved, info) like SudokuSolver.solveSudoku.
+        max_solutions overrides all_solutions to stop after that many solutions.
+        If not keep_solutions the solution set is left empty, and only the first solution is returned as a grid.
+        max_calls, max_depth (of chosen rows), time_limit (in seconds) and the event stop end the search early, as for
+        solveSudoku. A stopped search returns its deepest partial grid, with its candidates in info['candidates'] '''
+    constraints = get_constraints(constraints)
+    check = ConstraintCheck(grid, constraints) if constraints else None
+    if max_solutions is None:
+        max_solutions = None if all_solutions else 1
+
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    houses = [house for constraint in check.constraints for house in constraint.houses] if check else []
+    dlx, possible = build_dlx(grid, check, houses)
+    solutions = dlx.search(max_solutions, check, keep_solutions, max_calls, deadline, max_depth, stop) if possible else []
+    count = dlx.solution_count if possible else 0
+
+    solution_set = []
+    first_values = None
+    n = grid.size
+    for rows in solutions:
+        values = [x for row in grid.grid_list for x in row]
+        for row_id in rows:
+            cell, x = divmod(row_id, n)
+            values[cell] = x + 1
+        if keep_solutions:
+            solution_set.append(encode_cells(values))
+        first_values = first_values or values
+
+    info = {
+        'calls': dlx.calls,
+        'max depth': dlx.max_depth,
+        'solutions': count,
+        'solution set': solution_set,
+        'status': dlx.status or ('solved' if first_values else 'unsolvable')
+    }
+    if first_values:
+        return SudokuGrid.from_values(first_values, n), True, info
+    if dlx.status is not None:
+        partial, info['candidates'] = _partial_result(grid, dlx.deepest, constraints)
+        return partial, False, info
+    return grid, False, info
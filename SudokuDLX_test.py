@@ -0,0 +1,98 @@
+from SudokuDLX import DancingLinks, solve_dlx
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+import threading
+import unittest
+
+class SudokuDLXTest(unittest.TestCase):
+    def assert_dlx_output(self, puzzle, expected_done, solution_count, solution=None, constraints=None, all_solutions=False):
+        my_solution, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, engine='dlx',
+                                                             constraints=constraints, all_solutions=all_solutions)
+        self.assertEqual(done, expected_done)
+        self.assertEqual(info['solutions'], solution_count)
+        if solution:
+            self.assertTrue(SudokuGrid(solution) == my_solution, msg=f'solution does not match. Actual: {my_solution}')
+
+    def test_exact_cover(self):
+        # Knuth's example from "Dancing Links"
+        dlx = DancingLinks(7)
+        rows = {'A': [2, 4, 5], 'B': [0, 3, 6], 'C': [1, 2, 5], 'D': [0, 3], 'E': [1, 6], 'F': [3, 4, 6]}
+        for k, columns in enumerate(rows.values()):
+            dlx.add_row(k, columns)
+        self.assertEqual([sorted(s) for s in dlx.search()], [[0, 3, 4]])
+
+    def test_worlds_hardest_puzzle(self):
+        self.assert_dlx_output(
+            '800000000003600000070090200050007000000045700000100030001000068008500010090000400', True, 1,
+            '812753649943682175675491283154237896369845721287169534521974368438526917796318452'
+        )
+
+    def test_unsolvable(self):
+        self.assert_dlx_output(
+            '999200000065074800070006900004000000050008704000030000000000600080000057006007089', False, 0
+        )
+        self.assert_dlx_output(
+            '.....5.8....6.1.43..........1.5........1.6...3.......553.....61........4.........', False, 0
+        )
+
+    def test_all_solutions(self):
+        self.assert_dlx_output(
+            '080001206000020000020005040060010900002050400008000010030704050000000000406100080', True, 379,
+            all_solutions=True
+        )
+        _, _, info = solve_dlx(SudokuGrid(size=4), all_solutions=True)
+        self.assertEqual(info['solutions'], 288)
+
+    def test_6_x_6(self):
+        self.assert_dlx_output('024310036200000600652430260103400500', True, 1, '524316136254341625652431265143413562')
+
+    def test_non_consecutive_constraint(self):
+        self.assert_dlx_output(
+            '000000400000000060000460000000000006060000040004000000000604000600000000040000000', True, 1,
+            '726138495483795162159462738837249516261573849594816273372684951615927384948351627',
+            ["classic", "nonconsecutive"], all_solutions=True
+        )
+
+    def test_search_budgets(self):
+        hardest = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+        for engine in ('dlx', 'logic'):
+            grid = SudokuGrid(hardest)
+            _, done, info = SudokuSolver().solveSudoku(grid, verbose=False, engine=engine, max_calls=5)
+            self.assertEqual((done, info['status'], info['calls']), (False, 'max_calls', 5))
+            _, done, info = SudokuSolver().solveSudoku(grid, verbose=False, engine=engine, time_limit=0)
+            self.assertEqual((done, info['status']), (False, 'timeout'))
+            _, done, info = SudokuSolver().solveSudoku(grid, verbose=False, engine=engine, time_limit=60)
+            self.assertEqual((done, info['status']), (True, 'solved'))
+            self.assertNotIn('candidates', info)
+            stop = threading.Event()
+            stop.set()
+            _, done, info = SudokuSolver().solveSudoku(grid, verbose=False, engine=engine, stop=stop)
+            self.assertEqual((done, info['status']), (False, 'cancelled'))
+
+    def test_partial_results(self):
+        hardest = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+        solution = '812753649943682175675491283154237896369845721287169534521974368438526917796318452'
+        for engine in ('dlx', 'logic'):
+            partial, done, info = SudokuSolver().solveSudoku(SudokuGrid(hardest), verbose=False, engine=engine,
+                                                             max_depth=2)
+            self.assertEqual((done, info['status']), (False, 'max_depth'))
+            self.assertLessEqual(info['max depth'], 2)
+            self.assertLess(str(partial).count('0'), hardest.count('0'))
+            for r in range(9):
+                for c in range(9):
+                    if hardest[r * 9 + c] != '0':
+                        self.assertEqual(partial.grid_list[r][c], int(hardest[r * 9 + c]))
+                    if partial.grid_list[r][c]:
+                        self.assertEqual(info['candidates'][r][c], ())
+                    else:
+                        self.assertTrue(set(info['candidates'][r][c]) <= set(range(1, 10)))
+            _, _, info = SudokuSolver().solveSudoku(SudokuGrid(hardest), verbose=False, engine=engine, time_limit=0)
+            # nothing was searched, so every candidate of the solution is still there
+            for r in range(9):
+                for c in range(9):
+                    if hardest[r * 9 + c] == '0':
+                        self.assertIn(int(solution[r * 9 + c]), info['candidates'][r][c])
+
+    def test_unknown_constraint(self):
+        with self.assertRaises(Exception):
+            solve_dlx(SudokuGrid(size=4), constraints=['anti-bishop'])
@@ -0,0 +1,174 @@
+''' Generation of puzzles with a unique solution, graded by the strategies needed to solve them.
+
+    A full solution is made by filling the boxes on the diagonal at random, since they share no row or column, and
+    completing the grid with the dlx engine. Clues are then removed in a random order, each one only if the puzzle
+    still has exactly one solution. That is checked by counting solutions up to 2 with a budget of search calls, and
+    a clue whose check runs out of budget is kept. The result is minimal: no clue can be removed.
+
+    python SudokuGenerator.py --count 100 --difficulty hard --processes 4 --output puzzles.txt
+'''
+import argparse
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from SudokuGrid import SudokuGrid, encode_cells
+from SudokuDLX import solve_dlx
+from SudokuSolver import SudokuSolver
+from SudokuRating import rate_puzzle, LEVELS
+
+DIFFICULTIES = LEVELS
+UNIQUENESS_CALLS = 20000 # search calls allowed for checking that a puzzle has one solution
+
+def random_solution(size: int = 9, rng: random.Random = None) -> List[int]:
+    ''' the cells of a random full grid of a standard size, row by row '''
+    rng = rng or random.Random()
+    digits = list(range(1, size + 1))
+    solved = False
+    while not solved: # only small grids, e.g. 4x4, have diagonal boxes which cannot be completed
+        grid = SudokuGrid(size=size)
+        h, w = grid.box_height, grid.box_width
+        for b in range(min(size // h, size // w)):
+            rng.shuffle(digits)
+            for k, x in enumerate(digits):
+                grid.grid_list[b * h + k // w][b * w + k % w] = x
+        solution, solved, _ = solve_dlx(grid, keep_solutions=False)
+    # relabel the digits, since the search fills the rest of the grid in a fixed order
+    rng.shuffle(digits)
+    return [digits[x - 1] for row in solution.grid_list for x in row]
+
+def is_unique(values: List[int], max_calls: int = UNIQUENESS_CALLS) -> bool:
+    ''' True if the puzzle with these cells has exactly one solution, found within max_calls '''
+    _, _, info = solve_dlx(SudokuGrid.from_values(values), max_solutions=2, keep_solutions=False, max_calls=max_calls)
+    return info['status'] == 'solved' and info['solutions'] == 1
+
+def remove_clues(solution: List[int], rng: random.Random = None, symmetric: bool = False, min_clues: int = 0,
+                 max_calls: int = UNIQUENESS_CALLS) -> List[int]:
+    ''' remove clues from a full grid in a random order while the solution stays unique.
+        If symmetric, clues are removed in pairs which are opposite through the centre. Stops at min_clues '''
+    rng = rng or random.Random()
+    values = solution[:]
+    n_cells = len(values)
+    cells = list(range(n_cells))
+    rng.shuffle(cells)
+    clues = n_cells
+    for k in cells:
+        if clues <= min_clues:
+            break
+        if not values[k]:
+            continue
+        group = {k, n_cells - 1 - k} if symmetric else {k}
+        saved = [(j, values[j]) for j in group]
+        for j in group:
+            values[j] = 0
+        if is_unique(values, max_calls):
+            clues -= len(group)
+        else:
+            for j, x in saved:
+                values[j] = x
+    return values
+
+def grade_puzzle(puzzle: str) -> dict:
+    ''' the difficulty and score of SudokuRating.rate_puzzle, the number of steps with each technique, and the
+        search calls with the default strategies, which are more than 1 for extreme puzzles '''
+    rating = rate_puzzle(puzzle, log=False)
+    calls = 1
+    if not rating['solved']:
+        _, _, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False)
+        calls = info['calls']
+    return {'difficulty': rating['difficulty'], 'score': rating['score'], 'strategies': rating['techniques'],
+            'calls': calls}
+
+def generate_puzzle(size: int = 9, difficulty: str = None, seed=None, symmetric: bool = False, min_clues: int = 0,
+                    max_attempts: int = 50, max_calls: int = UNIQUENESS_CALLS) -> Optional[dict]:
+    ''' a puzzle with a unique solution, with its solution, number of clues and grade (see grade_puzzle).
+        If difficulty is given, new puzzles are made until one has that grade, up to max_attempts, and None is
+        returned if none does. The same seed gives the same puzzle '''
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise Exception(f"Unknown difficulty '{difficulty}'. Options are {DIFFICULTIES}")
+    rng = random.Random(seed)
+    for attempt in range(1, max_attempts + 1):
+        solution = random_solution(size, rng)
+        values = remove_clues(solution, rng, symmetric, min_clues, max_calls)
+        puzzle = encode_cells(values)
+        grade = grade_puzzle(puzzle)
+        if difficulty is None or grade['difficulty'] == difficulty:
+            result = {
+                'puzzle': puzzle,
+                'solution': encode_cells(solution),
+                'clues': sum(1 for x in values if x),
+                'attempts': attempt,
+            }
+            result.update(grade)
+            return result
+    return None
+
+def _generate(k: int, seed, kwargs: dict) -> Optional[dict]:
+    result = generate_puzzle(seed=f'{seed}-{k}', **kwargs)
+    if result is not None:
+        result['index'] = k
+    return result
+
+def generate_puzzles(count: int, processes: int = None, seed=0, **kwargs) -> Iterator[dict]:
+    ''' generate count puzzles on a pool of processes and yield each one as it is finished, so not in order.
+        Puzzle k comes from the seed "<seed>-<k>" and has index k, so a set does not depend on the number of
+        processes. Puzzles which did not reach the difficulty are left out. kwargs are passed on to generate_puzzle '''
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for k in range(count):
+            result = _generate(k, seed, kwargs)
+            if result is not None:
+                yield result
+        return
+
+    jobs = iter(range(count))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = set()
+        while True:
+            for k in islice(jobs, processes * 4 - len(pending)):
+                pending.add(executor.submit(_generate, k, seed, kwargs))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    yield result
+
+def write_puzzles(path: str, results: Iterable[dict]) -> Iterator[dict]:
+    ''' write each generated puzzle as it arrives, labelled with its difficulty, e.g. "...3.7..-hard", and pass
+        it through. Lines are flushed as they are written '''
+    with open(path, 'w') as f:
+        for result in results:
+            f.write('%s-%s\n' % (result['puzzle'], result['difficulty']))
+            f.flush()
+            yield result
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Generate Sudoku puzzles with a unique solution')
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, help='only keep puzzles of this difficulty')
+    parser.add_argument('--symmetric', action='store_true', help='remove clues in symmetric pairs')
+    parser.add_argument('--processes', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--seed', default='0')
+    parser.add_argument('--output', help='write the puzzles to this file')
+    args = parser.parse_args(argv)
+
+    results = generate_puzzles(args.count, args.processes, args.seed, size=args.size, difficulty=args.difficulty,
+                               symmetric=args.symmetric)
+    if args.output:
+        results = write_puzzles(args.output, results)
+    grades = Counter()
+    for result in results:
+        grades[result['difficulty']] += 1
+        if not args.output:
+            print('%s-%s' % (result['puzzle'], result['difficulty']))
+    print('generated %d puzzles: %s' % (sum(grades.values()),
+                                        ', '.join('%d %s' % (grades[d], d) for d in DIFFICULTIES if grades[d])))
+
+if __name__ == '__main__':
+    main()
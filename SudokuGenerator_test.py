@@ -0,0 +1,81 @@
+from SudokuGenerator import (random_solution, remove_clues, is_unique, grade_puzzle, generate_puzzle,
+                             generate_puzzles, write_puzzles, DIFFICULTIES)
+from SudokuGrid import SudokuGrid
+from SudokuIO import read_puzzles
+from SudokuSolver import SudokuSolver
+import os
+import random
+import tempfile
+import unittest
+
+class SudokuGeneratorTest(unittest.TestCase):
+    def assert_valid_solution(self, values, size):
+        grid = SudokuGrid(''.join(str(x) for x in values)) if size < 10 else None
+        rows = [values[r * size:(r + 1) * size] for r in range(size)]
+        digits = list(range(1, size + 1))
+        for r in range(size):
+            self.assertEqual(sorted(rows[r]), digits)
+            self.assertEqual(sorted(row[r] for row in rows), digits)
+        if grid is not None:
+            for box in grid.geometry.boxes:
+                self.assertEqual(sorted(rows[r][c] for r, c in box), digits)
+
+    def test_random_solution(self):
+        for size in (4, 6, 9):
+            self.assert_valid_solution(random_solution(size, random.Random(size)), size)
+        self.assertNotEqual(random_solution(9, random.Random(1)), random_solution(9, random.Random(2)))
+
+    def test_remove_clues_keeps_unique_solution(self):
+        rng = random.Random(3)
+        solution = random_solution(9, rng)
+        values = remove_clues(solution, rng)
+        self.assertTrue(is_unique(values))
+        # minimal: every clue is needed
+        for k, x in enumerate(values):
+            if x:
+                values[k] = 0
+                self.assertFalse(is_unique(values))
+                values[k] = x
+        symmetric = remove_clues(solution, rng, symmetric=True)
+        self.assertTrue(is_unique(symmetric))
+        self.assertEqual([bool(x) for x in symmetric], [bool(x) for x in reversed(symmetric)])
+        self.assertGreaterEqual(sum(1 for x in remove_clues(solution, rng, min_clues=40) if x), 40)
+
+    def test_grade(self):
+        easy = next(iter(read_puzzles('sudoku_NY.txt')))
+        grade = grade_puzzle(easy)
+        self.assertEqual(grade['difficulty'], 'easy')
+        self.assertLessEqual(set(grade['strategies']), {'naked-singles', 'singles'})
+        self.assertEqual(grade['calls'], 1)
+        hard = list(read_puzzles('sudoku_hardest.txt'))[1]
+        grade = grade_puzzle(hard)
+        self.assertEqual(grade['difficulty'], 'extreme')
+        self.assertGreater(grade['calls'], 1)
+
+    def test_generate_puzzle(self):
+        result = generate_puzzle(9, seed=5)
+        self.assertEqual(result, generate_puzzle(9, seed=5))
+        self.assertIn(result['difficulty'], DIFFICULTIES)
+        self.assertEqual(SudokuSolver().count_solutions(SudokuGrid(result['puzzle'])), 1)
+        solution, _, _ = SudokuSolver().solveSudoku(SudokuGrid(result['puzzle']), verbose=False)
+        self.assertEqual(str(solution), result['solution'])
+        easy = generate_puzzle(9, difficulty='easy', seed=5)
+        self.assertEqual(easy['difficulty'], 'easy')
+        self.assertIsNone(generate_puzzle(4, difficulty='extreme', seed=5, max_attempts=2))
+        with self.assertRaises(Exception):
+            generate_puzzle(9, difficulty='fiendish')
+
+    def test_generate_puzzles(self):
+        serial = {r['index']: r for r in generate_puzzles(4, processes=1, seed=7, size=6)}
+        self.assertEqual(sorted(serial), [0, 1, 2, 3])
+        self.assertEqual(serial[2]['puzzle'], generate_puzzle(6, seed='7-2')['puzzle'])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'puzzles.txt')
+            results = list(write_puzzles(path, generate_puzzles(4, processes=2, seed=7, size=6)))
+            self.assertEqual({r['index']: r['puzzle'] for r in results},
+                             {k: r['puzzle'] for k, r in serial.items()})
+            lines = list(read_puzzles(path))
+        self.assertEqual(sorted(lines), sorted('%s-%s' % (r['puzzle'], r['difficulty']) for r in results))
+
+if __name__ == '__main__':
+    unittest.main()
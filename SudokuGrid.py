@@ -1,69 +1,178 @@
 import math
-from typing import List, Tuple, Set
+from functools import lru_cache
+from itertools import chain
+from typing import List, Optional, Tuple, Set, Union
 
 # number of regions across x number of regions down
 standard_regions = {
     4: (2, 2),
     6: (2, 3),
     9: (3, 3),
-    12: (3, 4)
+    12: (3, 4),
+    16: (4, 4),
+    25: (5, 5)
 }
 
+def get_regions(size: int) -> Tuple[int, int]:
+    ''' number of regions across and down for a grid size: the standard layout, otherwise boxes as close to square
+        as the size allows and wider than they are tall. A prime size has one row per box '''
+    if size in standard_regions:
+        return standard_regions[size]
+    box_width = next(w for w in range(math.isqrt(size), size + 1) if size % w == 0 and w * w >= size)
+    return size // box_width, box_width
+
+# characters of cell values: digits, then letters for grids larger than 9x9 (A=10, ..., P=25). 0 or "." is a blank
+DIGITS = '0123456789ABCDEFGHIJKLMNOP'
+MAX_SIZE = len(DIGITS) - 1
+_char_values = {ch: x for x, ch in enumerate(DIGITS)}
+_char_values.update({ch.lower(): x for x, ch in enumerate(DIGITS)})
+_char_values['.'] = 0
+# translation tables between the bytes of characters and of cell values, to convert whole grids at once
+_INVALID = 255
+_CHAR_TO_VALUE = bytes(_char_values.get(chr(b), _INVALID) for b in range(256))
+_VALUE_TO_CHAR = DIGITS.encode('ascii') + b'?' * (256 - len(DIGITS))
+
+def encode_cells(values) -> str:
+    ''' serialise cell values, one character each '''
+    return bytes(values).translate(_VALUE_TO_CHAR).decode('ascii')
+
+def _translate(text: Union[str, bytes]) -> Optional[bytes]:
+    ''' the cell values of serialised cells as bytes, or None if a character is not a cell value '''
+    if isinstance(text, str):
+        if not text.isascii():
+            return None
+        text = text.encode('ascii')
+    values = bytes(text).translate(_CHAR_TO_VALUE)
+    return None if _INVALID in values else values
+
+def decode_cells(string: str) -> List[int]:
+    ''' cell values of a serialised grid. Raises KeyError for characters which are not cell values '''
+    values = _translate(string)
+    if values is None:
+        raise KeyError(next(ch for ch in string if ch not in _char_values))
+    return list(values)
+
+class GridGeometry():
+    ''' Index tables for one grid size and box shape: the cells of every unit (row, column, box), the units of
+        every cell and the peers of every cell. Built once by get_geometry() and shared by every grid of the same
+        shape, so all tables are tuples and must be treated as read-only.
+        Units are numbered rows first, then columns, then boxes.
+    '''
+    def __init__(self, size: int, box_height: int, box_width: int):
+        self.size = size
+        self.box_height = box_height
+        self.box_width = box_width
+        self.boxes_across = size // box_width
+        self.rows = tuple(tuple((r, c) for c in range(size)) for r in range(size))
+        self.cols = tuple(tuple((r, c) for r in range(size)) for c in range(size))
+        boxes = []
+        for first_row in range(0, size, box_height):
+            for first_col in range(0, size, box_width):
+                boxes.append(tuple((r, c) for r in range(first_row, first_row + box_height)
+                                          for c in range(first_col, first_col + box_width)))
+        self.boxes = tuple(boxes)
+        self.units = self.rows + self.cols + self.boxes
+        self.box_of = tuple(tuple((r // box_height) * self.boxes_across + c // box_width for c in range(size))
+                            for r in range(size))
+        # unit numbers and cells of the row, column and box of each cell
+        self.cell_unit_ids = tuple(tuple((r, size + c, 2 * size + self.box_of[r][c]) for c in range(size))
+                                   for r in range(size))
+        self.cell_units = tuple(tuple((self.rows[r], self.cols[c], self.boxes[self.box_of[r][c]]) for c in range(size))
+                                for r in range(size))
+        # every other cell which shares a unit, in row, column, box order
+        peers = []
+        for r in range(size):
+            row = []
+            for c in range(size):
+                cells = []
+                for unit in self.cell_units[r][c]:
+                    for cell in unit:
+                        if cell != (r, c) and cell not in cells:
+                            cells.append(cell)
+                row.append(tuple(cells))
+            peers.append(tuple(row))
+        self.peers = tuple(peers)
+
+    def __deepcopy__(self, memo):
+        return self # immutable and shared
+
+@lru_cache(maxsize=None)
+def get_geometry(size: int, box_height: int, box_width: int) -> GridGeometry:
+    return GridGeometry(size, box_height, box_width)
+
+@lru_cache(maxsize=None)
+def _shape(size: int) -> Tuple[int, int, int, int, GridGeometry]:
+    ''' regions across, regions down, box width, box height and geometry of the standard layout of a size '''
+    regions_across, regions_down = get_regions(size)
+    box_width, box_height = size // regions_across, size // regions_down
+    return regions_across, regions_down, box_width, box_height, get_geometry(size, box_height, box_width)
+
 class SudokuGrid():
-    def __init__(self, string: str = None, size: int = 9) -> List[List[int]]:
+    def __init__(self, string: Union[str, bytes] = None, size: int = 9) -> List[List[int]]:
         ''' string must be consist of the digits 0-n where n is the number of rows and columns and 0 represents a cell without a given digit
             Optionally, the zero can be replaced with a period "."
-            Only square grids are supported, and since only digits are allowed the maximum size grid is 9x9
+            Digits above 9 are letters: A=10, B=11, ..., P=25 (either case). Only square grids are supported, up to 25x25
+            The string may also be bytes, e.g. a line of a puzzle file read in binary mode
 
             Auto detect common regions, in the future support custom defined regions
         '''
         self.candidates= []
         
         if string:
-            self.size = int(math.sqrt(len(string)))
-            if self.size != math.sqrt(len(string)):
+            end = string.find('-' if isinstance(string, str) else b'-') # anything after a "-" is a label, e.g. "-easy-20200531"
+            string = string if end == -1 else string[:end]
+            size = math.isqrt(len(string))
+            if size * size != len(string):
                 raise Exception(f'The grid string has {len(string)} characters which does not define a square grid.')
-            if len([c for c in string if c != '.' and (c < '0' or c > chr(ord('0')+int(self.size)))]) > 0:
-                raise Exception(f'The grid string contains characters other than 0..{self.size} or "."')
+            if size < 3 or size > MAX_SIZE:
+                raise Exception(f'Size parameter must be 3..{MAX_SIZE}')
+            values = _translate(string)
+            if values is None or max(values) > size:
+                raise Exception(f'The grid string contains characters other than 0..{DIGITS[min(size, MAX_SIZE)]} or "."')
         else:
-            if size < 3 or size > 9:
-                raise Exception('Size parameter must be 3..9')
-            self.size = size
-            string = '0' * (size*size)
-
-        self.grid_list = self.__unflatten(self.__str2arr(string)) if string else None  
-        if self.size in standard_regions:
-            self.regions_across = standard_regions[self.size][0]
-            self.regions_down = standard_regions[self.size][1]
-        else: # until you tell us differently
-            self.regions_across = 3
-            self.regions_down = 3
-        self.box_width = self.size//self.regions_across 
-        self.box_height = self.size//self.regions_down 
+            if size < 3 or size > MAX_SIZE:
+                raise Exception(f'Size parameter must be 3..{MAX_SIZE}')
+            values = bytes(size * size)
+        self._set_values(values, size)
+
+    @classmethod
+    def from_values(cls, values, size: int = None) -> 'SudokuGrid':
+        ''' a grid from a flat sequence of cell values, row by row, e.g. a list or a bytes buffer. 0 is a blank '''
+        size = size or math.isqrt(len(values))
+        if size * size != len(values):
+            raise Exception(f'{len(values)} values do not fill a {size}x{size} grid.')
+        if min(values) < 0 or max(values) > size:
+            raise Exception(f'Cell values must be 0..{size}')
+        grid = cls.__new__(cls)
+        grid.candidates = []
+        grid._set_values(values, size)
+        return grid
+
+    def copy(self) -> 'SudokuGrid':
+        ''' a grid with a copy of the cells and the same geometry, without candidates '''
+        grid = SudokuGrid.__new__(SudokuGrid)
+        grid.__dict__.update(self.__dict__)
+        grid.candidates = []
+        grid.grid_list = [row[:] for row in self.grid_list]
+        return grid
+
+    def cells(self) -> bytes:
+        ''' the cell values, row by row '''
+        return bytes(chain.from_iterable(self.grid_list))
     
     def with_matrix(self, matrix):
         self.grid_list = matrix
         self.size = len(matrix)
+        self.geometry = get_geometry(self.size, self.box_height, self.box_width)
         return self
 
     def get_region_inds(self, r: int, c: int) -> List[Tuple[int,int]]:
         ''' Currently only supports standard rectangular regions, "boxes" '''
-        inds_region = []
-        first_row = (r // self.box_height) * self.box_height  
-        first_col = (c // self.box_width) * self.box_width  
-        for row in range(first_row, first_row + self.box_height):
-            for col in range(first_col, first_col + self.box_width):
-                inds_region.append((row, col))
-        return inds_region
+        return list(self.geometry.cell_units[r][c][2])
 
     def get_indices_for_regions(self):
         ''' returns a list of regions and their cell indices '''
-        inds_region = []
-        for row in range(0, self.size, self.box_height):
-            for col in range(0, self.size, self.box_width):
-                inds =self.get_region_inds(row, col)
-                inds_region.append(inds)
-        return inds_region
+        return [list(box) for box in self.geometry.boxes]
 
     # TODO: unused
     def get_nonempty(self, A):
@@ -85,79 +194,67 @@ class SudokuGrid():
         return [row[c] for row in self.grid_list]  
 
     def print_candidate_grid(self):
-        print(str(self))
+        print(self.candidate_grid_str())
+
+    def candidate_grid_str(self) -> str:
+        ''' the grid with the candidates of each cell in a square block, and placed digits marked with "*" '''
+        k = self._candidate_block()
+        lines = [str(self)]
         for box_row in range(self.regions_down):
-            self.print_gridlines('=')
+            lines.append(self.gridlines('='))
             for cell_row in range(self.box_height):
                 if cell_row != 0:
-                    self.print_gridlines('-')
+                    lines.append(self.gridlines('-'))
                 grid_row = box_row*self.box_height + cell_row
-                for candidate_row in range(3):
+                for candidate_row in range(k):
+                    line = ''
                     for box_col in range(self.regions_across):
-                        print("|", end='')
+                        line += "|"
                         for cell_col in range(self.box_width):
                             grid_col = box_col*self.box_width + cell_col                                
                             c = self.candidates[grid_row][grid_col]                                
                             if cell_col != 0:
-                                print(":", end='')
-                            for candidate_col in range(3):
-                                candidate = candidate_row*3+candidate_col+1
-                                if candidate in c:
-                                    print(str(candidate)+' ', end='')
-                                elif candidate_row==1 and candidate_col==1 and self.grid_list[grid_row][grid_col] != 0:
-                                    print(str(self.grid_list[grid_row][grid_col])+'*' , end='')
+                                line += ":"
+                            for candidate_col in range(k):
+                                candidate = candidate_row*k+candidate_col+1
+                                if candidate <= self.size and candidate in c:
+                                    line += DIGITS[candidate]+' '
+                                elif candidate_row==k//2 and candidate_col==k//2 and self.grid_list[grid_row][grid_col] != 0:
+                                    line += DIGITS[self.grid_list[grid_row][grid_col]]+'*'
                                 else:
-                                    print("  ", end='')
-                    print("|")
-        self.print_gridlines('=')
+                                    line += "  "
+                    lines.append(line + "|")
+        lines.append(self.gridlines('='))
+        return '\n'.join(lines)
 
     def print_gridlines(self,char='-'):
-        for _ in range(self.regions_across):
-            for _ in range(self.box_width):
-                print(f"+{char*6}", end='')
-        print("+")
+        print(self.gridlines(char))
+
+    def gridlines(self, char='-') -> str:
+        return f"+{char*2*self._candidate_block()}" * (self.regions_across * self.box_width) + "+"
+
+    def _candidate_block(self) -> int:
+        ''' width and height of the block of candidates printed for each cell '''
+        return max(3, math.isqrt(self.size - 1) + 1)
 
     '''------------------------------- OVERRIDES -------------------------------'''
 
     def __str__(self):
-        string = ''
-        for digit in self.__flatten():
-            string += str(digit)
-        return string
+        return self.cells().translate(_VALUE_TO_CHAR).decode('ascii')
 
     def __eq__(self, other):
         """ Check if 2 grids are equal or not"""
-        n = len(self.grid_list)
-        if n != len(other.grid_list):
-            return False
-        for i in range(n):
-            for j in range(n):
-                if self.grid_list[i][j] != other.grid_list[i][j]:
-                    return False
-        return True
+        if not isinstance(other, SudokuGrid):
+            return NotImplemented
+        return self.grid_list == other.grid_list
 
-    '''------------------------------- PRIVATE -------------------------------'''
+    def __hash__(self):
+        ''' by the cells, so a grid must not be changed while it is in a set or a dict key '''
+        return hash(self.cells())
 
-    def __flatten(self):
-        grid = self.grid_list.copy() # is copy needed?
-        arr = []
-        for row in grid:
-            arr.extend(row)
-        return arr
-
-    def __unflatten(self, arr: List[int]=None):
-        grid = []
-        for i in range(0, len(arr), self.size):
-            grid.append(arr[i:i+ self.size])
-        return grid
+    '''------------------------------- PRIVATE -------------------------------'''
 
-    def __str2arr(self, string):
-        arr =[]
-        end = string.find('-')
-        end = len(string) if end == -1 else end
-        for c in string[0:end]:
-            if c=='.':
-                arr.append(0)
-            else:
-                arr.append(int(c))
-        return arr # [int(c) for c in string]
+    def _set_values(self, values, size: int) -> None:
+        self.size = size
+        self.grid_list = [list(values[i:i + size]) for i in range(0, size * size, size)]
+        self.regions_across, self.regions_down, self.box_width, self.box_height, self.geometry = _shape(size)
@@ -1,4 +1,4 @@
-from SudokuGrid import SudokuGrid
+from SudokuGrid import SudokuGrid, get_regions, standard_regions, encode_cells, decode_cells
 import unittest
 
 class SudokuGridTest(unittest.TestCase):
@@ -17,6 +17,11 @@ class SudokuGridTest(unittest.TestCase):
         self.assertEqual(grid.size, 9)   
         self.assertEqual(str(grid),'100020400035040900704000001800000000091032080000100097070900600000000000000450000')     
 
+    def test_valid_9x9_grid_with_label(self):
+        grid = SudokuGrid('100020400035040900704000001800000000091032080000100097070900600000000000000450000-medium-20200531')  
+        self.assertEqual(grid.size, 9)   
+        self.assertEqual(str(grid),'100020400035040900704000001800000000091032080000100097070900600000000000000450000')     
+
     def test_invalid_length_string(self):
         with self.assertRaises(Exception):
             SudokuGrid('123443213412214300')
@@ -32,8 +37,12 @@ class SudokuGridTest(unittest.TestCase):
 
     def test_invalid_size(self):
         with self.assertRaises(Exception) as cm:
-            SudokuGrid(size=10)
-        self.assertEqual(str(cm.exception), 'Size parameter must be 3..9')
+            SudokuGrid(size=26)
+        self.assertEqual(str(cm.exception), 'Size parameter must be 3..25')
+        for string in ('0' * 36 * 36, '1234'):
+            with self.assertRaises(Exception) as cm:
+                SudokuGrid(string)
+            self.assertEqual(str(cm.exception), 'Size parameter must be 3..25')
 
     def test_get_region_inds_with_9x9(self):
         grid = SudokuGrid(size=9)
@@ -66,3 +75,82 @@ class SudokuGridTest(unittest.TestCase):
         grid = SudokuGrid(size=6)
         self.assertEqual(len(grid.grid_list),6)
         self.assertEqual(len(grid.grid_list[0]),6)
+
+    def test_geometry_is_shared(self):
+        grid1, grid2 = SudokuGrid(size=9), SudokuGrid('1234432134122143')
+        self.assertIs(grid1.geometry, SudokuGrid(size=9).geometry)
+        self.assertIsNot(grid1.geometry, grid2.geometry)
+        self.assertIsInstance(grid1.geometry.rows[0], tuple)
+
+    def test_geometry_units_and_peers_for_6x6(self):
+        geometry = SudokuGrid(size=6).geometry
+        self.assertEqual(len(geometry.units), 18)
+        self.assertEqual(geometry.box_of[4][3], 5)
+        self.assertEqual(geometry.cell_unit_ids[4][3], (4, 9, 17))
+        self.assertEqual(geometry.cell_units[4][3][2], ((4, 3), (4, 4), (4, 5), (5, 3), (5, 4), (5, 5)))
+        peers = geometry.peers[4][3]
+        self.assertEqual(len(peers), 5 + 5 + 2)
+        self.assertNotIn((4, 3), peers)
+        self.assertEqual(len(set(peers)), len(peers))
+
+    def test_letters_for_16x16(self):
+        puzzle = '0123456789ABCDEFG' + '0' * 239
+        grid = SudokuGrid(puzzle)
+        self.assertEqual((grid.size, grid.box_height, grid.box_width), (16, 4, 4))
+        self.assertEqual(grid.grid_list[0][10], 10)
+        self.assertEqual(grid.grid_list[1][0], 16)
+        self.assertEqual(str(grid), puzzle)
+        self.assertEqual(str(SudokuGrid(puzzle.lower())), puzzle)
+        with self.assertRaises(Exception):
+            SudokuGrid('H' + '0' * 255)
+        with self.assertRaises(Exception):
+            SudokuGrid('G' + '0' * 143) # 12x12 only goes up to C
+
+    def test_bytes_and_values(self):
+        puzzle = '100020400035040900704000001800000000091032080000100097070900600000000000000450000'
+        grid = SudokuGrid(puzzle)
+        self.assertEqual(SudokuGrid(puzzle.replace('0', '.').encode() + b'-hard'), grid)
+        values = decode_cells(puzzle)
+        self.assertEqual(encode_cells(values), puzzle)
+        self.assertEqual(SudokuGrid.from_values(values), grid)
+        self.assertEqual(SudokuGrid.from_values(bytes(values), 9), grid)
+        self.assertEqual(grid.cells(), bytes(values))
+        with self.assertRaises(Exception):
+            SudokuGrid.from_values([10] + values[1:])
+        with self.assertRaises(Exception):
+            SudokuGrid.from_values(values[1:])
+        with self.assertRaises(Exception):
+            SudokuGrid('\u00e9' + puzzle[1:])
+        with self.assertRaises(KeyError):
+            decode_cells('12x4')
+
+    def test_equality_and_hash(self):
+        grid = SudokuGrid('1234432134122143')
+        same = SudokuGrid('1234432134122143')
+        self.assertEqual(grid, same)
+        self.assertEqual(len({grid, same}), 1)
+        self.assertNotEqual(grid, SudokuGrid(size=4))
+        self.assertNotEqual(grid, '1234432134122143')
+        copy = grid.copy()
+        self.assertEqual(copy, grid)
+        copy.grid_list[0][0] = 0
+        self.assertEqual(grid.grid_list[0][0], 1)
+        self.assertNotEqual(copy, grid)
+        self.assertIs(copy.geometry, grid.geometry)
+
+    def test_regions_for_large_and_odd_sizes(self):
+        grid = SudokuGrid(size=12)
+        self.assertEqual((grid.box_height, grid.box_width), (3, 4))
+        self.assertEqual(len(SudokuGrid(size=25).geometry.boxes[0]), 25)
+        self.assertEqual(get_regions(10), (2, 5))  # boxes of 2 rows and 5 columns
+        self.assertEqual(get_regions(7), (1, 7))   # boxes are rows
+        for size, regions in standard_regions.items():
+            self.assertEqual(regions[0] * regions[1], size)
+
+    def test_candidate_grid_str_for_16x16(self):
+        grid = SudokuGrid(size=16)
+        grid.candidates = [[set(range(1, 17))] * 16] * 16
+        lines = grid.candidate_grid_str().splitlines()
+        self.assertEqual(lines[1], '+========' * 16 + '+')
+        self.assertTrue(lines[2].startswith('|1 2 3 4 :1 2 3 4 :'))
+        self.assertTrue(lines[5].startswith('|D E F G :'))
@@ -0,0 +1,249 @@
+''' Streaming reading and writing of serialised puzzles, one per line, and a packed binary format.
+
+    The binary format is an 8 byte header (b"SDKB", version, size, box height, box width) followed by the cells of
+    each puzzle in turn, with 0 for a blank. Cells are 4 bits for grids up to 15x15, packed two to a byte with the
+    first in the high nibble and without padding between puzzles, otherwise 8 bits. Labels are not stored.
+    The number of puzzles is given by the length of the file. The boxes must be the standard layout for the size.
+    python SudokuIO.py sudoku_top95.txt sudoku_top95.sdkb converts between the formats.
+'''
+import binascii
+import math
+import mmap
+import struct
+import sys
+from contextlib import contextmanager
+from itertools import chain
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union, TextIO
+
+from SudokuGrid import SudokuGrid, get_regions, encode_cells, decode_cells
+
+COMMENT = '#'
+BINARY_MAGIC = b'SDKB'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sBBBB') # magic, version, size, box height, box width
+NIBBLES = [(b >> 4, b & 15) for b in range(256)]
+
+@contextmanager
+def _open(file: Union[str, TextIO], mode: str):
+    if isinstance(file, str):
+        with open(file, mode) as f:
+            yield f
+    else:
+        yield file
+
+def split_label(line: Union[str, bytes]) -> Tuple[str, str]:
+    ''' split a line into the puzzle and the label after the first "-", e.g. "-easy-20200531" '''
+    end = line.find('-' if isinstance(line, str) else b'-')
+    if end == -1:
+        return line, ''
+    return line[:end], line[end:]
+
+def read_puzzles(file: Union[str, TextIO]) -> Iterator[Union[str, bytes]]:
+    ''' lazily yield each puzzle line of a file or open text stream, including any "-" label.
+        Blank lines and lines starting with "#" are skipped. Only one line is held in memory at a time.
+        A file name of a binary puzzle file yields its puzzles as bytes (see BinaryPuzzles.cells), which
+        SudokuGrid reads without decoding them to text '''
+    if isinstance(file, str) and is_binary(file):
+        with BinaryPuzzles(file) as puzzles:
+            for k in range(len(puzzles)):
+                yield puzzles.cells(k)
+        return
+    with _open(file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(COMMENT):
+                continue
+            yield line
+
+def format_solution(puzzle: str, solution: str = None) -> str:
+    ''' the line written for a puzzle: its solution, or all "." if unsolved, followed by the puzzle's label '''
+    grid, label = split_label(puzzle)
+    if isinstance(label, bytes):
+        label = label.decode('ascii')
+    if solution is None:
+        solution = '.' * len(grid)
+    return solution + label
+
+class SolutionWriter():
+    ''' Writes solutions line by line, in the format of sudoku_NY_solutions.txt.
+        Lines are flushed every flush_every solutions so partial output is visible while a batch runs '''
+    def __init__(self, file: Union[str, TextIO], flush_every: int = 1):
+        self._own = isinstance(file, str)
+        self.file = open(file, 'w') if self._own else file
+        self.flush_every = flush_every
+        self.count = 0
+
+    def write(self, puzzle: str, solution: str = None) -> None:
+        self.file.write(format_solution(puzzle, solution) + '\n')
+        self.count += 1
+        if self.flush_every and self.count % self.flush_every == 0:
+            self.file.flush()
+
+    def write_result(self, result: dict) -> None:
+        ''' write a result from SudokuSolver.solve_puzzle '''
+        self.write(result['puzzle'], result['solution'])
+
+    def close(self) -> None:
+        if self._own:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def write_solutions(file: Union[str, TextIO], results: Iterable[dict]) -> Iterator[dict]:
+    ''' write each result as it arrives and pass it through, so writing can be chained with other consumers '''
+    with SolutionWriter(file) as writer:
+        for result in results:
+            writer.write_result(result)
+            yield result
+
+
+def _cell_bits(size: int) -> int:
+    return 4 if size <= 15 else 8
+
+def is_binary(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def _cells(puzzle: str, size: int) -> Union[str, bytes]:
+    ''' the cells of a serialised puzzle: as hex digits, one per cell, for 4 bit cells, otherwise as bytes.
+        Any label is dropped '''
+    grid = split_label(puzzle)[0].replace('.', '0')
+    if len(grid) != size * size:
+        raise Exception(f'The grid string has {len(grid)} characters but a {size}x{size} grid needs {size * size}.')
+    try:
+        values = decode_cells(grid)
+    except KeyError:
+        values = [size + 1]
+    if max(values) > size:
+        raise Exception(f'The grid string contains characters other than 0..{encode_cells([size])} or "."')
+    if _cell_bits(size) == 8:
+        return bytes(values)
+    return grid # digits and the letters A-F are already hex
+
+def write_binary(file: Union[str, BinaryIO], puzzles: Iterable[str], size: int = None) -> int:
+    ''' write serialised puzzles in the binary format. The size is taken from the first puzzle if not given.
+        Returns the number of puzzles written '''
+    count = 0
+    pending = '' # a half byte left over from an odd number of cells
+    with _open(file, 'wb') as f:
+        for puzzle in puzzles:
+            if size is None:
+                size = math.isqrt(len(split_label(puzzle)[0]))
+            if count == 0:
+                regions_across, regions_down = get_regions(size)
+                f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, size, size // regions_down, size // regions_across))
+            cells = _cells(puzzle, size)
+            if _cell_bits(size) == 8:
+                f.write(cells)
+            else:
+                cells = pending + cells
+                end = len(cells) - len(cells) % 2
+                f.write(bytes.fromhex(cells[:end]))
+                pending = cells[end:]
+            count += 1
+        if pending:
+            f.write(bytes.fromhex(pending + '0'))
+    return count
+
+class BinaryPuzzles():
+    ''' Random access to a binary puzzle file through a read-only memory map. Nothing is read until it is used.
+        puzzles[k] is the k-th puzzle as text, cells(k) the same as ASCII bytes, values(k) its cells as integers,
+        grid(k) a SudokuGrid built directly from the cells, and raw(k) a zero-copy memoryview of the bytes holding it.
+        Only the standard box layout of each size is supported '''
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size, box_height, box_width = BINARY_HEADER.unpack_from(self.mm, 0)
+        except (ValueError, struct.error):
+            self.file.close()
+            raise Exception(f'{path} is too short to be a binary puzzle file')
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            self.close()
+            raise Exception(f'{path} is not a version {BINARY_VERSION} binary puzzle file')
+        regions_across, regions_down = get_regions(size) if size else (1, 1)
+        if not size or (box_height, box_width) != (size // regions_down, size // regions_across):
+            self.close()
+            raise Exception(f'{path} has {box_height}x{box_width} boxes, which is not the standard layout of a '
+                            f'{size}x{size} grid')
+        self.size, self.box_height, self.box_width = size, box_height, box_width
+        self.n_cells = size * size
+        self.bits = _cell_bits(size)
+        self.count = (len(self.mm) - BINARY_HEADER.size) * 8 // self.bits // self.n_cells
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _span(self, k: int) -> Tuple[int, int, int]:
+        ''' the bytes holding puzzle k, and the number of cells before it in the first byte '''
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError(f'puzzle {k} out of range for {self.count} puzzles')
+        start_bits, end_bits = k * self.n_cells * self.bits, (k + 1) * self.n_cells * self.bits
+        start, end = BINARY_HEADER.size + start_bits // 8, BINARY_HEADER.size + (end_bits + 7) // 8
+        return start, end, start_bits % 8 // self.bits
+
+    def raw(self, k: int) -> memoryview:
+        ''' the bytes holding puzzle k, without copying. For 4 bit cells the first and last bytes may be shared with
+            the neighbouring puzzles. Release it before closing '''
+        start, end, _ = self._span(k)
+        return memoryview(self.mm)[start:end]
+
+    def values(self, k: int) -> List[int]:
+        start, end, skip = self._span(k)
+        record = self.mm[start:end]
+        if self.bits == 8:
+            return list(record)
+        return list(chain.from_iterable(map(NIBBLES.__getitem__, record)))[skip:skip + self.n_cells]
+
+    def cells(self, k: int) -> bytes:
+        ''' the serialised cells of puzzle k as ASCII bytes, one per cell '''
+        start, end, skip = self._span(k)
+        if self.bits == 4:
+            return binascii.hexlify(self.mm[start:end])[skip:skip + self.n_cells].upper()
+        return encode_cells(self.mm[start:end]).encode('ascii')
+
+    def __getitem__(self, k: int) -> str:
+        return self.cells(k).decode('ascii')
+
+    def grid(self, k: int) -> SudokuGrid:
+        return SudokuGrid.from_values(self.values(k), self.size)
+
+    def __iter__(self) -> Iterator[str]:
+        for k in range(self.count):
+            yield self[k]
+
+    def close(self) -> None:
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def text_to_binary(text_file: Union[str, TextIO], binary_file: Union[str, BinaryIO]) -> int:
+    return write_binary(binary_file, read_puzzles(text_file))
+
+def binary_to_text(binary_file: str, text_file: Union[str, TextIO]) -> int:
+    count = 0
+    with _open(text_file, 'w') as f, BinaryPuzzles(binary_file) as puzzles:
+        for puzzle in puzzles:
+            f.write(puzzle + '\n')
+            count += 1
+    return count
+
+if __name__ == '__main__':
+    source, target = sys.argv[1:3]
+    if is_binary(source):
+        print('%d puzzles written to %s' % (binary_to_text(source, target), target))
+    else:
+        print('%d puzzles written to %s' % (text_to_binary(source, target), target))
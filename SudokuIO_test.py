@@ -0,0 +1,98 @@
+from SudokuIO import read_puzzles, split_label, format_solution, SolutionWriter, write_solutions
+from SudokuIO import BinaryPuzzles, write_binary, text_to_binary, binary_to_text, BINARY_HEADER, BINARY_MAGIC, BINARY_VERSION
+from SudokuGrid import SudokuGrid
+from SudokuSolver import solve_puzzle
+import io
+import os
+import tempfile
+import unittest
+
+class SudokuIOTest(unittest.TestCase):
+    def test_read_skips_comments_and_blank_lines(self):
+        f = io.StringIO('# top puzzles\n\n1...2.4...35.4.9..7.4.....18.........91.32.8....1...97.7.9..6..............45....\n'
+                        '   \n280070309600104007745080006064830100102009800000201930006050701508090020070402050-easy-20200531\n')
+        puzzles = list(read_puzzles(f))
+        self.assertEqual(len(puzzles), 2)
+        self.assertEqual(split_label(puzzles[1]), ('280070309600104007745080006064830100102009800000201930006050701508090020070402050', '-easy-20200531'))
+        self.assertEqual(str(SudokuGrid(puzzles[0])), '100020400035040900704000001800000000091032080000100097070900600000000000000450000')
+        self.assertEqual(str(SudokuGrid(puzzles[1])), split_label(puzzles[1])[0])
+
+    def test_read_is_lazy(self):
+        def lines():
+            yield '1234432134122143\n'
+            raise AssertionError('read past the first puzzle')
+        self.assertEqual(next(read_puzzles(lines())), '1234432134122143')
+
+    def test_format_solution(self):
+        self.assertEqual(format_solution('1.3.-easy', None), '....-easy')
+        self.assertEqual(format_solution('1.3.', '1234'), '1234')
+
+    def test_solutions_match_ny_file(self):
+        output = io.StringIO()
+        results = (solve_puzzle(k, p) for k, p in enumerate(read_puzzles('sudoku_NY.txt')))
+        for result in write_solutions(output, results):
+            self.assertTrue(result['solved'])
+        expected = list(read_puzzles('sudoku_NY_solutions.txt'))
+        written = output.getvalue().splitlines()
+        self.assertEqual(len(written), len(expected))
+        for line, expected_line in zip(written, expected):
+            if not expected_line.startswith('.'): # the file has no solution for some puzzles
+                self.assertEqual(line, expected_line)
+
+    def test_writer_flushes_incrementally(self):
+        output = io.StringIO()
+        with SolutionWriter(output) as writer:
+            writer.write('1.3.-x', '1234')
+            self.assertEqual(output.getvalue(), '1234-x\n')
+
+    def test_binary_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            binary, text = os.path.join(tmp, 'top95.sdkb'), os.path.join(tmp, 'top95.txt')
+            self.assertEqual(text_to_binary('sudoku_top95.txt', binary), 95)
+            self.assertLess(os.path.getsize(binary), os.path.getsize('sudoku_top95.txt') / 2)
+            self.assertEqual(binary_to_text(binary, text), 95)
+            expected = [str(SudokuGrid(p)) for p in read_puzzles('sudoku_top95.txt')]
+            self.assertEqual(list(read_puzzles(text)), expected)
+            # read_puzzles detects the binary format, and passes the cells on as bytes
+            self.assertEqual(list(read_puzzles(binary)), [p.encode('ascii') for p in expected])
+            output = io.StringIO()
+            results = list(write_solutions(output, (solve_puzzle(k, p) for k, p in enumerate(read_puzzles(binary)))))
+            self.assertEqual(output.getvalue().splitlines(), [result['solution'] for result in results])
+            self.assertTrue(all(result['solved'] for result in results))
+
+    def test_binary_random_access(self):
+        puzzles = ['024310036200000600652430260103400500', '000000000000000000000000000000000006']
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'six.sdkb')
+            write_binary(path, puzzles)
+            with BinaryPuzzles(path) as binary:
+                self.assertEqual((len(binary), binary.size, binary.box_height, binary.box_width), (2, 6, 2, 3))
+                self.assertEqual(binary[1], puzzles[1])
+                self.assertEqual(binary[-2], puzzles[0])
+                self.assertEqual(binary.values(1)[-1], 6)
+                self.assertEqual(str(binary.grid(0)), puzzles[0])
+                raw = binary.raw(0)
+                self.assertEqual(bytes(raw[:2]), bytes([0x02, 0x43]))
+                self.assertEqual(len(raw), 18)
+                raw.release()
+                with self.assertRaises(IndexError):
+                    binary[2]
+                self.assertEqual(binary.cells(0), puzzles[0].encode('ascii'))
+            with open(path, 'r+b') as f:
+                f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 6, 3, 2)) # 3x2 boxes are not standard
+            with self.assertRaises(Exception):
+                BinaryPuzzles(path)
+            with open(path, 'wb') as f:
+                f.write(b'not a puzzle file')
+            with self.assertRaises(Exception):
+                BinaryPuzzles(path)
+
+    def test_binary_letters(self):
+        puzzles = ['1' + '0' * 142 + 'C', 'G' + '0' * 254 + 'a']
+        with tempfile.TemporaryDirectory() as tmp:
+            for puzzle in puzzles:
+                path = os.path.join(tmp, 'large.sdkb')
+                write_binary(path, [puzzle, puzzle])
+                with BinaryPuzzles(path) as binary:
+                    self.assertEqual(binary[1], puzzle.upper())
+                    self.assertEqual(str(binary.grid(0)), puzzle.upper())
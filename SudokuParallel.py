@@ -0,0 +1,202 @@
+''' Solve many puzzles across a pool of processes, or one hard puzzle by searching its subtrees in parallel '''
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+from SudokuSolver import solve_puzzle, BatchStats
+from SudokuIO import read_puzzles, SolutionWriter
+from SudokuGrid import SudokuGrid
+from SudokuCandidates import popcount, mask_to_digits
+import Sudoku
+
+
+def _solve_chunk(start: int, puzzles: List[str], kwargs: dict) -> List[dict]:
+    return [solve_puzzle(start + k, puzzle, **kwargs) for k, puzzle in enumerate(puzzles)]
+
+
+def _chunks(puzzles: Iterable[str], chunk_size: int) -> Iterator[tuple]:
+    it = iter(puzzles)
+    start = 0
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def parallel_solve(puzzles: Iterable[str], processes: int = None, chunk_size: int = 8, ordered: bool = True,
+                   **kwargs) -> Iterator[dict]:
+    ''' Solve puzzles on a process pool and yield the result of solve_puzzle for each one.
+        Puzzles are sent out in small chunks and only a few chunks per worker are in flight at once. An idle
+        worker takes the next chunk as soon as it finishes its own, so a hard puzzle only delays its own chunk
+        instead of a whole static partition of the input. The input is consumed lazily.
+        If ordered, results are yielded in input order, otherwise in order of completion.
+        kwargs are passed on to solveSudoku.
+    '''
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        for start, chunk in _chunks(puzzles, chunk_size):
+            yield from _solve_chunk(start, chunk, kwargs)
+        return
+
+    max_in_flight = processes * 4
+    max_buffered = processes * 16  # completed chunks held back waiting for an earlier chunk
+    chunks = _chunks(puzzles, chunk_size)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_flight = {}  # future -> start index of the chunk
+        buffered = {}  # start index -> results, for ordered output
+        next_start = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight and len(buffered) < max_buffered:
+                try:
+                    start, chunk = next(chunks)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(_solve_chunk, start, chunk, kwargs)] = start
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                start = in_flight.pop(future)
+                results = future.result()
+                if not ordered:
+                    yield from results
+                    continue
+                buffered[start] = results
+            while next_start in buffered:
+                results = buffered.pop(next_start)
+                next_start += len(results)
+                yield from results
+
+
+def split_puzzle(grid: SudokuGrid, depth: int = 2, constraints=None) -> List[str]:
+    ''' the subproblems at the top depth levels of the search tree, as puzzle strings.
+        Like the solver, each level guesses every candidate of the cell with the fewest candidates and propagates.
+        Branches which propagation shows to be impossible are left out, so the solutions of the puzzle are exactly
+        the solutions of the subproblems '''
+    game = Sudoku.Sudoku(SudokuGrid(str(grid)), constraints)
+    game.flush_candidates()
+    if not game.check_possible()[0]:
+        return []
+    size = grid.size
+    grid_list, masks = game.grid.grid_list, game.candidates.masks
+    subproblems = []
+
+    def split(level: int):
+        best = None # (number of candidates, cell index)
+        for k in range(size * size):
+            if grid_list[k // size][k % size] == 0:
+                n_options = popcount(masks[k])
+                if n_options == 0:
+                    return # a dead end
+                if n_options > 1 and (best is None or n_options < best[0]):
+                    best = (n_options, k)
+        if level == depth or best is None:
+            subproblems.append(str(game.grid))
+            return
+        r, c = divmod(best[1], size)
+        for x in mask_to_digits(masks[best[1]]):
+            mark = game.mark()
+            game.place_and_erase(r, c, x)
+            split(level + 1)
+            game.undo(mark)
+
+    split(0)
+    return subproblems
+
+
+_stop = None # set in each worker of parallel_search: an event which cancels the other subproblems
+
+def _init_search_worker(stop) -> None:
+    global _stop
+    _stop = stop
+
+
+def _solve_subproblem(k: int, puzzle: str, kwargs: dict) -> dict:
+    return solve_puzzle(k, puzzle, stop=_stop, **kwargs)
+
+
+def parallel_search(grid: SudokuGrid, processes: int = None, split_depth: int = 2, all_solutions=False,
+                    solution_limit: int = None, constraints=None, **kwargs):
+    ''' Solve one puzzle by splitting the top split_depth levels of its search tree into subproblems (see
+        split_puzzle) and searching them on a process pool. Returns (grid, solved, info) like solveSudoku.
+        Without all_solutions the first solution found cancels the other subproblems. With all_solutions the
+        solutions of every subproblem are merged, in the order of the subproblems, up to solution_limit.
+        info['subproblems'] is the number of subproblems. kwargs are passed on to solveSudoku, e.g. engine.
+        This only pays for puzzles which need a long search. Easy puzzles are faster with solveSudoku.
+    '''
+    t0 = time.perf_counter()
+    processes = processes or os.cpu_count() or 1
+    limit = solution_limit or (None if all_solutions else 1)
+    subproblems = split_puzzle(grid, split_depth, constraints)
+    kwargs = dict(kwargs, constraints=constraints, all_solutions=limit != 1, solution_limit=limit)
+
+    results = {}
+    found = 0
+    stop = multiprocessing.Event()
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_search_worker, initargs=(stop,)) as executor:
+        futures = [executor.submit(_solve_subproblem, k, puzzle, kwargs) for k, puzzle in enumerate(subproblems)]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result['index']] = result
+            found += result['solutions']
+            if limit is not None and found >= limit:
+                stop.set()
+                for f in futures:
+                    f.cancel()
+                break
+
+    solution_set = [solution for k in sorted(results) for solution in results[k]['solution set']]
+    if limit == 1 and solution_set:
+        first = next(r for r in results.values() if r['solutions']) # the first to finish
+        solution_set = first['solution set'][:1]
+    solution_set = solution_set[:limit]
+    statuses = {r['status'] for r in results.values()} - {'solved', 'unsolvable', 'cancelled'}
+    info = {
+        'calls': sum(r['calls'] for r in results.values()),
+        'max depth': split_depth + max(r['max depth'] for r in results.values()) if results else 0,
+        'solutions': min(found, limit) if limit is not None else found,
+        'solution set': solution_set,
+        'subproblems': len(subproblems),
+        'status': 'solved' if found else (statuses.pop() if statuses else 'unsolvable'),
+        'time': time.perf_counter() - t0,
+    }
+    if found:
+        # the solution set is empty if keep_solutions=False was passed on
+        first = SudokuGrid(solution_set[0]) if solution_set else SudokuGrid(next(
+            results[k]['solution'] for k in sorted(results) if results[k]['solutions']))
+        return first, True, info
+    return grid, False, info
+
+
+def parallel_batch_solve(file_name, output_file=None, processes: int = None, chunk_size: int = 8,
+                         ordered: bool = True) -> BatchStats:
+    ''' parallel version of batch_solve. Reports the same statistics '''
+    print(f"\nSolving puzzles from {file_name} with {processes or os.cpu_count()} processes")
+    writer = SolutionWriter(output_file) if output_file else None
+
+    t0 = time.time()
+    stats = BatchStats()
+    for result in parallel_solve(read_puzzles(file_name), processes=processes, chunk_size=chunk_size,
+                                 ordered=ordered, all_solutions=False):
+        stats.update(result)
+        if writer:
+            writer.write_result(result)
+        if result['solutions'] > 1:
+            print('error: puzzle %d has %d solution' % (result['index'], result['solutions']))
+    deltaT = time.time() - t0
+    if writer:
+        writer.close()
+    stats.report(deltaT)
+    return stats
+
+
+if __name__ == '__main__':
+    parallel_batch_solve('sudoku_top95.txt')
+    parallel_batch_solve('sudoku_hardest.txt')
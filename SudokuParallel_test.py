@@ -0,0 +1,63 @@
+from SudokuParallel import parallel_solve, parallel_search, split_puzzle
+from SudokuSolver import BatchStats, SudokuSolver, solve_puzzle
+from SudokuGrid import SudokuGrid
+import unittest
+
+PUZZLES = [
+    '280070309600104007745080006064830100102009800000201930006050701508090020070402050',
+    '100020400035040900704000001800000000091032080000100097070900600000000000000450000',
+    '000010030009005008804006025000000600008004000120087000300900200065008000900000000',
+    '800000000003600000070090200050007000000045700000100030001000068008500010090000400',
+    '999200000065074800070006900004000000050008704000030000000000600080000057006007089',
+]
+
+class SudokuParallelTest(unittest.TestCase):
+    def test_ordered_results(self):
+        results = list(parallel_solve(PUZZLES, processes=2, chunk_size=1))
+        self.assertEqual([r['index'] for r in results], list(range(len(PUZZLES))))
+        self.assertEqual([r['puzzle'] for r in results], PUZZLES)
+        self.assertEqual([r['solved'] for r in results], [True, True, True, True, False])
+        self.assertEqual(results[3]['solution'], '812753649943682175675491283154237896369845721287169534521974368438526917796318452')
+
+    def test_unordered_results_match_serial(self):
+        serial = [solve_puzzle(k, p) for k, p in enumerate(PUZZLES)]
+        results = sorted(parallel_solve(iter(PUZZLES), processes=2, chunk_size=2, ordered=False), key=lambda r: r['index'])
+        self.assertEqual([r['solution'] for r in results], [r['solution'] for r in serial])
+        self.assertEqual([r['calls'] for r in results], [r['calls'] for r in serial])
+
+    def test_stats_merge(self):
+        results = list(parallel_solve(PUZZLES, processes=1))
+        total, first, second = BatchStats(), BatchStats(), BatchStats()
+        for r in results:
+            total.update(r)
+            (first if r['index'] % 2 else second).update(r)
+        first.merge(second)
+        self.assertEqual(first.num_solved, 4)
+        self.assertEqual((first.count, first.total_calls, first.max_calls, first.max_depth),
+                         (total.count, total.total_calls, total.max_calls, total.max_depth))
+
+    def test_split_puzzle(self):
+        subproblems = split_puzzle(SudokuGrid(PUZZLES[3]), depth=2)
+        self.assertGreater(len(subproblems), 2)
+        solved = [p for p in subproblems if SudokuSolver().count_solutions(SudokuGrid(p)) == 1]
+        self.assertEqual(len(solved), 1) # the puzzle is unique, so exactly one branch holds the solution
+        self.assertEqual(split_puzzle(SudokuGrid(PUZZLES[4])), [])
+
+    def test_parallel_search(self):
+        for engine in ('logic', 'dlx'):
+            grid, solved, info = parallel_search(SudokuGrid(PUZZLES[3]), processes=2, engine=engine)
+            self.assertTrue(solved)
+            self.assertEqual(str(grid), '812753649943682175675491283154237896369845721287169534521974368438526917796318452')
+            self.assertEqual((info['solutions'], info['status']), (1, 'solved'))
+        _, solved, info = parallel_search(SudokuGrid(PUZZLES[4]), processes=2)
+        self.assertEqual((solved, info['status']), (False, 'unsolvable'))
+
+    def test_parallel_search_all_solutions(self):
+        puzzle = '080001206000020000020005040060010900002050400008000010030704050000000000406100080'
+        _, serial = SudokuSolver().count_solutions(SudokuGrid(puzzle), return_solutions=True)
+        _, solved, info = parallel_search(SudokuGrid(puzzle), processes=2, all_solutions=True, engine='dlx')
+        self.assertEqual(info['solutions'], 379)
+        self.assertEqual(sorted(info['solution set']), sorted(serial))
+        _, solved, info = parallel_search(SudokuGrid(puzzle), processes=2, solution_limit=10)
+        self.assertEqual((info['solutions'], len(info['solution set'])), (10, 10))
+        self.assertEqual(len(set(info['solution set']) - set(serial)), 0)
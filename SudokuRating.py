@@ -0,0 +1,116 @@
+''' Difficulty rating of puzzles by logic alone, without guessing.
+
+    The strategies run cheapest first, and a harder one only when the easier ones are stuck, much as a person would
+    solve. Every time a strategy changes the candidates of a unit is a step. The score adds up the weight of each
+    step, and the difficulty is the level of the hardest technique needed. Puzzles which logic alone cannot finish
+    are "extreme".
+
+    python SudokuRating.py sudoku_top95.txt
+'''
+import sys
+import time
+from collections import Counter
+from typing import List, Tuple, Union
+
+from SudokuGrid import SudokuGrid
+from SudokuIO import read_puzzles
+from Sudoku import Sudoku
+
+RATING_STRATEGIES = ('naked-singles', 'singles', 'pointing', 'box-line', 'subsets', 'x-wing', 'swordfish', 'xy-wing',
+                     'coloring')
+# the weight of a step with each technique and the level of puzzles which need it
+TECHNIQUES = {
+    'naked-singles': (1, 'easy'),
+    'singles': (2, 'easy'),
+    'pointing': (3, 'medium'),
+    'box-line': (3, 'medium'),
+    'pairs': (4, 'hard'),
+    'triples': (5, 'hard'),
+    'subsets': (5, 'hard'),
+    'x-wing': (8, 'expert'),
+    'xy-wing': (9, 'expert'),
+    'swordfish': (10, 'expert'),
+    'coloring': (10, 'expert'),
+}
+LEVELS = ('easy', 'medium', 'hard', 'expert', 'extreme')
+OTHER_TECHNIQUE = (1, 'easy') # e.g. the regions of variant constraints
+
+def unit_label(u: int, size: int) -> str:
+    ''' r1..rn for rows, c1..cn for columns, b1..bn for boxes and u<id> for the units of variant constraints '''
+    if u < 3 * size:
+        return 'rcb'[u // size] + str(u % size + 1)
+    return 'u%d' % u
+
+def format_steps(steps: List[Tuple[str, int, int]], size: int) -> str:
+    ''' a compact log of steps, e.g. "singles@r1:4 pointing@b3:2", with the candidates each step removed '''
+    return ' '.join('%s@%s:%d' % (name, unit_label(u, size), eliminated) for name, u, eliminated in steps)
+
+def rate_puzzle(puzzle: Union[str, bytes, SudokuGrid], strategies=RATING_STRATEGIES, constraints=None,
+                log: bool = True) -> dict:
+    ''' rate a puzzle by solving it with strategies only. Returns
+            solved      True if logic alone filled the grid
+            difficulty  the level of the hardest technique used, or "extreme" if not solved
+            score       the sum of the weights of the steps
+            hardest     the name of the hardest technique used
+            techniques  the number of steps with each technique used
+            remaining   the number of empty cells left
+            steps       the step log (see format_steps), if log
+    '''
+    grid = SudokuGrid(puzzle) if isinstance(puzzle, (str, bytes)) else puzzle.copy()
+    game = Sudoku(grid, constraints, strategies=list(strategies))
+    if log:
+        game.steps = []
+    game.flush_candidates()
+
+    masks = game.candidates.masks
+    remaining = 0
+    broken = False
+    for k, x in enumerate(v for row in grid.grid_list for v in row):
+        if not x:
+            remaining += 1
+            broken = broken or not masks[k]
+    solved = remaining == 0 and game.check_possible()[0]
+
+    techniques = {name: s['fired'] for name, s in game.stats.items() if s['fired']}
+    score, hardest = 0, None
+    for name, count in techniques.items():
+        weight, _ = TECHNIQUES.get(name, OTHER_TECHNIQUE)
+        score += weight * count
+        if hardest is None or weight > TECHNIQUES.get(hardest, OTHER_TECHNIQUE)[0]:
+            hardest = name
+    if solved:
+        difficulty = TECHNIQUES.get(hardest, OTHER_TECHNIQUE)[1] if hardest else LEVELS[0]
+    else:
+        difficulty = LEVELS[-1]
+    result = {
+        'solved': solved,
+        'difficulty': difficulty,
+        'score': score,
+        'hardest': hardest,
+        'techniques': techniques,
+        'remaining': remaining,
+    }
+    if broken:
+        result['error'] = 'a cell has no candidates'
+    if log:
+        result['steps'] = format_steps(game.steps, grid.size)
+    return result
+
+def rate_file(file_name: str, **kwargs) -> Counter:
+    ''' rate every puzzle in a file, print one line for each and return the number at each level '''
+    levels = Counter()
+    t0 = time.perf_counter()
+    for k, puzzle in enumerate(read_puzzles(file_name)):
+        rating = rate_puzzle(puzzle, log=False, **kwargs)
+        levels[rating['difficulty']] += 1
+        print('%4d %-8s score %4d  hardest %-13s remaining %3d' % (
+            k, rating['difficulty'], rating['score'], rating['hardest'] or '-', rating['remaining']))
+    deltaT = time.perf_counter() - t0
+    count = sum(levels.values())
+    print('rated %d puzzles in %.2fs (%.1f/s): %s' % (count, deltaT, count / deltaT if deltaT else 0.0,
+                                                      ', '.join('%d %s' % (levels[l], l) for l in LEVELS if levels[l])))
+    return levels
+
+if __name__ == '__main__':
+    for file_name in sys.argv[1:] or ['sudoku_top95.txt']:
+        rate_file(file_name)
@@ -0,0 +1,40 @@
+from SudokuRating import rate_puzzle, unit_label, TECHNIQUES, LEVELS
+from SudokuIO import read_puzzles
+import unittest
+
+NY = list(read_puzzles('sudoku_NY.txt'))
+
+class SudokuRatingTest(unittest.TestCase):
+    def test_easy(self):
+        rating = rate_puzzle(NY[0])
+        self.assertTrue(rating['solved'])
+        self.assertEqual(rating['difficulty'], 'easy')
+        self.assertEqual(rating['remaining'], 0)
+        steps = rating['steps'].split()
+        self.assertEqual(len(steps), sum(rating['techniques'].values()))
+        self.assertTrue(steps[0].startswith('naked-singles@'))
+
+    def test_levels(self):
+        for puzzle, difficulty, hardest in ((NY[1], 'medium', 'pointing'), (NY[2], 'hard', 'subsets')):
+            rating = rate_puzzle(puzzle, log=False)
+            self.assertEqual((rating['difficulty'], rating['hardest']), (difficulty, hardest))
+            self.assertNotIn('steps', rating)
+            self.assertEqual(rating['score'], sum(TECHNIQUES[name][0] * count
+                                                  for name, count in rating['techniques'].items()))
+        # without the techniques it needs, logic gets stuck
+        rating = rate_puzzle(NY[2], strategies=('naked-singles', 'singles'))
+        self.assertFalse(rating['solved'])
+        self.assertEqual(rating['difficulty'], 'extreme')
+        self.assertGreater(rating['remaining'], 0)
+
+    def test_extreme(self):
+        rating = rate_puzzle(list(read_puzzles('sudoku_hardest.txt'))[1])
+        self.assertFalse(rating['solved'])
+        self.assertEqual(rating['difficulty'], LEVELS[-1])
+        self.assertNotIn('error', rating)
+
+    def test_unit_label(self):
+        self.assertEqual([unit_label(u, 9) for u in (0, 8, 9, 26, 27)], ['r1', 'r9', 'c1', 'b9', 'u27'])
+
+if __name__ == '__main__':
+    unittest.main()
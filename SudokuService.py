@@ -0,0 +1,226 @@
+''' An asyncio service which solves puzzles sent as line-delimited JSON over TCP or a Unix socket.
+
+    Each request is one line, and gets one line back:
+        {"id": 1, "puzzle": "4.....8.5.3...", "time_limit": 2}
+        {"id": 1, "status": "solved", "solution": "4173698...", "calls": 3, "max depth": 2, "time": 0.004, "latency": 0.005}
+    Optional request fields are "constraints", "engine", "time_limit" (seconds), "max_calls" and "max_depth". The
+    status is "solved", "unsolvable", "timeout", "max_calls", "max_depth" or "error". A search stopped by a budget also
+    returns the most constrained "partial" grid it reached and its "candidates", a string of digits for each cell.
+    {"op": "metrics"} returns the service metrics instead.
+    Responses are written as soon as they are ready, so on one connection they may be out of order. Match them by "id".
+
+    Requests wait in a bounded queue for a worker process. When the queue is full the service stops reading from
+    connections, which pushes back on clients through the socket. Every search has a time limit and optionally a call
+    budget, capped by the service's own, so a pathological puzzle cannot hold a worker indefinitely.
+
+    python SudokuService.py --port 8765 --processes 4
+'''
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from SudokuSolver import solve_puzzle
+from SudokuGrid import encode_cells
+from SudokuBenchmark import percentile
+
+SOLVE_OPTIONS = ('constraints', 'engine', 'time_limit', 'max_calls', 'max_depth')
+
+def _solve_request(request: dict) -> dict:
+    ''' solve one request in a worker process '''
+    kwargs = {key: request[key] for key in SOLVE_OPTIONS if request.get(key) is not None}
+    try:
+        result = solve_puzzle(0, request['puzzle'], **kwargs)
+    except Exception as e:
+        return {'status': 'error', 'error': str(e)}
+    response = {key: result[key] for key in ('status', 'solution', 'calls', 'max depth', 'time')}
+    if 'partial' in result:
+        response['partial'] = result['partial']
+        response['candidates'] = [[encode_cells(digits) for digits in row] for row in result['candidates']]
+    return response
+
+BUDGETS = ('time_limit', 'max_calls', 'max_depth')
+
+def _budget_error(request: dict):
+    ''' the error for a budget which is not a non-negative number, or None if they are all valid '''
+    for key in BUDGETS:
+        value = request.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+            return f'"{key}" must be a non-negative number'
+    return None
+
+def _cap(requested, limit):
+    if requested is None:
+        return limit
+    return requested if limit is None else min(requested, limit)
+
+class SolverService():
+    ''' Solves requests on a pool of processes.
+        max_queue is the number of requests waiting for a worker before clients are made to wait.
+        time_limit and max_calls are the budgets of every search. Requests may ask for less but not more '''
+    def __init__(self, processes: int = None, max_queue: int = 64, time_limit: float = 10.0, max_calls: int = None,
+                 latency_window: int = 1000):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.time_limit = time_limit
+        self.max_calls = max_calls
+        self.latencies = deque(maxlen=latency_window) # seconds from arrival to response, for the latest requests
+        self.status_counts = Counter()
+        self.busy = 0
+        self.queue = None
+        self.executor = None
+        self.workers = []
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue(self.max_queue)
+        self.executor = ProcessPoolExecutor(max_workers=self.processes)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(self.processes)]
+
+    async def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            request, future = await self.queue.get()
+            self.busy += 1
+            try:
+                response = await loop.run_in_executor(self.executor, _solve_request, request)
+            except Exception as e: # e.g. the worker process died
+                response = {'status': 'error', 'error': repr(e)}
+            finally:
+                self.busy -= 1
+                self.queue.task_done()
+            if not future.done():
+                future.set_result(response)
+
+    async def enqueue(self, request: dict) -> asyncio.Future:
+        ''' queue a request, waiting while the queue is full. The future is set to the response '''
+        future = asyncio.get_running_loop().create_future()
+        if not isinstance(request.get('puzzle'), str):
+            future.set_result({'status': 'error', 'error': 'the request has no "puzzle" string'})
+            return future
+        error = _budget_error(request)
+        if error is not None:
+            future.set_result({'status': 'error', 'error': error})
+            return future
+        limited = dict(request, time_limit=_cap(request.get('time_limit'), self.time_limit),
+                       max_calls=_cap(request.get('max_calls'), self.max_calls))
+        await self.queue.put((limited, future))
+        return future
+
+    def _finish(self, request: dict, response: dict, t0: float) -> dict:
+        latency = time.perf_counter() - t0
+        self.latencies.append(latency)
+        self.status_counts[response['status']] += 1
+        response = dict(response, latency=latency)
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def submit(self, request: dict) -> dict:
+        ''' solve one request and return the response '''
+        t0 = time.perf_counter()
+        future = await self.enqueue(request)
+        return self._finish(request, await future, t0)
+
+    def metrics(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'max_queue': self.max_queue,
+            'busy_workers': self.busy,
+            'workers': self.processes,
+            'completed': sum(self.status_counts.values()),
+            'status': dict(self.status_counts),
+            'latency_p50_ms': percentile(latencies, 50) * 1000,
+            'latency_p95_ms': percentile(latencies, 95) * 1000,
+            'latency_p99_ms': percentile(latencies, 99) * 1000,
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        ''' serve one client: a request per line in, a response per line out '''
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def send(response: dict):
+            async with lock:
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+
+        async def respond(request: dict, future: asyncio.Future, t0: float):
+            await send(self._finish(request, await future, t0))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('a request must be a JSON object')
+                except ValueError as e:
+                    await send({'status': 'error', 'error': str(e)})
+                    continue
+                if request.get('op') == 'metrics':
+                    await send(self.metrics())
+                    continue
+                # waiting for space here stops this connection being read while the queue is full
+                future = await self.enqueue(request)
+                task = asyncio.create_task(respond(request, future, t0))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+async def serve(service: SolverService, host: str = '127.0.0.1', port: int = 8765, path: str = None):
+    ''' start the service and a server for it, on a Unix socket if path is given, otherwise on TCP '''
+    await service.start()
+    if path:
+        return await asyncio.start_unix_server(service.handle_connection, path=path)
+    return await asyncio.start_server(service.handle_connection, host, port)
+
+async def _main(args) -> None:
+    service = SolverService(args.processes, args.max_queue, args.time_limit, args.max_calls)
+    server = await serve(service, args.host, args.port, args.unix)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the Sudoku solver over line-delimited JSON')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--processes', type=int, help='worker processes (default: number of CPUs)')
+    parser.add_argument('--max-queue', type=int, default=64, help='requests waiting before clients are made to wait')
+    parser.add_argument('--time-limit', type=float, default=10.0, help='maximum seconds of search per request')
+    parser.add_argument('--max-calls', type=int, help='maximum search calls per request')
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,62 @@
+from SudokuService import SolverService, serve
+import asyncio
+import json
+import unittest
+
+HARDEST = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+SOLUTION = '812753649943682175675491283154237896369845721287169534521974368438526917796318452'
+
+class SudokuServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def test_submit_and_budgets(self):
+        async with SolverService(processes=1, max_calls=5000) as service:
+            response = await service.submit({'id': 'a', 'puzzle': HARDEST})
+            self.assertEqual((response['id'], response['status'], response['solution']), ('a', 'solved', SOLUTION))
+            response = await service.submit({'puzzle': HARDEST, 'max_calls': 3})
+            self.assertEqual((response['status'], response['calls'], response['solution']), ('max_calls', 3, None))
+            self.assertEqual((len(response['partial']), len(response['candidates'])), (81, 9))
+            response = await service.submit({'puzzle': HARDEST, 'engine': 'dlx', 'max_calls': 10 ** 9})
+            self.assertEqual(response['status'], 'solved')
+            self.assertEqual((await service.submit({'puzzle': '123'}))['status'], 'error')
+            self.assertEqual((await service.submit({'id': 1}))['status'], 'error')
+            for budget in ({'max_calls': '10'}, {'max_depth': -1}, {'time_limit': True}):
+                self.assertEqual((await service.submit(dict(budget, puzzle=HARDEST)))['status'], 'error')
+            metrics = service.metrics()
+            self.assertEqual(metrics['completed'], 8)
+            self.assertEqual(metrics['status'], {'solved': 2, 'max_calls': 1, 'error': 5})
+            self.assertGreater(metrics['latency_p99_ms'], 0)
+
+    async def test_service_budget_caps_requests(self):
+        async with SolverService(processes=1, max_calls=100) as service:
+            response = await service.submit({'puzzle': HARDEST, 'engine': 'dlx', 'max_calls': 10 ** 9})
+            self.assertEqual((response['status'], response['calls']), ('max_calls', 100))
+
+    async def test_tcp_json_lines(self):
+        service = SolverService(processes=1, max_queue=1)
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            lines = [{'id': k, 'puzzle': HARDEST, 'engine': 'dlx'} for k in range(4)]
+            writer.write(''.join(json.dumps(line) + '\n' for line in lines).encode() + b'not json\n')
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in range(5)]
+            self.assertEqual(sorted(r['id'] for r in responses if 'id' in r), [0, 1, 2, 3])
+            self.assertEqual(sum(r['status'] == 'solved' for r in responses), 4)
+            self.assertEqual(sum(r['status'] == 'error' for r in responses), 1)
+            # a malformed budget gets an error, and the connection keeps serving
+            writer.write(b'{"id": 5, "puzzle": "%s", "time_limit": "5"}\n{"id": 6, "puzzle": "%s", "max_calls": 10}\n'
+                         % (HARDEST.encode(), HARDEST.encode()))
+            responses = {r['id']: r for r in [json.loads(await reader.readline()) for _ in range(2)]}
+            self.assertEqual((responses[5]['status'], responses[5]['error']),
+                             ('error', '"time_limit" must be a non-negative number'))
+            self.assertEqual(responses[6]['status'], 'max_calls')
+            writer.write(b'{"op": "metrics"}\n')
+            metrics = json.loads(await reader.readline())
+            self.assertEqual(metrics['completed'], 6) # lines which are not requests are not counted
+            self.assertEqual(metrics['queue_depth'], 0)
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.close()
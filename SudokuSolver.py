@@ -10,14 +10,9 @@ TODO: (in no particular order)
 1) detect if there are multiple solutions
 2) count # of solutions (up to some limit)
 3) add optional constraints which apply to the whole puzzle:
-    diagonal +
-    diagonal -
-    anti-knight
-    anti-king
-    non-consecutive
-    disjoint groups
+    done, see SudokuConstraints: diagonal +, diagonal -, anti-knight, anti-king, non-consecutive, disjoint groups
 4) add optional constraints placed on the grid:
-    Thermometers
+    done, see SudokuConstraints: Thermometers, Killer cages
     Kropki dots (ratios, differences)
     XV
     Quadruples
@@ -33,150 +28,295 @@ from itertools import combinations
 import random
 import time 
 from SudokuGrid import SudokuGrid
+from SudokuCandidates import popcount, candidate_lists
+from SudokuTrace import Tracer, TraceLevel
+from SudokuIO import read_puzzles, SolutionWriter
+from SudokuDLX import solve_dlx
+from SudokuBranching import get_branch, check_policy
 import Sudoku
 
 BOX_SIZE = 3
 
+class SearchLimitReached(Exception):
+    ''' raised inside the search when a budget runs out or it is cancelled. reason is the status reported:
+        "max_calls", "max_depth", "timeout" or "cancelled" '''
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
 class SudokuSolver():
-    def solveSudoku(self, grid: SudokuGrid, verbose=True, all_solutions=False, constraints=None):
+    def count_solutions(self, grid: SudokuGrid, limit=None, constraints=None, engine='dlx', return_solutions=False):
+        ''' number of solutions of grid, stopping as soon as limit solutions are found (no limit if None).
+            Solutions are only kept as strings if return_solutions, in which case (count, solution set) is returned.
+            The grid is not modified. '''
+        grid = SudokuGrid(str(grid)) if engine == 'logic' else grid # the logic engine fills in the grid it solves
+        _, _, info = self.solveSudoku(grid, verbose=False, all_solutions=True, constraints=constraints, engine=engine,
+                                      solution_limit=limit, keep_solutions=return_solutions)
+        if return_solutions:
+            return info['solutions'], info['solution set']
+        return info['solutions']
+
+    def is_unique(self, grid: SudokuGrid, constraints=None, engine='dlx') -> bool:
+        ''' True if grid has exactly one solution '''
+        return self.count_solutions(grid, limit=2, constraints=constraints, engine=engine) == 1
+
+    def solveSudoku(self, grid: SudokuGrid, verbose=True, all_solutions=False, constraints=None, backtrack='trail', trace: Tracer = None,
+                    engine='logic', solution_limit=None, keep_solutions=True, strategies=None, max_calls=None,
+                    max_depth=None, time_limit=None, stop=None, branching='mrv', value_order='ascending'):
         # idea based on https://dev.to/aspittel/how-i-finally-wrote-a-sudoku-solver-177g
         # Try each step until failure, and repeat:
         # 1) write numbers with only have 1 option
         # 2) write candidates with only 1 option/ 2 pairs
         # 3) with multiple options, take a guess and branch (backtrack)
+        # backtrack='trail' undoes each guess from a log of changes; backtrack='copy' guesses on a deepcopy of the game
+        # trace sets what is written while solving. By default only progress is written, and only if verbose
+        # engine='dlx' solves the grid as an exact cover problem with Dancing Links instead (see SudokuDLX)
+        # solution_limit stops the search after that many solutions. It implies all_solutions
+        # keep_solutions=False leaves the solution set empty, for counting. The first solution is still returned
+        # strategies are the names of the propogation strategies to use (see SudokuStrategies). None for the defaults
+        # info['strategies'] has the applications, eliminations and time of each strategy
+        # max_calls, max_depth (of nested guesses) and time_limit (in seconds) are budgets for the search. When one
+        # runs out the search stops and info['status'] is "max_calls", "max_depth" or "timeout". Otherwise it is
+        # "solved" or "unsolvable". A stopped search returns the most constrained grid it reached, with its
+        # candidates in info['candidates'] as a tuple of digits for each cell
+        # stop is an optional event (e.g. a multiprocessing.Event). Once it is set the search stops with status "cancelled"
+        # branching and value_order choose where to guess and in which order (see SudokuBranching). Logic engine only
+        if engine == 'dlx':
+            return solve_dlx(grid, all_solutions=all_solutions, constraints=constraints, max_solutions=solution_limit,
+                             keep_solutions=keep_solutions, max_calls=max_calls, max_depth=max_depth,
+                             time_limit=time_limit, stop=stop)
+        if engine != 'logic':
+            raise Exception(f"Unknown engine '{engine}'. Use 'logic' or 'dlx'")
+        if backtrack not in ('trail', 'copy'):
+            raise Exception(f"Unknown backtrack mode '{backtrack}'. Use 'trail' or 'copy'")
+        check_policy(branching, value_order)
         def solve(game: Sudoku, depth=0, progress_factor=1 ):
-            nonlocal calls, depth_max, progress, progress_update, update_increment
+            nonlocal calls, depth_max, progress, progress_update, update_increment, num_solutions, partial, first_solution
+            if max_calls is not None and calls >= max_calls:
+                raise SearchLimitReached('max_calls')
+            if max_depth is not None and depth > max_depth:
+                raise SearchLimitReached('max_depth')
+            if deadline is not None and time.perf_counter() > deadline:
+                raise SearchLimitReached('timeout')
+            if stop is not None and stop.is_set():
+                raise SearchLimitReached('cancelled')
             calls += 1
             depth_max = max(depth, depth_max)
             solved = False
+            size = game.grid.size
+            masks = game.candidates.masks # candidates as bitmasks, updated in place by place_and_erase
             while not solved:
-                print(str(game.grid))  
+                if trace_steps:
+                    trace.grid(TraceLevel.STEP, game.grid)
                 solved = True  # assume solved
                 edited = False  # if no edits, either done or stuck
-                for i in range(game.grid.size):
-                    for j in range(game.grid.size):
-                        if game.grid.grid_list[i][j] == 0:
+                for i in range(size):
+                    row = game.grid.grid_list[i]
+                    for j in range(size):
+                        if row[j] == 0:
                             solved = False
-                            options = game.grid.candidates[i][j] 
+                            options = masks[i * size + j]
                             #options = game.find_options(i, j)
-                            if len(options) == 0:
+                            if options == 0:
                                 progress += progress_factor
                                 return game.grid, False # this call is going nowhere
-                            elif len(options) == 1:  # Step 1
+                            elif options & (options - 1) == 0:  # Step 1: only one bit set
                                 #game.grid[i][j] = list(options)[0]
-                                game.place_and_erase(i, j, list(options)[0]) # Step 2
+                                game.place_and_erase(i, j, options.bit_length()) # Step 2
                                 #game.flush_candidates() # full grid cleaning
                                 edited = True
                 if not edited: # changed nothing in this round -> either done or stuck
                     if solved:
                         progress += progress_factor
-                        solution_set.append(str(game.grid))
+                        num_solutions += 1
+                        if keep_solutions:
+                            solution_set.append(str(game.grid))
+                        if first_solution is None:
+                            first_solution = game.grid.copy()
                         #print(len(solution_set), solution_set[-1])
                         return game.grid, True
                     else:
-                        # Find the box with the least number of options and take a guess
-                        # The erase() changes this dynamically in the previous for loop
-                        min_guesses = (game.grid.size + 1, -1)
-                        for i in range(game.grid.size):
-                            for j in range(game.grid.size):
-                                options = game.grid.candidates[i][j] 
-                                #options = game.find_options(i, j)
-                                if len(options) < min_guesses[0] and len(options) > 1:
-                                    min_guesses = (len(options), (i, j))
-                        i, j = min_guesses[1]
-                        options = game.grid.candidates[i][j] 
-                        #options = game.find_options(i, j) 
+                        # keep the most constrained grid so far, to return if the search is stopped
+                        remaining = sum(popcount(m) for m in masks)
+                        if remaining < partial[0]:
+                            partial = (remaining, str(game.grid), masks[:])
+                        # Take a guess. By default at the box with the least number of options (see SudokuBranching)
+                        branch = get_branch(game, branching, value_order)
+                        if not branch:
+                            progress += progress_factor
+                            return game.grid, False # a digit has no place left in some unit
                         # backtracking check point:
-                        progress_factor *= (1/len(options)) 
-                        for y in options:
-                            game_next = deepcopy(game)
+                        progress_factor *= (1/len(branch)) 
+                        for i, j, y in branch:
+                            if trace_steps:
+                                trace.write(TraceLevel.STEP, 'depth %d: guess %d at (%d, %d) of %d options' % (depth, y, i, j, len(branch)))
+                            if backtrack == 'trail':
+                                mark = game.mark()
+                                game_next = game
+                            else:
+                                game_next = deepcopy(game, {id(game.stats): game.stats}) # share the counters
                             #game_next.grid[i][j] = y
                             game_next.place_and_erase(i, j, y)
                             #game_next.flush_candidates() # full grid cleaning
                             grid_final, solved = solve(game_next, depth=depth+1, progress_factor=progress_factor)
-                            if solved and not all_solutions:
+                            if backtrack == 'trail':
+                                game.undo(mark) # the solution, if any, is already in solution_set
+                            if limit is not None and num_solutions >= limit:
                                 break # return 1 solution
-                            if progress > progress_update and verbose:
-                                print("%.1f" %  (progress*100), end='...')
+                            if progress > progress_update and trace.level >= TraceLevel.PROGRESS:
+                                trace.write(TraceLevel.PROGRESS, "%.1f" %  (progress*100), end='...')
                                 progress_update = ((progress//update_increment) + 1) * update_increment
                         return grid_final, solved
             return game.grid, solved
         
         calls, depth_max = 0, 0
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
         progress, update_increment, progress_update = 0, 0.01, 0.01
         solution_set = []
+        first_solution = None # a copy of the grid, to return without parsing solution_set[0]
+        num_solutions = 0
+        limit = solution_limit or (None if all_solutions else 1)
 
         # used to supress the unused variable warning
         progress = progress
         progress_update = progress_update
 
-        game = Sudoku.Sudoku(grid, constraints) 
-        print("after creation")
-        print(str(game.grid))  
+        if trace is None:
+            trace = Tracer(TraceLevel.PROGRESS if verbose else TraceLevel.NONE)
+        trace_steps = trace.level >= TraceLevel.STEP
+
+        game = Sudoku.Sudoku(grid, constraints, trace=trace, strategies=strategies)
+        if trace_steps:
+            trace.write(TraceLevel.STEP, "after creation")
+            trace.grid(TraceLevel.STEP, game.grid)
         game.flush_candidates()  # check for obvious candidates
-        print("after flush candidates")
-        print(str(game.grid))  
+        if trace_steps:
+            trace.write(TraceLevel.STEP, "after flush candidates")
+            trace.grid(TraceLevel.STEP, game.grid)
+            trace.candidates(TraceLevel.CANDIDATES, game.grid)
         
         possible, message = game.check_possible()
         if not possible:
-            print('Error on board. %s' % message)
+            trace.write(TraceLevel.PROGRESS, 'Error on board. %s' % message)
             info = {
                 'calls': calls, 
                 'max depth': depth_max, 
-                'solutions': len(solution_set), 
-                'solution set': solution_set
+                'solutions': num_solutions, 
+                'solution set': solution_set,
+                'strategies': game.stats,
+                'status': 'unsolvable'
             }
             return grid, False, info
 
-        grid_final, solved = solve(game, depth=0)
+        status = None
+        masks = game.candidates.masks
+        partial = (sum(popcount(m) for m in masks), str(game.grid), masks[:])
+        root = game.mark()
+        try:
+            grid_final, solved = solve(game, depth=0)
+        except SearchLimitReached as stopped:
+            game.undo(root) # take back the guesses in progress, leaving the grid as propagation left it
+            grid_final, solved, status = SudokuGrid(partial[1]), False, stopped.reason
 
-        if len(solution_set) >= 1:
+        if first_solution is not None:
             solved = True
-            grid_final = SudokuGrid(solution_set[0])
+            grid_final = first_solution
 
         info = {
             'calls': calls, 
             'max depth': depth_max, 
-            'solutions': len(solution_set), 
-            'solution set': solution_set}
+            'solutions': num_solutions, 
+            'solution set': solution_set,
+            'strategies': game.stats,
+            'status': status or ('solved' if solved else 'unsolvable')}
+        if status is not None and not solved:
+            info['candidates'] = candidate_lists(partial[2], grid.size)
         return grid_final, solved, info
 
-def batch_solve(file_name):
+def solve_puzzle(k: int, puzzle: str, **kwargs) -> dict:
+    ''' solve one serialised puzzle and return the solver info with its index, solution and time.
+        kwargs are passed on to solveSudoku. This is the unit of work for batch solving '''
+    tk0 = time.time()
+    grid_final, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, **kwargs)
+    result = {
+        'index': k,
+        'puzzle': puzzle,
+        'solution': str(grid_final) if done else None,
+        'solved': done,
+        'time': time.time() - tk0
+    }
+    if 'candidates' in info: # the search was stopped by a budget
+        result['partial'] = str(grid_final)
+    result.update(info)
+    return result
+
+class BatchStats():
+    ''' Aggregates the statistics reported by batch_solve. Results may arrive in any order '''
+    def __init__(self):
+        self.count = 0
+        self.num_solved = 0
+        self.total_calls = 0
+        self.max_t = [0, -1] # time, k
+        self.max_calls, self.max_depth = [0,0,-1], [0,0,-1]  #[calls, max depth, k]
+        self.multiple_solutions = [] # [k, solutions]
+
+    @property
+    def mean_calls(self) -> float:
+        return self.total_calls / self.count if self.count else 0
+
+    def update(self, result: dict) -> None:
+        k = result['index']
+        self.count += 1
+        self.num_solved += result['solved']
+        self.total_calls += result['calls']
+        ## set maximums
+        self.max_t = max(self.max_t, [result['time'], k])
+        self.max_calls = max(self.max_calls, [result['calls'], result['max depth'], k])
+        self.max_depth = max(self.max_depth, [result['calls'], result['max depth'], k], key=lambda x:x[1])
+        if result['solutions'] > 1:
+            self.multiple_solutions.append([k, result['solutions']])
+
+    def merge(self, other: 'BatchStats') -> None:
+        self.count += other.count
+        self.num_solved += other.num_solved
+        self.total_calls += other.total_calls
+        self.max_t = max(self.max_t, other.max_t)
+        self.max_calls = max(self.max_calls, other.max_calls)
+        self.max_depth = max(self.max_depth, other.max_depth, key=lambda x:x[1])
+        self.multiple_solutions += other.multiple_solutions
+
+    def report(self, deltaT: float) -> None:
+        print(' ')
+        print("number solved: %d/%d" % (self.num_solved, self.count))
+        print("total time: %.5fs; average time: %.5fs," % (deltaT, deltaT/max(self.count, 1)))
+        print("max time, # puzzle ", self.max_t)
+        print("max calls, depth, # puzzle:", self.max_calls)
+        print("calls, max(max depth), # puzzle:", self.max_depth)
+        print("average calls: %.1f" % self.mean_calls)
+
+def batch_solve(file_name, output_file=None):
+    ''' solve every puzzle in file_name, optionally writing the solutions to output_file as they are found.
+        Puzzles are read one at a time, so memory use does not depend on the size of the file '''
     print(f"\nSolving puzzles from {file_name}")
-    puzzles = []
-    with open(file_name, 'r') as f:
-        puzzles = f.read().strip().split('\n')
+    writer = SolutionWriter(output_file) if output_file else None
     
     t0 = time.time()
-    max_t = [0, -1] # time, k
-    max_calls, max_depth = [0,0,-1], [0,0,-1]  #[calls, max depth, k]
-    num_solved = 0
-    mean_calls = 0
-    for k, puzzle in enumerate(puzzles):
-        tk0 = time.time()
-        puzzle = SudokuGrid(puzzle)
-        _, done, info = SudokuSolver().solveSudoku(puzzle, verbose=False, all_solutions=False)
-        deltaTk = time.time() - tk0
-        num_solved += done
-        mean_calls = (mean_calls * k + info['calls']) / (k + 1) # update average
-        ## set maximums
-        max_t = max(max_t, [deltaTk, k])
-        max_calls = max(max_calls, [info['calls'], info['max depth'], k])
-        max_depth = max(max_depth, [info['calls'], info['max depth'], k], key=lambda x:x[1])
-        if info['solutions'] > 1:
-            print('error: puzzle %d has %d solution' % (k, info['solutions']))
+    stats = BatchStats()
+    for k, puzzle in enumerate(read_puzzles(file_name)):
+        result = solve_puzzle(k, puzzle, all_solutions=False)
+        stats.update(result)
+        if writer:
+            writer.write_result(result)
+        if result['solutions'] > 1:
+            print('error: puzzle %d has %d solution' % (k, result['solutions']))
     deltaT = time.time() - t0
-    print(' ')
-    print("number solved: %d/%d" % (num_solved, len(puzzles)))
-    print("total time: %.5fs; average time: %.5fs," % (deltaT, deltaT/len(puzzles)))
-    print("max time, # puzzle ", max_t)
-    print("max calls, depth, # puzzle:", max_calls)
-    print("calls, max(max depth), # puzzle:", max_depth)
-    print("average calls: %.1f" % mean_calls)
+    if writer:
+        writer.close()
+    stats.report(deltaT)
 
 if __name__ == '__main__':
     ''' Execute the puzzles in the puzzles '''
     batch_solve('sudoku_top95.txt')    # from https://norvig.com/sudoku.html. Solver at https://www.sudokuwiki.org/sudoku.htm can solve 67, but not 6 
     batch_solve('sudoku_hardest.txt')  # from https://norvig.com/sudoku.html  
-    batch_solve('Sudoku_NY.txt')       # from the New York Times
+    batch_solve('sudoku_NY.txt')       # from the New York Times
 
@@ -0,0 +1,167 @@
+''' Candidate elimination strategies, applied to one unit (row, column or box) at a time.
+    A strategy has a name, a relative cost and an apply(game, unit) method which removes candidates from a
+    Sudoku game and returns the cells it changed. Strategies are registered by name in STRATEGIES.
+
+    Sudoku.constraint_propogation runs the cheapest strategy on every changed unit first, and only escalates to
+    more expensive strategies when the cheaper ones stall.
+    See https://www.sudokuwiki.org/Strategy_Families for descriptions of the strategies.
+'''
+from typing import Dict, Iterable, List, Tuple
+
+STRATEGIES = {}
+
+class Strategy():
+    name = None
+    cost = 1           # relative cost. Cheaper strategies run first
+    boxes_only = False # True if the strategy only applies to boxes
+    lines_only = False # True if the strategy only applies to rows and columns
+
+    def apply(self, game, unit: Tuple[Tuple[int, int], ...]) -> List[Tuple[int, int]]:
+        ''' remove candidates in game using unit, and return the cells which changed '''
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return '%s(cost=%s)' % (type(self).__name__, self.cost)
+
+def register(strategy_class):
+    ''' class decorator which adds an instance of a Strategy to STRATEGIES '''
+    STRATEGIES[strategy_class.name] = strategy_class()
+    return strategy_class
+
+@register
+class NakedSingles(Strategy):
+    ''' places a cell with one candidate. The solver does this between propagations, so it is only needed to
+        solve by strategies alone, e.g. for rating '''
+    name = 'naked-singles'
+    cost = 0
+
+    def apply(self, game, unit):
+        return game.naked_singles(unit)
+
+@register
+class HiddenSingles(Strategy):
+    ''' a digit with only one place in a unit. Naked singles are placed by the solver itself '''
+    name = 'singles'
+    cost = 1
+
+    def apply(self, game, unit):
+        return game.hidden_singles(unit)
+
+@register
+class Pairs(Strategy):
+    ''' hidden and naked pairs '''
+    name = 'pairs'
+    cost = 2
+
+    def apply(self, game, unit):
+        return game.hidden_naked_singles_pairs_triples((unit,), types=(2,))
+
+@register
+class PointingCombos(Strategy):
+    ''' a digit confined to one line within a box is removed from the rest of the line '''
+    name = 'pointing'
+    cost = 3
+    boxes_only = True
+
+    def apply(self, game, unit):
+        erased = []
+        for line, inds_pointer, num in game.pointing_combos(unit):
+            erased += game.erase(num, line, inds_pointer)
+        return erased
+
+@register
+class BoxLineReduction(Strategy):
+    ''' a digit confined to one box within a line is removed from the rest of the box '''
+    name = 'box-line'
+    cost = 3
+    boxes_only = True
+
+    def apply(self, game, unit):
+        erased = []
+        for inds_keep, nums in game.box_line_reduction(unit):
+            erased += game.erase(nums, unit, inds_keep)
+        return erased
+
+@register
+class Triples(Strategy):
+    ''' hidden and naked triples '''
+    name = 'triples'
+    cost = 4
+
+    def apply(self, game, unit):
+        return game.hidden_naked_singles_pairs_triples((unit,), types=(3,))
+
+@register
+class Subsets(Strategy):
+    ''' hidden and naked pairs and triples together, sharing one count of the candidates '''
+    name = 'subsets'
+    cost = 4
+
+    def apply(self, game, unit):
+        return game.hidden_naked_singles_pairs_triples((unit,), types=(2, 3))
+
+@register
+class XWing(Strategy):
+    ''' a digit in two places in each of two lines, in the same two crossing lines '''
+    name = 'x-wing'
+    cost = 5
+    lines_only = True
+
+    def apply(self, game, unit):
+        return game.fish(unit, 2)
+
+@register
+class Swordfish(Strategy):
+    ''' a digit in at most three places in each of three lines, in the same three crossing lines '''
+    name = 'swordfish'
+    cost = 6
+    lines_only = True
+
+    def apply(self, game, unit):
+        return game.fish(unit, 3)
+
+@register
+class XYWing(Strategy):
+    ''' a cell with two candidates, and two cells it sees which each share one of them and have a third in common.
+        The unit is searched for the first cell, so this only needs to apply to boxes '''
+    name = 'xy-wing'
+    cost = 6
+    boxes_only = True
+
+    def apply(self, game, unit):
+        return game.xy_wing(unit)
+
+@register
+class SimpleColoring(Strategy):
+    ''' chains of digits with two places in a unit '''
+    name = 'coloring'
+    cost = 7
+
+    def apply(self, game, unit):
+        return game.simple_coloring(unit)
+
+DEFAULT_STRATEGIES = ('singles', 'pointing', 'box-line', 'subsets') # pairs and triples together are faster
+
+def get_strategies(names: Iterable = None) -> List[Strategy]:
+    ''' Strategy objects ordered by cost, from names in STRATEGIES or Strategy objects. None gives the defaults '''
+    strategies = []
+    for s in DEFAULT_STRATEGIES if names is None else names:
+        if isinstance(s, str):
+            if s not in STRATEGIES:
+                raise Exception(f"Unknown strategy '{s}'. Options are {sorted(STRATEGIES)}")
+            s = STRATEGIES[s]
+        strategies.append(s)
+    return sorted(strategies, key=lambda s: s.cost)
+
+def new_stats(strategies: Iterable[Strategy]) -> Dict[str, dict]:
+    ''' per strategy counters: units it was applied to, how often it changed candidates, the number of
+        candidates it removed and the time spent in it '''
+    return {s.name: {'applied': 0, 'fired': 0, 'eliminated': 0, 'time': 0.0} for s in strategies}
+
+def stats_report(stats: Dict[str, dict]) -> str:
+    ''' a table of strategy stats, as made by new_stats '''
+    lines = ['%-12s %9s %8s %10s %9s %12s' % ('strategy', 'applied', 'fired', 'eliminated', 'time (s)', 'elim/ms')]
+    for name, s in stats.items():
+        rate = s['eliminated'] / (s['time'] * 1000) if s['time'] else 0.0
+        lines.append('%-12s %9d %8d %10d %9.3f %12.1f' % (name, s['applied'], s['fired'], s['eliminated'], s['time'], rate))
+    return '\n'.join(lines)
@@ -0,0 +1,123 @@
+from SudokuStrategies import Strategy, STRATEGIES, DEFAULT_STRATEGIES, get_strategies, stats_report
+from Sudoku import Sudoku
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+import unittest
+
+PUZZLE = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+
+class CountingStrategy(Strategy):
+    name = 'counting'
+    cost = 0
+
+    def __init__(self):
+        self.units = []
+
+    def apply(self, game, unit):
+        self.units.append(unit)
+        return []
+
+class SudokuStrategiesTest(unittest.TestCase):
+    def test_ordered_by_cost(self):
+        strategies = get_strategies(['triples', 'singles', 'pointing', 'pairs'])
+        self.assertEqual([s.name for s in strategies], ['singles', 'pairs', 'pointing', 'triples'])
+        self.assertEqual({s.name for s in get_strategies()}, set(DEFAULT_STRATEGIES))
+        with self.assertRaises(Exception):
+            get_strategies(['x-wing-typo'])
+
+    def test_custom_strategy_runs_first(self):
+        counting = CountingStrategy()
+        game = Sudoku(SudokuGrid(size=4), strategies=[counting, 'singles'])
+        self.assertIs(game.strategies[0], counting)
+        game.flush_candidates()
+        self.assertEqual(len(counting.units), 12)
+        self.assertEqual(game.stats['counting']['applied'], 12)
+
+    def test_mixes_find_same_solution(self):
+        expected = str(SudokuSolver().solveSudoku(SudokuGrid(PUZZLE), verbose=False, engine='dlx')[0])
+        calls = {}
+        for mix in (['singles'], ['singles', 'pairs', 'pointing', 'triples'], None):
+            grid, done, info = SudokuSolver().solveSudoku(SudokuGrid(PUZZLE), verbose=False, strategies=mix)
+            self.assertTrue(done)
+            self.assertEqual(str(grid), expected)
+            self.assertEqual(set(info['strategies']), set(mix or DEFAULT_STRATEGIES))
+            calls[mix and len(mix)] = info['calls']
+        # pairs and triples together are as strong as separately
+        self.assertEqual(calls[4], calls[None])
+        self.assertGreaterEqual(calls[1], calls[None])
+
+    def test_stats_report(self):
+        _, _, info = SudokuSolver().solveSudoku(SudokuGrid(PUZZLE), verbose=False)
+        report = stats_report(info['strategies']).splitlines()
+        self.assertEqual(len(report), 1 + len(DEFAULT_STRATEGIES))
+        self.assertTrue(report[1].startswith('singles'))
+        self.assertTrue(all(name in STRATEGIES for name in info['strategies']))
+
+class EliminationStrategiesTest(unittest.TestCase):
+    def setUp(self):
+        self.game = Sudoku(SudokuGrid(size=9), strategies=[])
+        self.geometry = self.game.grid.geometry
+
+    def keep_only(self, x, unit, keep):
+        self.game.erase([x], unit, keep)
+
+    def apply(self, name, unit):
+        return set(STRATEGIES[name].apply(self.game, unit))
+
+    def has(self, x, r, c):
+        return x in self.game.candidates[r][c]
+
+    def test_naked_singles(self):
+        self.game.set_candidates([5], [(0, 4)])
+        erased = self.apply('naked-singles', self.geometry.rows[0])
+        self.assertEqual(self.game.grid.grid_list[0][4], 5)
+        self.assertIn((0, 4), erased)
+        self.assertIn((4, 4), erased) # 5 erased from the column
+        self.assertFalse(self.has(5, 1, 3))
+        self.assertEqual(self.apply('naked-singles', self.geometry.rows[0]), set())
+
+    def test_box_line_reduction(self):
+        self.keep_only(1, self.geometry.rows[0], [(0, 0), (0, 1), (0, 2)])
+        erased = self.apply('box-line', self.geometry.boxes[0])
+        self.assertEqual(erased, {(r, c) for r in (1, 2) for c in range(3)})
+        self.assertTrue(self.has(1, 0, 0) and self.has(1, 3, 0))
+
+    def test_x_wing(self):
+        for r in (0, 4):
+            self.keep_only(1, self.geometry.rows[r], [(r, 0), (r, 4)])
+        erased = self.apply('x-wing', self.geometry.rows[0])
+        self.assertEqual(erased, {(r, c) for r in range(9) for c in (0, 4) if r not in (0, 4)})
+        self.assertEqual(self.apply('x-wing', self.geometry.cols[0]), set())
+
+    def test_swordfish(self):
+        for r, cols in ((0, (0, 4)), (3, (4, 8)), (6, (0, 8))):
+            self.keep_only(1, self.geometry.rows[r], [(r, c) for c in cols])
+        self.assertEqual(self.apply('x-wing', self.geometry.rows[0]), set())
+        erased = self.apply('swordfish', self.geometry.rows[0])
+        self.assertEqual(erased, {(r, c) for r in range(9) for c in (0, 4, 8) if r not in (0, 3, 6)})
+
+    def test_xy_wing(self):
+        masks = self.game.candidates.masks
+        masks[0], masks[5], masks[36] = 0b011, 0b101, 0b110 # (0, 0) has 1 2, (0, 5) has 1 3 and (4, 0) has 2 3
+        erased = self.apply('xy-wing', self.geometry.boxes[0])
+        self.assertEqual(erased, {(4, 5)}) # sees both pincers, so cannot be 3
+        self.assertFalse(self.has(3, 4, 5))
+
+    def test_simple_coloring(self):
+        # 1 is in row 0 at (0, 0) or (0, 4), in column 4 at (0, 4) or (5, 4), and in row 5 at (5, 4) or (5, 1)
+        self.keep_only(1, self.geometry.rows[0], [(0, 0), (0, 4)])
+        self.keep_only(1, self.geometry.cols[4], [(0, 4), (5, 4)])
+        self.keep_only(1, self.geometry.rows[5], [(5, 4), (5, 1)])
+        erased = self.apply('coloring', self.geometry.rows[0])
+        self.assertEqual(erased, {(1, 1), (2, 1), (3, 0), (4, 0)}) # these see (0, 0) and (5, 1), one of which is 1
+
+    def test_stronger_strategies_need_fewer_calls(self):
+        puzzle = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+        strategies = ['singles', 'pointing', 'subsets']
+        _, _, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, strategies=strategies)
+        calls = info['calls']
+        for extra in (['box-line'], ['box-line', 'xy-wing', 'coloring']):
+            grid, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, strategies=strategies + extra)
+            self.assertTrue(done)
+            self.assertLessEqual(info['calls'], calls)
+            calls = info['calls']
@@ -0,0 +1,45 @@
+''' Leveled tracing for the solver. Nothing is formatted unless the level is enabled '''
+import sys
+from enum import IntEnum
+
+class TraceLevel(IntEnum):
+    NONE = 0
+    PROGRESS = 1    # percentage progress and board errors
+    STEP = 2        # the grid after every propagation round and every guess
+    CANDIDATES = 3  # full candidate grid dumps
+
+class Tracer():
+    ''' Routes trace messages to a file-like object (default stdout) or a callback.
+        A callback is called as callback(level, message).
+        Call sites check tracer.level before building a message, so a disabled tracer costs one integer comparison.
+    '''
+    def __init__(self, level=TraceLevel.NONE, output=None):
+        self.level = int(level)
+        self.callback = None
+        self.file = None
+        if callable(output) and not hasattr(output, 'write'):
+            self.callback = output
+        else:
+            self.file = output
+
+    def enabled(self, level: TraceLevel) -> bool:
+        return self.level >= level
+
+    def write(self, level: TraceLevel, message: str, end='\n') -> None:
+        if self.level < level:
+            return
+        if self.callback:
+            self.callback(TraceLevel(level), message)
+        else:
+            file = self.file or sys.stdout
+            file.write(message + end)
+
+    def grid(self, level: TraceLevel, grid) -> None:
+        if self.level >= level:
+            self.write(level, str(grid))
+
+    def candidates(self, level: TraceLevel, grid) -> None:
+        if self.level >= level:
+            self.write(level, grid.candidate_grid_str())
+
+SILENT = Tracer()
@@ -0,0 +1,49 @@
+from SudokuGrid import SudokuGrid
+from SudokuSolver import SudokuSolver
+from SudokuTrace import Tracer, TraceLevel
+import contextlib
+import io
+import unittest
+
+PUZZLE = '800000000003600000070090200050007000000045700000100030001000068008500010090000400' # needs guesses
+
+class SudokuTraceTest(unittest.TestCase):
+    def solve_with_output(self, **kwargs):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            _, done, _ = SudokuSolver().solveSudoku(SudokuGrid(PUZZLE), **kwargs)
+        self.assertTrue(done)
+        return stdout.getvalue()
+
+    def test_silent_when_not_verbose(self):
+        self.assertEqual(self.solve_with_output(verbose=False), '')
+
+    def test_verbose_writes_progress_only(self):
+        output = self.solve_with_output(verbose=True)
+        self.assertNotIn(PUZZLE, output)
+        self.assertNotIn('+======', output)
+
+    def test_callback_receives_steps(self):
+        messages = []
+        trace = Tracer(TraceLevel.STEP, lambda level, message: messages.append((level, message)))
+        self.assertEqual(self.solve_with_output(trace=trace), '')
+        levels = {level for level, _ in messages}
+        self.assertIn(TraceLevel.STEP, levels)
+        self.assertNotIn(TraceLevel.CANDIDATES, levels)
+        self.assertIn((TraceLevel.STEP, PUZZLE), messages)
+        self.assertTrue(any(message.startswith('depth 0: guess') for _, message in messages))
+
+    def test_candidate_dump_to_file(self):
+        output = io.StringIO()
+        self.solve_with_output(trace=Tracer(TraceLevel.CANDIDATES, output))
+        self.assertIn('starting grid with candidates', output.getvalue())
+        self.assertIn('+======+', output.getvalue())
+
+    def test_candidate_grid_str_matches_print(self):
+        grid = SudokuGrid('1234432134122143')
+        grid.candidates = [[set()] * 4 for _ in range(4)]
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            grid.print_candidate_grid()
+        self.assertEqual(stdout.getvalue(), grid.candidate_grid_str() + '\n')
+        self.assertEqual(grid.candidate_grid_str().splitlines()[1], '+======' * 4 + '+')
@@ -0,0 +1,174 @@
+''' Vectorised candidate computation and singles for many grids at once, with NumPy.
+    Most puzzles fall to naked and hidden singles alone. Those are solved here for a whole batch with array
+    operations, and only the grids that are still unsolved are handed to SudokuSolver.
+
+    NumPy is optional. Everything else in this package works without it.
+'''
+import time
+from itertools import islice
+from typing import Iterable, Iterator, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from SudokuGrid import DIGITS, get_regions, get_geometry, encode_cells
+from SudokuIO import split_label
+from SudokuSolver import solve_puzzle
+from SudokuStrategies import get_strategies, new_stats
+
+# status of each grid after apply_singles
+UNSOLVED, SOLVED, INVALID = 0, 1, 2
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('SudokuVectorized requires numpy. Install it with "pip install numpy"')
+
+class BatchGeometry():
+    ''' NumPy index arrays for one grid shape '''
+    def __init__(self, size: int):
+        _require_numpy()
+        regions_across, regions_down = get_regions(size)
+        geometry = get_geometry(size, size // regions_down, size // regions_across)
+        self.size = size
+        self.digits = np.arange(size)
+        self.dtype = np.uint16 if size <= 16 else np.uint32
+        self.full = (1 << size) - 1
+        self.bit_of = np.array([0] + [1 << x for x in range(size)], dtype=self.dtype)  # digit -> bit, 0 -> no bit
+        # flat cell indices of each unit (3*size, size), and the units of each cell (size*size, 3)
+        self.units = np.array([[r * size + c for r, c in unit] for unit in geometry.units], dtype=np.intp)
+        self.cell_units = np.array([geometry.cell_unit_ids[r][c] for r in range(size) for c in range(size)],
+                                   dtype=np.intp)
+
+def parse_batch(puzzles: Iterable[str], size: int = 9) -> 'np.ndarray':
+    ''' serialised puzzles, with "." or "0" for blanks and an optional "-" label, as an (N, size*size) uint8 array '''
+    _require_numpy()
+    lines = [split_label(p)[0] for p in puzzles]
+    lines = [line.encode('ascii', errors='replace') if isinstance(line, str) else line for line in lines] # "?" for anything else
+    n_cells = size * size
+    for line in lines:
+        if len(line) != n_cells:
+            raise Exception(f'The grid string has {len(line)} characters but a {size}x{size} grid needs {n_cells}.')
+    values = np.full(256, 255, dtype=np.uint8) # character -> cell value, 255 if not a cell value
+    for x, ch in enumerate(DIGITS):
+        values[ord(ch)] = values[ord(ch.lower())] = x
+    values[ord('.')] = 0
+    chars = np.frombuffer(b''.join(lines), dtype=np.uint8)
+    grids = values[chars].reshape(len(lines), n_cells)
+    if grids.size and grids.max() > size:
+        raise Exception(f'The grid strings contain characters other than 0..{DIGITS[min(size, len(DIGITS) - 1)]} or "."')
+    return grids
+
+def candidate_masks(grids: 'np.ndarray', geom: BatchGeometry) -> 'np.ndarray':
+    ''' candidate bitmask of every cell (bit x-1 for digit x), excluding digits placed in the same row, column or box.
+        Filled cells have no candidates '''
+    bits = geom.bit_of[grids]
+    unit_used = np.bitwise_or.reduce(bits[:, geom.units], axis=2)            # (N, units)
+    used = np.bitwise_or.reduce(unit_used[:, geom.cell_units], axis=2)       # (N, cells)
+    return np.where(grids == 0, geom.full & ~used, 0).astype(geom.dtype)
+
+def _bit_planes(masks: 'np.ndarray', geom: BatchGeometry) -> 'np.ndarray':
+    ''' (N, cells, digits) array of 0/1: whether each digit is a candidate of each cell '''
+    return ((masks[..., None] >> geom.digits.astype(geom.dtype)) & 1).astype(np.uint8)
+
+def _invalid(grids: 'np.ndarray', masks: 'np.ndarray', geom: BatchGeometry) -> 'np.ndarray':
+    ''' grids with a digit repeated in a unit, or an empty cell without candidates '''
+    placed = (grids[..., None] == (geom.digits + 1)).astype(np.uint8)       # (N, cells, digits)
+    repeated = (placed[:, geom.units].sum(axis=2) > 1).any(axis=(1, 2))
+    stuck = ((grids == 0) & (masks == 0)).any(axis=1)
+    return repeated | stuck
+
+def apply_singles(grids: 'np.ndarray', size: int = 9, max_rounds: int = None) -> Tuple['np.ndarray', 'np.ndarray']:
+    ''' repeatedly place naked and hidden singles in every grid until none are left.
+        grids is modified in place. Returns (grids, status) with status UNSOLVED, SOLVED or INVALID for each grid '''
+    geom = BatchGeometry(size)
+    n_grids = grids.shape[0]
+    status = np.full(n_grids, UNSOLVED, dtype=np.uint8)
+    active = np.arange(n_grids)
+    rounds = 0
+    while active.size and (max_rounds is None or rounds < max_rounds):
+        rounds += 1
+        sub = grids[active]
+        masks = candidate_masks(sub, geom)
+        dead = _invalid(sub, masks, geom)
+        planes = _bit_planes(masks, geom)
+        # naked singles: an empty cell with one candidate
+        naked = (sub == 0) & (planes.sum(axis=2) == 1)
+        naked_values = planes.argmax(axis=2) + 1
+        low = np.where(naked, naked_values, size + 1)          # lowest proposed digit per cell, size+1 for none
+        high = np.where(naked, naked_values, 0)               # highest proposed digit per cell
+        # hidden singles: a digit with one position in a unit
+        unit_planes = planes[:, geom.units]                   # (N, units, cells in unit, digits)
+        hidden = unit_planes.sum(axis=2) == 1                 # (N, units, digits)
+        g, u, d = np.nonzero(hidden)
+        if g.size:
+            cells = geom.units[u, unit_planes[g, u, :, d].argmax(axis=1)]
+            np.minimum.at(low, (g, cells), d + 1)
+            np.maximum.at(high, (g, cells), d + 1)
+        proposed = high > 0
+        # two different digits for one cell is a contradiction
+        dead |= (proposed & (low != high)).any(axis=1)
+        place = proposed & ~dead[:, None]
+        changed = place.any(axis=1)
+        sub = np.where(place, low, sub).astype(np.uint8)
+        grids[active] = sub
+        filled = (sub != 0).all(axis=1)
+        # a grid with no placements is finished: solved, invalid or stuck for the search
+        finished = dead | ~changed
+        status[active[dead]] = INVALID
+        done = finished & ~dead
+        if done.any():
+            done_idx = active[done]
+            final_masks = candidate_masks(grids[done_idx], geom)
+            bad = _invalid(grids[done_idx], final_masks, geom)
+            status[done_idx[bad]] = INVALID
+            status[done_idx[~bad & filled[done]]] = SOLVED
+        active = active[~finished]
+    return grids, status
+
+def _grid_string(values) -> str:
+    return encode_cells(values.tolist())
+
+def solve_batch(puzzles: Iterable[str], size: int = 9, batch_size: int = 4096, **kwargs) -> Iterator[dict]:
+    ''' solve puzzles in batches: singles for the whole batch with NumPy, then SudokuSolver for whatever is left.
+        Yields a result per puzzle in input order, in the format of SudokuSolver.solve_puzzle.
+        Puzzles solved by singles alone report 0 calls and zeroed strategy stats. kwargs are passed on to solveSudoku.
+        The singles only know the classic rules, so puzzles with other constraints all go to SudokuSolver '''
+    _require_numpy()
+    if any(c != 'classic' for c in kwargs.get('constraints') or []):
+        for k, puzzle in enumerate(puzzles):
+            yield solve_puzzle(k, puzzle, **kwargs)
+        return
+    it = iter(puzzles)
+    start = 0
+    while True:
+        chunk = list(islice(it, batch_size))
+        if not chunk:
+            return
+        t0 = time.time()
+        grids, status = apply_singles(parse_batch(chunk, size), size)
+        per_puzzle = (time.time() - t0) / len(chunk)
+        for k, puzzle in enumerate(chunk):
+            if status[k] == UNSOLVED:
+                result = solve_puzzle(start + k, _grid_string(grids[k]), **kwargs)
+                result['puzzle'] = puzzle
+                result['time'] += per_puzzle
+                yield result
+                continue
+            solved = status[k] == SOLVED
+            solution = _grid_string(grids[k]) if solved else None
+            yield {
+                'index': start + k,
+                'puzzle': puzzle,
+                'solution': solution,
+                'solved': bool(solved),
+                'time': per_puzzle,
+                'calls': 0,
+                'max depth': 0,
+                'solutions': int(solved),
+                'solution set': [solution] if solved else [],
+                'strategies': new_stats(get_strategies(kwargs.get('strategies'))),
+                'status': 'solved' if solved else 'unsolvable'
+            }
+        start += len(chunk)
@@ -0,0 +1,60 @@
+from SudokuIO import read_puzzles, split_label
+import SudokuVectorized
+from SudokuVectorized import UNSOLVED, SOLVED, INVALID
+import unittest
+
+@unittest.skipIf(SudokuVectorized.np is None, 'numpy is not installed')
+class SudokuVectorizedTest(unittest.TestCase):
+    def test_parse_batch(self):
+        grids = SudokuVectorized.parse_batch(['1.34432134122143-label', '0000000000000000'], size=4)
+        self.assertEqual(grids.shape, (2, 16))
+        self.assertEqual(list(grids[0][:4]), [1, 0, 3, 4])
+        with self.assertRaises(Exception):
+            SudokuVectorized.parse_batch(['1234432134122156'], size=4)
+
+    def test_candidate_masks_match_sudoku(self):
+        from Sudoku import Sudoku
+        from SudokuGrid import SudokuGrid
+        puzzle = '530070000600195000098000060800060003400803001700020006060000280000419005000080079'
+        geom = SudokuVectorized.BatchGeometry(9)
+        masks = SudokuVectorized.candidate_masks(SudokuVectorized.parse_batch([puzzle]), geom)
+        s = Sudoku(SudokuGrid(puzzle))
+        self.assertEqual([int(m) for m in masks[0]], s.candidates.masks)
+
+    def test_singles_solve_easy_puzzles(self):
+        puzzles = list(read_puzzles('sudoku_NY.txt'))
+        solutions = {split_label(line)[1]: split_label(line)[0] for line in read_puzzles('sudoku_NY_solutions.txt')}
+        grids, status = SudokuVectorized.apply_singles(SudokuVectorized.parse_batch(puzzles))
+        easy = [k for k, p in enumerate(puzzles) if '-easy-' in p]
+        for k in easy:
+            self.assertEqual(status[k], SOLVED)
+            self.assertEqual(''.join(map(str, grids[k])), solutions[split_label(puzzles[k])[1]])
+
+    def test_status_of_invalid_and_hard_grids(self):
+        puzzles = [
+            '999200000065074800070006900004000000050008704000030000000000600080000057006007089',
+            '800000000003600000070090200050007000000045700000100030001000068008500010090000400',
+        ]
+        _, status = SudokuVectorized.apply_singles(SudokuVectorized.parse_batch(puzzles))
+        self.assertEqual(list(status), [INVALID, UNSOLVED])
+
+    def test_solve_batch_matches_solver(self):
+        from SudokuSolver import solve_puzzle
+        puzzles = list(read_puzzles('sudoku_NY.txt')) + list(read_puzzles('sudoku_hardest.txt'))[:3]
+        results = list(SudokuVectorized.solve_batch(puzzles, batch_size=4))
+        self.assertEqual([r['index'] for r in results], list(range(len(puzzles))))
+        self.assertEqual([r['puzzle'] for r in results], puzzles)
+        for result in results:
+            self.assertTrue(result['solved'])
+            self.assertEqual(result['solution'], solve_puzzle(0, result['puzzle'])['solution'])
+        self.assertTrue(any(r['calls'] == 0 for r in results))
+        # the same keys whether the singles pass or the solver finished the puzzle
+        self.assertEqual(len({tuple(sorted(r)) for r in results}), 1)
+        self.assertEqual({r['status'] for r in results}, {'solved'})
+
+    def test_solve_batch_variant_constraints(self):
+        # the NY puzzles solve by classic singles alone, but none of them has both diagonals all different
+        puzzles = list(read_puzzles('sudoku_NY.txt'))
+        results = list(SudokuVectorized.solve_batch(puzzles, constraints=['classic', 'diagonal']))
+        self.assertEqual([r['index'] for r in results], list(range(len(puzzles))))
+        self.assertFalse(any(r['solved'] for r in results))
@@ -137,6 +137,21 @@ class SudokuTest(unittest.TestCase):
         self.assertEqual(uniques, ([(1, 8), (2, 8), (5, 8)], (4, 8, 7)) )    
        
     
+    def test_undo_restores_grid_and_candidates(self):
+        s = Sudoku(SudokuGrid('000010030009005008804006025000000600008004000120087000300900200065008000900000000'))
+        s.flush_candidates()
+        grid_before = str(s.grid)
+        masks_before = s.candidates.masks[:]
+        used_before = s.candidates.row_used[:], s.candidates.col_used[:], s.candidates.box_used[:]
+        mark = s.mark()
+        i, j = next((i, j) for i in range(9) for j in range(9) if s.grid.grid_list[i][j] == 0)
+        s.place_and_erase(i, j, min(s.grid.candidates[i][j]))
+        self.assertNotEqual(str(s.grid), grid_before)
+        s.undo(mark)
+        self.assertEqual(str(s.grid), grid_before)
+        self.assertEqual(s.candidates.masks, masks_before)
+        self.assertEqual((s.candidates.row_used, s.candidates.col_used, s.candidates.box_used), used_before)
+
     def test_impossible(self):
         # impossible
         puzzles = [
@@ -249,6 +264,27 @@ class SudokuTest(unittest.TestCase):
     def assert_solveable(self, puzzle, solution):
         self.assert_expected_solver_output(puzzle, True, 1, solution)
 
+    def test_solver_copy_backtracking_matches_trail(self):
+        puzzle = '800000000003600000070090200050007000000045700000100030001000068008500010090000400'
+        grid_trail, done_trail, info_trail = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, backtrack='trail')
+        grid_copy, done_copy, info_copy = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, backtrack='copy')
+        self.assertTrue(done_trail and done_copy)
+        self.assertTrue(grid_trail == grid_copy)
+        self.assertEqual(info_trail['calls'], info_copy['calls'])
+        counts = lambda info: {name: (s['applied'], s['eliminated']) for name, s in info['strategies'].items()}
+        self.assertEqual(counts(info_trail), counts(info_copy))
+
+    def test_propagation_queues_each_unit_once(self):
+        s = Sudoku(SudokuGrid(size=9))
+        cells = [(i, j) for i in range(9) for j in range(9)]
+        s.constraint_propogation(cells * 2) # nothing to deduce, so every unit is analysed once per strategy
+        self.assertEqual(s.stats['singles']['applied'], 27)
+        self.assertEqual(s.stats['pointing']['applied'], 9)
+        _, _, info = SudokuSolver().solveSudoku(
+            SudokuGrid('100020400035040900704000001800000000091032080000100097070900600000000000000450000'), verbose=False)
+        self.assertGreater(info['strategies']['singles']['fired'], 0)
+        self.assertGreater(info['strategies']['pointing']['eliminated'], 0)
+
     def test_solver_unsolvable_1(self):
         self.assert_expected_solver_output(
             '999200000065074800070006900004000000050008704000030000000000600080000057006007089', False, 0
@@ -298,6 +334,44 @@ class SudokuTest(unittest.TestCase):
         )
 
 
+    def test_count_solutions_stops_at_limit(self):
+        puzzle = '000000000100000000000430200000000006000509000000000418000081000002000050040000300' # 76215 solutions
+        for engine in ['logic', 'dlx']:
+            grid = SudokuGrid(puzzle)
+            self.assertEqual(SudokuSolver().count_solutions(grid, limit=5, engine=engine), 5)
+            self.assertEqual(str(grid), puzzle)
+            count, solutions = SudokuSolver().count_solutions(grid, limit=3, engine=engine, return_solutions=True)
+            self.assertEqual((count, len(solutions), len(set(solutions))), (3, 3, 3))
+        _, done, info = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, solution_limit=4, keep_solutions=False)
+        self.assertTrue(done)
+        self.assertEqual(info['solutions'], 4)
+        self.assertEqual(info['solution set'], []) # only counted
+
+    def test_is_unique(self):
+        for engine in ['logic', 'dlx']:
+            self.assertTrue(SudokuSolver().is_unique(SudokuGrid('800000000003600000070090200050007000000045700000100030001000068008500010090000400'), engine=engine))
+            self.assertFalse(SudokuSolver().is_unique(SudokuGrid('080001206000020000020005040060010900002050400008000010030704050000000000406100080'), engine=engine))
+            self.assertFalse(SudokuSolver().is_unique(SudokuGrid('999200000065074800070006900004000000050008704000030000000000600080000057006007089'), engine=engine))
+        self.assertEqual(SudokuSolver().count_solutions(SudokuGrid('080001206000020000020005040060010900002050400008000010030704050000000000406100080')), 379)
+
+    def assert_valid_solution(self, puzzle, grid):
+        expected = set(range(1, grid.size + 1))
+        for unit in grid.geometry.units:
+            self.assertEqual({grid.grid_list[i][j] for i, j in unit}, expected)
+        for given, x in zip(str(SudokuGrid(puzzle)), str(grid)):
+            self.assertIn(given, ('0', x))
+
+    def test_solve_large_grids(self):
+        puzzles = [
+            '1700020006A3028000900100039A07C104B2C0030008492A0002300C180B0B00200900057C5008B0A04900A400570208200109000700A400900070010609010B00040100800A0506',
+            '00009006B0050D7400D0G0F0000380BCB05C0D00FG0000000609C000740D00F020700F300890CBDE0GF08009D0CB402150A0EB002140G006D000172036GF9058000B0010000G398060G000000B0CD007009A0C05100400001007FG0280395CE00A05DE00G2710093G700300FC5080E400BED00G003F60000000308C04DB07102'
+        ]
+        for puzzle in puzzles:
+            for engine in ('logic', 'dlx'):
+                grid, done, _ = SudokuSolver().solveSudoku(SudokuGrid(puzzle), verbose=False, engine=engine)
+                self.assertTrue(done)
+                self.assert_valid_solution(puzzle, grid)
+
     def test_solve_6_x_6_sudoku(self):
         self.assert_expected_solver_output(
             '024310036200000600652430260103400500', True, 1,